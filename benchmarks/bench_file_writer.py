@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: ghi file kiểu append thông thường so với PreallocatedFileWriter
+
+- append: cách tải một luồng trước đây, một luồng ghi nối tiếp vào file mở bằng
+  'ab', mỗi chunk là một object bytes mới (như iter_content)
+- preallocated: N segment được tải song song, file cấp phát trước, mỗi luồng dùng
+  lại một buffer và pwrite vào offset
+
+Chạy: python -m benchmarks.bench_file_writer [size_mb] [threads]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.constants import DownloadConfig
+from src.file_writer import PreallocatedFileWriter, BufferPool
+
+
+def _segments(total_size, count):
+    size = total_size // count
+    return [(i * size, total_size - 1 if i == count - 1 else (i + 1) * size - 1)
+            for i in range(count)]
+
+
+def bench_append(path, total_size, threads, chunk_size):
+    """Một luồng ghi nối tiếp (threads luôn là 1: file append chỉ ghi được theo thứ tự)"""
+    with open(path, 'ab') as f:
+        written = 0
+        while written < total_size:
+            chunk = bytes(min(chunk_size, total_size - written))
+            f.write(chunk)
+            written += len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def bench_preallocated(path, total_size, threads, chunk_size):
+    pool = BufferPool(chunk_size)
+
+    def worker(writer, start, end):
+        buffer = pool.acquire()
+        view = memoryview(buffer)
+        try:
+            offset = start
+            while offset <= end:
+                count = min(chunk_size, end - offset + 1)
+                writer.write_at(offset, view[:count])
+                offset += count
+        finally:
+            pool.release(buffer)
+
+    with PreallocatedFileWriter(path, total_size).open() as writer, \
+            ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(worker, writer, start, end)
+                       for start, end in _segments(total_size, threads)]:
+            future.result()
+        writer.flush()
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    total_size = size_mb * 1024 * 1024
+    chunk_size = DownloadConfig.CHUNK_SIZE
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, bench, workers in (('sequential append', bench_append, 1),
+                                     ('preallocated pwrite', bench_preallocated, threads)):
+            path = os.path.join(tmp_dir, name.replace(' ', '_') + '.bin')
+            started = time.perf_counter()
+            bench(path, total_size, workers, chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<20} {size_mb} MB, {workers} luồng: "
+                  f"{elapsed:.3f}s ({size_mb / elapsed:.1f} MB/s)")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
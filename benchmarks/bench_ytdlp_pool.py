@@ -0,0 +1,51 @@
+"""
+Micro-benchmark: tạo YoutubeDL mới cho mỗi video so với dùng YoutubeDLPool
+
+Mặc định chỉ đo phần overhead không cần mạng (khởi tạo YoutubeDL + tra extractor
+YouTube), đúng phần mà pool loại bỏ. Truyền thêm URL để đo extract_info thật.
+
+Chạy: python -m benchmarks.bench_ytdlp_pool [số_video] [url]
+"""
+
+import sys
+import time
+
+import yt_dlp
+
+from src.ytdlp_pool import YoutubeDLPool, METADATA_OPTIONS
+
+
+def bench_new_instance(count, url=None):
+    for _ in range(count):
+        ydl = yt_dlp.YoutubeDL(dict(METADATA_OPTIONS))
+        if url:
+            ydl.extract_info(url, download=False)
+        else:
+            ydl.get_info_extractor('Youtube')
+
+
+def bench_pool(count, url=None):
+    pool = YoutubeDLPool()
+    for _ in range(count):
+        if url:
+            pool.extract_info(url)
+        else:
+            with pool.checkout() as ydl:
+                ydl.get_info_extractor('Youtube')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    url = sys.argv[2] if len(sys.argv) > 2 else None
+
+    for name, bench in (('YoutubeDL mỗi video', bench_new_instance),
+                        ('YoutubeDLPool', bench_pool)):
+        started = time.perf_counter()
+        bench(count, url)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<22} {count} video: {elapsed:.3f}s "
+              f"({elapsed / count * 1000:.2f} ms/video)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Adaptive Concurrency cho Video Downloader Tool
+Tự điều chỉnh số request lấy metadata chạy đồng thời theo từng platform (AIMD)
+"""
+
+import collections
+import re
+import threading
+import time
+
+from .constants import AdaptiveDefaults
+from .rate_limiter import platform_for_url
+
+
+# yt-dlp chỉ báo lỗi dạng chuỗi: "HTTP Error 429: Too Many Requests"
+_HTTP_ERROR_PATTERN = re.compile(r'http error (\d{3})')
+
+
+def http_status(error):
+    """Mã HTTP của lỗi (requests, urllib, aiohttp hoặc thông báo của yt-dlp), None nếu không có"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'status', None) \
+        or getattr(error, 'code', None)
+    if isinstance(status, int):
+        return status
+    message = str(error).lower()
+    match = _HTTP_ERROR_PATTERN.search(message)
+    if match:
+        return int(match.group(1))
+    if 'too many requests' in message:
+        return 429
+    return None
+
+
+# Loại request: mỗi loại có limiter (và độ trễ nền) riêng trong cùng một platform
+EXTRACT = 'extract'         # yt-dlp extract_info, vài giây mỗi video
+WATCH_PAGE = 'watch_page'   # một GET trang watch (watch_metadata), nhanh hơn nhiều
+
+
+class AdaptiveLimiter:
+    """
+    Giới hạn số việc chạy đồng thời của một platform, tự tăng / giảm theo AIMD.
+
+    - Tăng cộng: mỗi request thành công với độ trễ bình thường cộng
+      increase / limit, tức khoảng +increase sau mỗi "vòng" limit request.
+    - Giảm nhân: nhân limit với decrease khi gặp HTTP 429, khi có forbidden_burst
+      lỗi 403 trong forbidden_window giây, hoặc khi độ trễ gần đây (EWMA ngắn)
+      vượt latency_factor lần độ trễ nền (mức thấp nhất đã thấy). Tín hiệu của
+      request bắt đầu trước lần giảm gần nhất bị bỏ qua (chúng được gửi theo
+      limit cũ), nên một loạt lỗi của cùng một đợt request chỉ làm giảm một lần.
+
+    limit nằm trong [min_limit, max_limit]; max_limit là số luồng người dùng
+    chọn. Lỗi khác (video lỗi, mạng chập chờn) không làm tăng cũng không làm giảm.
+    adaptive = False thì limit luôn bằng max_limit.
+    """
+
+    def __init__(self, platform, max_limit, initial=AdaptiveDefaults.INITIAL,
+                 min_limit=AdaptiveDefaults.MIN, increase=AdaptiveDefaults.INCREASE,
+                 decrease=AdaptiveDefaults.DECREASE, latency_factor=AdaptiveDefaults.LATENCY_FACTOR,
+                 forbidden_burst=AdaptiveDefaults.FORBIDDEN_BURST,
+                 forbidden_window=AdaptiveDefaults.FORBIDDEN_WINDOW, adaptive=True):
+        self.platform = platform
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.forbidden_burst = forbidden_burst
+        self.forbidden_window = forbidden_window
+        self.adaptive = adaptive
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)) if adaptive else self.max_limit)
+        self.in_flight = 0
+        self._latency = None        # EWMA ngắn của độ trễ
+        self._baseline = None       # Độ trễ nền
+        self._forbidden = collections.deque()
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+
+    def set_max(self, max_limit):
+        """Đổi giới hạn trên (số luồng người dùng chọn)"""
+        with self._cond:
+            self.max_limit = max(self.min_limit, max_limit)
+            self.limit = min(self.limit, self.max_limit) if self.adaptive else float(self.max_limit)
+            self._cond.notify_all()
+
+    def acquire(self):
+        """Chờ tới khi còn chỗ; trả về thời điểm bắt đầu để truyền cho release()"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started, error=None):
+        """Trả chỗ và cập nhật limit theo kết quả của request"""
+        latency = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+            if self.adaptive:
+                reason = self._throttle_reason(error, latency)
+                if reason:
+                    self._decrease(reason, started)
+                elif error is None:
+                    self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        """Chạy func(*args, **kwargs) trong một chỗ của limiter"""
+        started = self.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.release(started, e)
+            raise
+        self.release(started)
+        return result
+
+    def _throttle_reason(self, error, latency):
+        """Tín hiệu platform đang bóp request ('429', '403', 'latency') hoặc None"""
+        if error is not None:
+            status = http_status(error)
+            if status == 429:
+                return '429'
+            if status == 403:
+                now = time.monotonic()
+                self._forbidden.append(now)
+                while self._forbidden[0] < now - self.forbidden_window:
+                    self._forbidden.popleft()
+                if len(self._forbidden) >= self.forbidden_burst:
+                    self._forbidden.clear()
+                    return '403'
+            return None
+
+        if self._latency is None:
+            self._latency = self._baseline = latency
+            return None
+        self._latency += 0.3 * (latency - self._latency)
+        if self._latency > self._baseline * self.latency_factor:
+            return 'latency'
+        # Độ trễ nền bám theo mức thấp nhất và chỉ nhích lên rất chậm, để limit
+        # tăng dần không kéo độ trễ nền tăng theo
+        self._baseline = min(self._latency, self._baseline + 0.01 * (self._latency - self._baseline))
+        return None
+
+    def _decrease(self, reason, started):
+        if started <= self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        old = self.limit
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        # Độ trễ sau khi giảm sẽ được đo lại từ đầu
+        self._latency = self._baseline
+        print(f"Giảm số request đồng thời của {self.platform}: {int(old)} -> {int(self.limit)} ({reason})")
+
+
+class AdaptiveConcurrency:
+    """
+    Các AdaptiveLimiter theo platform và loại request, dùng chung cho mọi loader.
+
+    Khi tải nhiều link, nhiều loader của cùng platform chạy cùng lúc nhưng bị
+    platform giới hạn chung, nên chúng dùng chung một limiter. Request trang
+    watch và yt-dlp extract có độ trễ khác nhau hẳn: dùng chung độ trễ nền thì
+    một lần quay về yt-dlp trông như platform đang chậm đi và làm giảm limit,
+    nên mỗi loại (EXTRACT / WATCH_PAGE) có limiter riêng.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, config=None):
+        self.config = dict(config or {})
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Lấy bộ điều khiển dùng chung (section 'adaptive_concurrency' của app_config.json)"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                from .config_manager import ConfigManager
+                cls._instance = AdaptiveConcurrency(ConfigManager().get_adaptive_concurrency_config())
+            return cls._instance
+
+    def limiter(self, platform, max_limit, kind=EXTRACT):
+        """Limiter của platform cho loại request kind, giới hạn trên là max_limit (số luồng người dùng chọn)"""
+        with self._lock:
+            limiter = self._limiters.get((platform, kind))
+            if limiter is None:
+                config = self.config
+                limiter = AdaptiveLimiter(
+                    f"{platform} ({kind})", max_limit,
+                    initial=config.get('initial', AdaptiveDefaults.INITIAL),
+                    min_limit=config.get('min', AdaptiveDefaults.MIN),
+                    increase=config.get('increase', AdaptiveDefaults.INCREASE),
+                    decrease=config.get('decrease', AdaptiveDefaults.DECREASE),
+                    latency_factor=config.get('latency_factor', AdaptiveDefaults.LATENCY_FACTOR),
+                    forbidden_burst=config.get('forbidden_burst', AdaptiveDefaults.FORBIDDEN_BURST),
+                    forbidden_window=config.get('forbidden_window', AdaptiveDefaults.FORBIDDEN_WINDOW),
+                    adaptive=config.get('enabled', AdaptiveDefaults.ENABLED))
+                self._limiters[(platform, kind)] = limiter
+                return limiter
+        if limiter.max_limit != max_limit:
+            limiter.set_max(max_limit)
+        return limiter
+
+    def call(self, url, max_limit, func, *args, kind=EXTRACT, **kwargs):
+        """Chạy func(*args, **kwargs) qua limiter của platform chứa url, loại request kind"""
+        return self.limiter(platform_for_url(url), max_limit, kind).call(func, *args, **kwargs)
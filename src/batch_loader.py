@@ -0,0 +1,131 @@
+"""
+Batch Loader cho Video Downloader Tool
+Load thông tin nhiều link cùng lúc, mỗi platform một worker pool riêng
+"""
+
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .rate_limiter import platform_for_url
+from .yt_loader import YoutuberAssistant, log_traceback_to_file
+from .ytdlp_pool import YoutubeDLPool
+from .extraction_pool import ExtractionPool
+
+
+class BatchLoader(QThread):
+    """
+    Load thông tin cho danh sách link của chế độ tải nhiều.
+
+    Link được gom theo platform, mỗi platform có một ThreadPoolExecutor riêng
+    với threads worker, nên link chậm của một platform (ví dụ Facebook) không
+    chiếm worker của platform khác. Mỗi link dùng một loader riêng (max_videos
+    và bộ lọc áp dụng cho từng link), các dòng kết quả được chuyển tiếp qua
+    update_rowInfo_signal như khi load một link. Video có mặt ở nhiều link chỉ
+    được lấy metadata một lần (SingleFlight) và chỉ lên bảng một dòng.
+    """
+
+    load_info_signal = pyqtSignal(bool, str)
+    errors_signal = pyqtSignal(str)
+    update_rowInfo_signal = pyqtSignal(dict, bool)
+    progress_signal = pyqtSignal(int, int, int)     # số link đã xong, tổng số link, số link lỗi
+
+    # Loader theo platform key (PLATFORMS); platform chưa có loader sẽ báo lỗi từng link
+    LOADERS = {
+        'youtube': YoutuberAssistant,
+    }
+
+    def __init__(self, links, threads, max_videos, min_views, min_likes, min_duration):
+        super().__init__()
+        # Bỏ link trùng, giữ thứ tự người dùng nhập
+        self.links = list(dict.fromkeys(link.strip() for link in links if link.strip()))
+        self.threads = max(1, threads)
+        self.max_videos = max_videos
+        self.min_views = min_views
+        self.min_likes = min_likes
+        self.min_duration = min_duration
+        self._lock = threading.Lock()
+        self._active_loaders = set()
+        self._claimed_ids = set()
+        self._stopped = False
+        self.done = 0
+        self.failed = 0
+
+    def group_by_platform(self):
+        """Gom link theo platform key (host nếu không nhận diện được platform)"""
+        groups = {}
+        for link in self.links:
+            groups.setdefault(platform_for_url(link), []).append(link)
+        return groups
+
+    def claim_row(self, video_id):
+        """Giành quyền đưa video lên bảng; False nếu link khác trong batch đã đưa lên"""
+        with self._lock:
+            if video_id in self._claimed_ids:
+                return False
+            self._claimed_ids.add(video_id)
+            return True
+
+    def stop(self):
+        """Dừng batch: bỏ các link chưa chạy, báo các loader đang chạy dừng sớm"""
+        with self._lock:
+            self._stopped = True
+            for loader in self._active_loaders:
+                loader._isForceClosed = True
+
+    def run(self):
+        self.load_info_signal.emit(True, f'Load 0/{len(self.links)} link')
+        executors = {}
+        futures = []
+        try:
+            groups = self.group_by_platform()
+            if 'youtube' in groups and ExtractionPool.get_instance() is None:
+                YoutubeDLPool.get_instance().warm(self.threads)
+
+            for platform, links in groups.items():
+                executor = ThreadPoolExecutor(max_workers=self.threads,
+                                              thread_name_prefix=f'batch-{platform}')
+                executors[platform] = executor
+                futures.extend(executor.submit(self._load_link, platform, link) for link in links)
+            wait(futures)
+        except Exception as e:
+            log_traceback_to_file(traceback.format_exc())
+            self.errors_signal.emit(f'Lỗi xảy ra khi tải thông tin nhiều link, lý do:<br>{str(e)}')
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.load_info_signal.emit(False, '')
+
+    def _load_link(self, platform, link):
+        ok = False
+        loader = None
+        try:
+            if self._stopped:
+                return
+            loader_class = self.LOADERS.get(platform)
+            if loader_class is None:
+                self.errors_signal.emit(f'Chưa hỗ trợ load thông tin cho link: {link}')
+                return
+            loader = loader_class(platform, link, self.threads, self.max_videos,
+                                  self.min_views, self.min_likes, self.min_duration)
+            loader.errors_signal.connect(self.errors_signal)
+            loader.update_rowInfo_signal.connect(self.update_rowInfo_signal)
+            loader.claim_row = self.claim_row
+            with self._lock:
+                if self._stopped:
+                    return
+                self._active_loaders.add(loader)
+            ok = loader.loadLink(link)
+        except Exception as e:
+            log_traceback_to_file(traceback.format_exc())
+            self.errors_signal.emit(f'Không thể lấy thông tin của link: {link} bởi vì:<br>{str(e)}')
+        finally:
+            with self._lock:
+                self._active_loaders.discard(loader)
+                self.done += 1
+                if not ok:
+                    self.failed += 1
+                done, failed = self.done, self.failed
+            self.progress_signal.emit(done, len(self.links), failed)
@@ -0,0 +1,45 @@
+"""
+Bounded Executor cho Video Downloader Tool
+ThreadPoolExecutor có hàng đợi giới hạn: submit() chờ khi đã đủ việc đang chạy + đang chờ
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedExecutor:
+    """
+    Bọc ThreadPoolExecutor với số worker cố định và hàng đợi giới hạn.
+
+    Hàng đợi của ThreadPoolExecutor không giới hạn, nên vòng lặp duyệt một kênh
+    lớn sẽ submit hết mọi video ngay lập tức. Ở đây submit() bị chặn khi đã có
+    max_workers việc đang chạy và queue_size việc đang chờ (backpressure), vì vậy
+    generator nguồn chỉ chạy trước worker một đoạn ngắn và có thể dừng sớm.
+    """
+
+    def __init__(self, max_workers, queue_size=None, thread_name_prefix='worker'):
+        self.max_workers = max(1, max_workers)
+        self.queue_size = self.max_workers if queue_size is None else queue_size
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix=thread_name_prefix)
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit một việc, chờ nếu hàng đợi đã đầy"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.shutdown(wait=True)
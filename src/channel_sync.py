@@ -0,0 +1,79 @@
+"""
+Channel Sync cho Video Downloader Tool
+Lưu mốc đồng bộ của từng kênh (bảng channel_sync) để lần load sau chỉ lấy video mới đăng
+"""
+
+import json
+import time
+
+from .DBF import fetch_one, update_db
+from .constants import ChannelSyncConfig
+
+
+class ChannelCursor:
+    """Mốc đồng bộ của một tab (videos / shorts) của kênh"""
+
+    def __init__(self, newest_video_id, recent_ids, last_synced):
+        self.newest_video_id = newest_video_id
+        self.recent_ids = recent_ids
+        self.last_synced = last_synced
+
+    @property
+    def known_ids(self):
+        return set(self.recent_ids)
+
+
+class ChannelSyncStore:
+    """
+    Đọc / ghi mốc đồng bộ theo channel_id + tab.
+
+    Danh sách video của kênh xếp mới nhất trước, nên lần load sau chỉ cần duyệt
+    tới video đầu tiên đã thấy là dừng. Ngoài video mới nhất, store giữ thêm
+    recent_ids ID gần nhất làm mốc dừng dự phòng, phòng khi video mới nhất bị
+    xóa hoặc chuyển sang riêng tư.
+    """
+
+    def __init__(self, recent_ids=ChannelSyncConfig.RECENT_IDS):
+        self.recent_ids = max(1, recent_ids)
+
+    @classmethod
+    def from_config(cls, config):
+        """Tạo store từ section 'channel_sync' của app_config.json"""
+        return cls(recent_ids=config.get('recent_ids', ChannelSyncConfig.RECENT_IDS))
+
+    async def lookup(self, channel_id, tab):
+        """
+        Lấy mốc đồng bộ của kênh
+
+        Returns:
+            ChannelCursor hoặc None nếu kênh chưa được đồng bộ lần nào
+        """
+        row = await fetch_one(
+            "SELECT newest_video_id, recent_ids, last_synced FROM channel_sync "
+            "WHERE channel_id = ? AND tab = ?", channel_id, tab)
+        if not row:
+            return None
+        newest_video_id, recent_ids, last_synced = row
+        return ChannelCursor(newest_video_id, json.loads(recent_ids or '[]'), last_synced)
+
+    async def update(self, channel_id, tab, listed_ids, previous=None):
+        """
+        Ghi mốc mới sau một lần duyệt kênh
+
+        Args:
+            channel_id (str): ID kênh
+            tab (str): 'videos' hoặc 'shorts'
+            listed_ids (list): ID video đã duyệt, theo thứ tự của danh sách (mới nhất trước)
+            previous (ChannelCursor): Mốc cũ (nếu có), ID cũ được nối vào sau ID mới
+        """
+        recent = list(dict.fromkeys(list(listed_ids) + (previous.recent_ids if previous else [])))
+        recent = recent[:self.recent_ids]
+        newest = recent[0] if recent else None
+        await update_db('''
+            INSERT INTO channel_sync (channel_id, tab, newest_video_id, recent_ids, last_synced)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(channel_id, tab) DO UPDATE SET
+                newest_video_id = excluded.newest_video_id,
+                recent_ids = excluded.recent_ids,
+                last_synced = excluded.last_synced
+        ''', channel_id, tab, newest, json.dumps(recent), time.time())
@@ -6,7 +6,10 @@ Lưu trữ và tải các thiết lập filter vào file JSON
 import json
 import os
 from typing import Dict, Any
-from .constants import AppConfig, FilterDefaults
+from .constants import (AppConfig, FilterDefaults, NetworkDefaults, BandwidthDefaults,
+                        RetryDefaults, DownloadConfig, PostProcessConfig, CacheConfig,
+                        ChannelSyncConfig, FormatDefaults, DebugConfig, ExtractionConfig,
+                        NegativeCacheConfig, AdaptiveDefaults, MetadataConfig)
 
 
 class ConfigManager:
@@ -25,6 +28,79 @@ class ConfigManager:
                 "min_views": FilterDefaults.MIN_VIEWS,
                 "min_likes": FilterDefaults.MIN_LIKES,
                 "min_duration": FilterDefaults.MIN_DURATION
+            },
+            "network": {
+                "pool_size": NetworkDefaults.POOL_SIZE,
+                "youtube_base_url": NetworkDefaults.YOUTUBE_BASE_URL
+            },
+            "bandwidth": {
+                "max_speed_kbps": BandwidthDefaults.MAX_SPEED_KBPS,
+                "max_per_host": BandwidthDefaults.MAX_PER_HOST,
+                "max_per_platform": BandwidthDefaults.MAX_PER_PLATFORM
+            },
+            "retry": {
+                "max_attempts": RetryDefaults.MAX_ATTEMPTS,
+                "base_delay": RetryDefaults.BASE_DELAY,
+                "max_delay": RetryDefaults.MAX_DELAY,
+                "failure_threshold": RetryDefaults.FAILURE_THRESHOLD,
+                "cooldown": RetryDefaults.COOLDOWN
+            },
+            "download": {
+                "output_dir": DownloadConfig.OUTPUT_DIR,
+                "stream_mux": DownloadConfig.STREAM_MUX,
+                "scheduler": DownloadConfig.SCHEDULER,
+                "url_refresh_margin": DownloadConfig.URL_REFRESH_MARGIN
+            },
+            "cache": {
+                "static_ttl_hours": CacheConfig.STATIC_TTL_HOURS,
+                "volatile_ttl_hours": CacheConfig.VOLATILE_TTL_HOURS
+            },
+            "metadata": {
+                "backend": MetadataConfig.BACKEND,
+                "oembed": MetadataConfig.OEMBED
+            },
+            "adaptive_concurrency": {
+                "enabled": AdaptiveDefaults.ENABLED,
+                "initial": AdaptiveDefaults.INITIAL,
+                "min": AdaptiveDefaults.MIN,
+                "increase": AdaptiveDefaults.INCREASE,
+                "decrease": AdaptiveDefaults.DECREASE,
+                "latency_factor": AdaptiveDefaults.LATENCY_FACTOR,
+                "forbidden_burst": AdaptiveDefaults.FORBIDDEN_BURST,
+                "forbidden_window": AdaptiveDefaults.FORBIDDEN_WINDOW
+            },
+            "negative_cache": {
+                "enabled": NegativeCacheConfig.ENABLED,
+                "ttl_hours": dict(NegativeCacheConfig.TTL_HOURS)
+            },
+            "format": {
+                "max_height": FormatDefaults.MAX_HEIGHT,
+                "max_fps": FormatDefaults.MAX_FPS,
+                "codecs": list(FormatDefaults.CODECS),
+                "prefer": FormatDefaults.PREFER,
+                "max_abr": FormatDefaults.MAX_ABR,
+                "audio_codecs": list(FormatDefaults.AUDIO_CODECS)
+            },
+            "extraction": {
+                "backend": ExtractionConfig.BACKEND,
+                "workers": ExtractionConfig.WORKERS
+            },
+            "debug": {
+                "dump_info": DebugConfig.DUMP_INFO,
+                "sample_rate": DebugConfig.SAMPLE_RATE,
+                "dump_dir": DebugConfig.DUMP_DIR
+            },
+            "channel_sync": {
+                "enabled": ChannelSyncConfig.ENABLED,
+                "recent_ids": ChannelSyncConfig.RECENT_IDS
+            },
+            "post_process": {
+                "enabled": PostProcessConfig.ENABLED,
+                "workers": PostProcessConfig.WORKERS,
+                "checksum": PostProcessConfig.CHECKSUM,
+                "inspect": PostProcessConfig.INSPECT,
+                "remux": PostProcessConfig.REMUX,
+                "thumbnail": PostProcessConfig.THUMBNAIL
             }
         }
     
@@ -48,14 +124,15 @@ class ConfigManager:
         """Merge dữ liệu đã tải với config mặc định"""
         default_config = self._load_default_config()
         
-        # Merge cấu hình filter
-        if "filter" in loaded_data:
-            for key, value in loaded_data["filter"].items():
-                if key in default_config["filter"]:
-                    default_config["filter"][key] = value
-            self.config_data = default_config
-        else:
-            self.config_data = default_config
+        # Merge từng section (filter, network, ...), chỉ giữ các key đã biết
+        for section, defaults in default_config.items():
+            loaded_section = loaded_data.get(section)
+            if not isinstance(loaded_section, dict):
+                continue
+            for key, value in loaded_section.items():
+                if key in defaults:
+                    defaults[key] = value
+        self.config_data = default_config
     
     def save_config(self):
         """Lưu cấu hình hiện tại vào file JSON"""
@@ -100,3 +177,107 @@ class ConfigManager:
     def get_min_duration(self) -> int:
         """Lấy giá trị tối thiểu duration"""
         return self.config_data.get("filter", {}).get("min_duration", FilterDefaults.MIN_DURATION)
+    
+    def get_network_config(self) -> Dict[str, int]:
+        """Lấy cấu hình kết nối HTTP"""
+        return self.config_data.get("network", {})
+    
+    def get_pool_size(self) -> int:
+        """Lấy số kết nối keep-alive tối đa cho mỗi host"""
+        return self.config_data.get("network", {}).get("pool_size", NetworkDefaults.POOL_SIZE)
+    
+    def get_youtube_base_url(self) -> str:
+        """Lấy địa chỉ gốc dùng để liệt kê kênh / playlist YouTube"""
+        return self.config_data.get("network", {}).get("youtube_base_url", NetworkDefaults.YOUTUBE_BASE_URL)
+    
+    def get_bandwidth_config(self) -> Dict[str, int]:
+        """Lấy cấu hình giới hạn băng thông và số kết nối"""
+        return self.config_data.get("bandwidth", {})
+    
+    def update_bandwidth_config(self, max_speed_kbps: int = None, max_per_host: int = None,
+                                max_per_platform: int = None):
+        """Cập nhật cấu hình giới hạn băng thông và số kết nối"""
+        bandwidth_config = self.config_data.setdefault("bandwidth", {})
+        
+        if max_speed_kbps is not None:
+            bandwidth_config["max_speed_kbps"] = max_speed_kbps
+        if max_per_host is not None:
+            bandwidth_config["max_per_host"] = max_per_host
+        if max_per_platform is not None:
+            bandwidth_config["max_per_platform"] = max_per_platform
+        
+        self.save_config()
+    
+    def get_max_speed_kbps(self) -> int:
+        """Lấy giới hạn tốc độ tải (KB/s, 0 = không giới hạn)"""
+        return self.config_data.get("bandwidth", {}).get("max_speed_kbps", BandwidthDefaults.MAX_SPEED_KBPS)
+    
+    def get_max_per_host(self) -> int:
+        """Lấy số kết nối tối đa tới một host"""
+        return self.config_data.get("bandwidth", {}).get("max_per_host", BandwidthDefaults.MAX_PER_HOST)
+    
+    def get_max_per_platform(self) -> int:
+        """Lấy số kết nối tối đa tới một platform"""
+        return self.config_data.get("bandwidth", {}).get("max_per_platform", BandwidthDefaults.MAX_PER_PLATFORM)
+    
+    def get_retry_config(self) -> Dict[str, float]:
+        """Lấy cấu hình thử lại / ngắt mạch theo host"""
+        return dict(self.config_data.get("retry", {}))
+    
+    def get_stream_mux(self) -> bool:
+        """Có ghép hình + tiếng ngay trong lúc tải hay không"""
+        return self.config_data.get("download", {}).get("stream_mux", DownloadConfig.STREAM_MUX)
+    
+    def update_stream_mux(self, enabled: bool):
+        """Bật/tắt chế độ ghép hình + tiếng khi tải"""
+        self.config_data.setdefault("download", {})["stream_mux"] = enabled
+        self.save_config()
+    
+    def get_scheduler_name(self) -> str:
+        """Lấy tên chiến lược lập lịch hàng đợi tải"""
+        return self.config_data.get("download", {}).get("scheduler", DownloadConfig.SCHEDULER)
+    
+    def get_url_refresh_margin(self) -> int:
+        """Lấy số giây trước khi hết hạn mà link stream được lấy lại"""
+        return self.config_data.get("download", {}).get("url_refresh_margin",
+                                                        DownloadConfig.URL_REFRESH_MARGIN)
+    
+    def get_output_dir(self) -> str:
+        """Lấy thư mục lưu video đã tải"""
+        return self.config_data.get("download", {}).get("output_dir", DownloadConfig.OUTPUT_DIR)
+    
+    def get_post_process_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình hậu xử lý (checksum, ffprobe, remux, thumbnail)"""
+        return dict(self.config_data.get("post_process", {}))
+    
+    def get_cache_config(self) -> Dict[str, int]:
+        """Lấy TTL (giờ) của metadata cache"""
+        return dict(self.config_data.get("cache", {}))
+    
+    def get_metadata_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình backend lấy metadata khi load (fast / ytdlp)"""
+        return dict(self.config_data.get("metadata", {}))
+    
+    def get_adaptive_concurrency_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình tự điều chỉnh số request lấy metadata đồng thời"""
+        return dict(self.config_data.get("adaptive_concurrency", {}))
+    
+    def get_negative_cache_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình bỏ qua video lấy metadata thất bại (TTL theo loại lỗi, giờ)"""
+        return dict(self.config_data.get("negative_cache", {}))
+    
+    def get_format_policy(self) -> Dict[str, Any]:
+        """Lấy chính sách chọn stream hình / tiếng"""
+        return dict(self.config_data.get("format", {}))
+    
+    def get_extraction_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình backend lấy metadata (thread / process)"""
+        return dict(self.config_data.get("extraction", {}))
+    
+    def get_debug_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình ghi mẫu info dict để gỡ lỗi"""
+        return dict(self.config_data.get("debug", {}))
+    
+    def get_channel_sync_config(self) -> Dict[str, Any]:
+        """Lấy cấu hình đồng bộ kênh tăng dần"""
+        return dict(self.config_data.get("channel_sync", {}))
@@ -68,6 +68,15 @@ PLATFORMS = {
     }
 }
 
+# Từ khóa host của CDN chứa stream, dùng để gom kết nối theo platform
+STREAM_HOST_KEYWORDS = {
+    'youtube': ['googlevideo.com', 'ytimg.com'],
+    'facebook': ['fbcdn.net'],
+    'instagram': ['cdninstagram.com'],
+    'tiktok': ['tiktokcdn.com', 'tiktokv.com', 'tiktokcdn-us.com'],
+    'douyin': ['douyinvod.com', 'douyinstatic.com']
+}
+
 # Cấu hình ứng dụng
 class AppConfig:
     WINDOW_TITLE = "Video Downloader Tool"
@@ -85,3 +94,108 @@ class FilterDefaults:
     MIN_VIEWS = 0
     MIN_LIKES = 0
     MIN_DURATION = 0
+
+# Giá trị mặc định cho giới hạn băng thông / kết nối (0 = không giới hạn)
+class BandwidthDefaults:
+    MAX_SPEED_KBPS = 0
+    MAX_PER_HOST = 4
+    MAX_PER_PLATFORM = 8
+
+# Cấu hình kết nối HTTP dùng chung
+class NetworkDefaults:
+    POOL_SIZE = 10                      # Số kết nối keep-alive tối đa cho mỗi host
+    YOUTUBE_BASE_URL = "https://www.youtube.com"   # Đổi sang server giả lập khi chạy thử
+    USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# Thời gian sống của metadata đã cache (giờ)
+class CacheConfig:
+    STATIC_TTL_HOURS = 7 * 24           # Tiêu đề, mô tả, thời lượng, ...
+    VOLATILE_TTL_HOURS = 6              # Views, likes, link stream
+
+# Cách lấy metadata khi load (xem watch_metadata)
+class MetadataConfig:
+    BACKEND = "fast"                    # "fast": đọc trang watch / oEmbed, "ytdlp": luôn chạy yt-dlp
+    OEMBED = True                       # Thử oEmbed khi trang watch không có dữ liệu
+
+# Tự điều chỉnh số request lấy metadata đồng thời theo platform (AIMD, xem adaptive_concurrency)
+class AdaptiveDefaults:
+    ENABLED = True                      # Tắt thì luôn chạy đúng số luồng đã chọn
+    INITIAL = 2                         # Số request đồng thời lúc bắt đầu
+    MIN = 1
+    INCREASE = 1.0                      # Tăng thêm sau mỗi vòng request thành công
+    DECREASE = 0.5                      # Nhân với hệ số này khi bị bóp (429, 403, độ trễ tăng)
+    LATENCY_FACTOR = 2.0                # Độ trễ gần đây vượt bao nhiêu lần độ trễ nền thì giảm
+    FORBIDDEN_BURST = 3                 # Số lỗi 403 ...
+    FORBIDDEN_WINDOW = 10.0             # ... trong bao nhiêu giây thì giảm
+
+# Bỏ qua video lấy metadata thất bại (bảng negative_cache), TTL theo loại lỗi
+class NegativeCacheConfig:
+    ENABLED = True
+    TTL_HOURS = {
+        "private": 24,                  # Video riêng tư, chủ kênh có thể mở lại
+        "members": 72,                  # Chỉ dành cho hội viên
+        "age": 168,                     # Cần đăng nhập xác nhận tuổi
+        "geo": 168,                     # Bị chặn ở vùng hiện tại
+        "upcoming": 1,                  # Sắp công chiếu / sắp phát trực tiếp
+        "deleted": 720,                 # Đã xóa, kênh bị khóa, bản quyền
+        "unavailable": 24               # Không xem được, không rõ lý do
+    }
+
+# Chính sách chọn stream khi lấy metadata (xem format_selector)
+class FormatDefaults:
+    MAX_HEIGHT = 1080                   # Độ phân giải tối đa của stream hình
+    MAX_FPS = 60
+    CODECS = ["av01", "vp9", "avc1"]    # Thứ tự ưu tiên codec hình khi cùng độ phân giải
+    PREFER = "smallest"                 # "smallest" hoặc "largest" khi cùng độ phân giải + codec
+    MAX_ABR = 160                       # Bitrate tiếng tối đa (kbps)
+    AUDIO_CODECS = ["opus", "mp4a"]
+
+# Backend lấy metadata: "thread" (YoutubeDLPool trong luồng) hoặc "process" (ExtractionPool)
+class ExtractionConfig:
+    BACKEND = "thread"
+    WORKERS = 0                         # Số tiến trình của backend "process", 0 = bằng số core CPU
+
+# Ghi mẫu info dict đầy đủ của yt-dlp để gỡ lỗi (tắt mặc định)
+class DebugConfig:
+    DUMP_INFO = False
+    SAMPLE_RATE = 0.01                  # Tỉ lệ video được ghi khi bật DUMP_INFO
+    DUMP_DIR = "data/debug"
+
+# Đồng bộ kênh tăng dần (bảng channel_sync)
+class ChannelSyncConfig:
+    ENABLED = True                      # Tắt để luôn duyệt lại toàn bộ kênh
+    RECENT_IDS = 30                     # Số ID video mới nhất giữ lại làm mốc dừng
+
+# Thử lại khi lỗi mạng tạm thời và ngắt mạch host lỗi liên tiếp
+class RetryDefaults:
+    MAX_ATTEMPTS = 4                    # Số lần thử tối đa cho mỗi request
+    BASE_DELAY = 1.0                    # Thời gian chờ cơ sở (giây), nhân đôi mỗi lần
+    MAX_DELAY = 30.0                    # Thời gian chờ tối đa giữa hai lần thử
+    FAILURE_THRESHOLD = 5               # Số lỗi liên tiếp để ngắt mạch một host
+    COOLDOWN = 60.0                     # Thời gian ngừng gửi request tới host bị ngắt mạch
+
+# Cấu hình cho download engine
+class DownloadConfig:
+    OUTPUT_DIR = "downloads"
+    SEGMENT_SIZE = 8 * 1024 * 1024      # Kích thước mỗi segment Range (8MB)
+    MIN_SEGMENT_SIZE = 1024 * 1024      # File nhỏ hơn mức này sẽ tải 1 kết nối
+    CHUNK_SIZE = 1024 * 1024            # Kích thước buffer đọc từ socket (dùng lại giữa các segment)
+    REQUEST_TIMEOUT = 30                # Timeout cho mỗi request (giây)
+    URL_REFRESH_MARGIN = 30 * 60        # Lấy lại link stream nếu còn ít hơn chừng này giây là hết hạn
+    VIDEO_EXTENSION = "mp4"
+    AUDIO_EXTENSION = "m4a"
+    STREAM_MUX = False                  # Ghép hình + tiếng bằng ffmpeg ngay khi tải
+    SCHEDULER = "priority"              # priority | shortest_first | round_robin
+
+# Hậu xử lý sau khi tải (chạy trên process pool)
+class PostProcessConfig:
+    ENABLED = True
+    WORKERS = 0                         # Số tiến trình, 0 = bằng số core CPU
+    CHECKSUM = True                     # Tính checksum file đã tải
+    INSPECT = True                      # Đọc thông tin media bằng ffprobe
+    REMUX = True                        # Ghép file hình + file tiếng tải riêng thành một mp4
+    THUMBNAIL = True                    # Lấy một khung hình làm thumbnail (.jpg cạnh file video)
+    CHECKSUM_ALGORITHM = "sha256"
+    READ_BLOCK_SIZE = 1024 * 1024
+    THUMBNAIL_SEEK = 1.0                # Vị trí (giây) lấy khung hình thumbnail
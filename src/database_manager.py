@@ -4,8 +4,10 @@ Quản lý các thao tác với database
 """
 
 import json
-from .DBF import Database, insert_db, fetch_all, fetch_one, update_db
+from .DBF import Database, fetch_all, fetch_one, update_db
 from .constants import DownloadStatus
+from .rate_limiter import platform_for_url
+from .stream_url import url_expiry
 
 
 class VideoDatabaseManager:
@@ -19,6 +21,12 @@ class VideoDatabaseManager:
         try:
             self.db = await Database.get_instance(db_path)
             await self.create_videos_table()
+            await self.create_download_queue_table()
+            await self.create_media_files_table()
+            await self.create_metadata_cache_table()
+            await self.create_channel_sync_table()
+            await self.create_negative_cache_table()
+            await self.mark_interrupted_downloads_paused()
         except Exception as e:
             print(f"Lỗi khởi tạo database: {e}")
             raise
@@ -48,37 +56,234 @@ class VideoDatabaseManager:
         '''
         await self.db.execute_write(create_table_sql)
         
+    async def create_download_queue_table(self):
+        """Tạo bảng download_queue (hàng đợi tải, khóa theo video_id)"""
+        create_table_sql = '''
+            CREATE TABLE IF NOT EXISTS download_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT UNIQUE,
+                platform TEXT,
+                priority INTEGER DEFAULT 0,
+                estimated_size INTEGER,
+                state TEXT DEFAULT 'pending',
+                pvf_expires_at INTEGER,
+                paf_expires_at INTEGER,
+                pvf_ext TEXT,
+                paf_ext TEXT,
+                enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''
+        await self.db.execute_write(create_table_sql)
+        await self.add_missing_columns('download_queue', {
+            'pvf_expires_at': 'INTEGER',
+            'paf_expires_at': 'INTEGER',
+            'pvf_ext': 'TEXT',
+            'paf_ext': 'TEXT',
+        })
+        # Đưa các video chưa tải xong của database cũ vào hàng đợi
+        await self.db.execute_write('''
+            INSERT OR IGNORE INTO download_queue (video_id, state)
+            SELECT video_id, status FROM videos WHERE status IN (?, ?, ?)
+        ''', (DownloadStatus.PENDING, DownloadStatus.PAUSED, DownloadStatus.DOWNLOADING))
+        
+    async def add_missing_columns(self, table, columns):
+        """Thêm các cột mới vào bảng đã tạo từ phiên bản cũ (columns: tên -> kiểu)"""
+        existing = {row[1] for row in await fetch_all(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                await self.db.execute_write(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+        
+    async def create_media_files_table(self):
+        """Tạo bảng media_files (kết quả hậu xử lý của file đã tải, khóa theo video_id)"""
+        create_table_sql = '''
+            CREATE TABLE IF NOT EXISTS media_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT UNIQUE,
+                file_path TEXT,
+                checksum TEXT,
+                duration REAL,
+                bit_rate INTEGER,
+                video_codec TEXT,
+                audio_codec TEXT,
+                width INTEGER,
+                height INTEGER,
+                fps REAL,
+                thumb_path TEXT,
+                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''
+        await self.db.execute_write(create_table_sql)
+        
+    async def create_metadata_cache_table(self):
+        """Tạo bảng metadata_cache (metadata đã lấy theo video_id, xem MetadataCache)"""
+        create_table_sql = '''
+            CREATE TABLE IF NOT EXISTS metadata_cache (
+                video_id TEXT PRIMARY KEY,
+                static_data TEXT,
+                volatile_data TEXT,
+                static_updated_at REAL,
+                volatile_updated_at REAL
+            )
+        '''
+        await self.db.execute_write(create_table_sql)
+        
+    async def create_channel_sync_table(self):
+        """Tạo bảng channel_sync (mốc đồng bộ của từng kênh, xem ChannelSyncStore)"""
+        create_table_sql = '''
+            CREATE TABLE IF NOT EXISTS channel_sync (
+                channel_id TEXT,
+                tab TEXT,
+                newest_video_id TEXT,
+                recent_ids TEXT,
+                last_synced REAL,
+                PRIMARY KEY (channel_id, tab)
+            )
+        '''
+        await self.db.execute_write(create_table_sql)
+        
+    async def create_negative_cache_table(self):
+        """Tạo bảng negative_cache (video lấy metadata thất bại, xem NegativeCache)"""
+        create_table_sql = '''
+            CREATE TABLE IF NOT EXISTS negative_cache (
+                video_id TEXT PRIMARY KEY,
+                failure_class TEXT,
+                reason TEXT,
+                failed_at REAL,
+                expires_at REAL
+            )
+        '''
+        await self.db.execute_write(create_table_sql)
+        
     async def insert_video(self, video_data):
         """
         Thêm video mới vào database từ dict data
         
+        Nếu video_id đã tồn tại thì cập nhật thông tin (giữ nguyên record id).
+        Video đã tải xong vẫn giữ trạng thái completed và file_path để lần tải
+        sau dùng lại file cũ thay vì tải lại.
+        
         Args:
             video_data (dict): Dữ liệu video từ yt_loader
             
         Returns:
-            int: ID của record vừa tạo
+            int: ID của record
         """
-        insert_sql = '''
-            INSERT OR REPLACE INTO videos (video_id, title, desc, tags, duration, 
+        upsert_sql = '''
+            INSERT INTO videos (video_id, title, desc, tags, duration, 
                               thumb_url, views, likes, url, pvf, paf, status)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                title = excluded.title,
+                desc = excluded.desc,
+                tags = excluded.tags,
+                duration = excluded.duration,
+                thumb_url = excluded.thumb_url,
+                views = excluded.views,
+                likes = excluded.likes,
+                url = excluded.url,
+                pvf = excluded.pvf,
+                paf = excluded.paf,
+                status = CASE WHEN videos.status = ? THEN videos.status ELSE excluded.status END,
+                progress = CASE WHEN videos.status = ? THEN videos.progress ELSE 0 END,
+                updated_at = CURRENT_TIMESTAMP
         '''
         # Chuyển đổi tags từ list thành string
         tags_str = json.dumps(video_data.get('tags', [])) if video_data.get('tags') else None
         
-        return await insert_db(insert_sql, 
-                              video_data.get('id'),
-                              video_data.get('title'),
-                              video_data.get('desc'),
-                              tags_str,
-                              video_data.get('duration'),
-                              video_data.get('thumb_url'),
-                              video_data.get('views'),
-                              video_data.get('likes'),
-                              video_data.get('url'),
-                              video_data.get('pvf'),
-                              video_data.get('paf'),
-                              DownloadStatus.PENDING)
+        await update_db(upsert_sql, 
+                        video_data.get('id'),
+                        video_data.get('title'),
+                        video_data.get('desc'),
+                        tags_str,
+                        video_data.get('duration'),
+                        video_data.get('thumb_url'),
+                        video_data.get('views'),
+                        video_data.get('likes'),
+                        video_data.get('url'),
+                        video_data.get('pvf'),
+                        video_data.get('paf'),
+                        DownloadStatus.PENDING,
+                        DownloadStatus.COMPLETED,
+                        DownloadStatus.COMPLETED)
+        await self.enqueue_video(video_data)
+        row = await fetch_one("SELECT id FROM videos WHERE video_id = ?", video_data.get('id'))
+        return row[0] if row else None
+        
+    async def enqueue_video(self, video_data, priority=None):
+        """
+        Thêm (hoặc đưa lại) video vào hàng đợi tải
+        
+        Args:
+            video_data (dict): Dữ liệu video từ yt_loader
+            priority (int): Độ ưu tiên, mặc định lấy video_data['priority']; không có thì
+                            giữ độ ưu tiên đã đặt (set_queue_priority), video mới là 0
+        """
+        if priority is None:
+            priority = video_data.get('priority')
+        await update_db('''
+            INSERT INTO download_queue (video_id, platform, priority, estimated_size, state,
+                                        pvf_expires_at, paf_expires_at, pvf_ext, paf_ext)
+            VALUES (?, ?, COALESCE(?, 0), ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                platform = excluded.platform,
+                priority = CASE WHEN ? IS NULL THEN download_queue.priority
+                                ELSE excluded.priority END,
+                estimated_size = COALESCE(excluded.estimated_size, download_queue.estimated_size),
+                state = excluded.state,
+                pvf_expires_at = excluded.pvf_expires_at,
+                paf_expires_at = excluded.paf_expires_at,
+                pvf_ext = excluded.pvf_ext,
+                paf_ext = excluded.paf_ext,
+                updated_at = CURRENT_TIMESTAMP
+        ''', video_data.get('id'), platform_for_url(video_data.get('url') or ''), priority,
+            video_data.get('filesize'), DownloadStatus.PENDING,
+            url_expiry(video_data.get('pvf')), url_expiry(video_data.get('paf')),
+            video_data.get('pvf_ext'), video_data.get('paf_ext'), priority)
+        
+    async def update_stream_urls(self, record_id, stream_urls):
+        """
+        Lưu link stream vừa lấy lại và thời điểm hết hạn của chúng
+        
+        Args:
+            record_id (int): ID của record trong bảng videos
+            stream_urls (dict): pvf, paf, pvf_ext, paf_ext, pvf_expires_at, paf_expires_at
+                                (StreamUrlResolver.refresh)
+        """
+        await update_db(
+            "UPDATE videos SET pvf = ?, paf = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            stream_urls.get('pvf'), stream_urls.get('paf'), record_id)
+        await update_db('''
+            UPDATE download_queue SET pvf_expires_at = ?, paf_expires_at = ?, pvf_ext = ?, paf_ext = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE video_id = (SELECT video_id FROM videos WHERE id = ?)
+        ''', stream_urls.get('pvf_expires_at'), stream_urls.get('paf_expires_at'),
+            stream_urls.get('pvf_ext'), stream_urls.get('paf_ext'), record_id)
+        
+    async def get_download_queue(self):
+        """
+        Lấy các video trong hàng đợi chưa tải xong (pending / paused / downloading)
+        
+        Returns:
+            list: Các dòng gồm toàn bộ cột của videos, tiếp theo là platform, priority,
+                  estimated_size, pvf_expires_at, paf_expires_at, pvf_ext, paf_ext của download_queue
+        """
+        sql = '''
+            SELECT v.*, q.platform, q.priority, q.estimated_size, q.pvf_expires_at, q.paf_expires_at,
+                   q.pvf_ext, q.paf_ext
+            FROM download_queue q JOIN videos v ON v.video_id = q.video_id
+            WHERE q.state IN (?, ?, ?)
+            ORDER BY q.id
+        '''
+        return await fetch_all(sql, DownloadStatus.PENDING, DownloadStatus.PAUSED,
+                               DownloadStatus.DOWNLOADING)
+        
+    async def set_queue_priority(self, video_id, priority):
+        """Đổi độ ưu tiên của một video trong hàng đợi (giữ nguyên khi video được load lại)"""
+        await update_db(
+            "UPDATE download_queue SET priority = ?, updated_at = CURRENT_TIMESTAMP WHERE video_id = ?",
+            priority, video_id
+        )
                               
     async def get_all_videos(self):
         """Lấy tất cả video từ database"""
@@ -126,6 +331,11 @@ class VideoDatabaseManager:
                 "UPDATE videos SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                 status, record_id
             )
+        # Đồng bộ trạng thái của hàng đợi tải
+        await update_db('''
+            UPDATE download_queue SET state = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE video_id = (SELECT video_id FROM videos WHERE id = ?)
+        ''', status, record_id)
             
     async def update_video_file_path(self, record_id, file_path):
         """Cập nhật đường dẫn file video"""
@@ -134,19 +344,73 @@ class VideoDatabaseManager:
             file_path, record_id
         )
         
+    async def save_media_info(self, record_id, media_info):
+        """
+        Lưu kết quả hậu xử lý (checksum, thông tin media, thumbnail) của một video
+        
+        Args:
+            record_id (int): ID của record trong bảng videos
+            media_info (dict): Kết quả của PostProcessor
+        """
+        await update_db('''
+            INSERT INTO media_files (video_id, file_path, checksum, duration, bit_rate,
+                                     video_codec, audio_codec, width, height, fps, thumb_path)
+            SELECT video_id, ?, ?, ?, ?, ?, ?, ?, ?, ?, ? FROM videos WHERE id = ?
+            ON CONFLICT(video_id) DO UPDATE SET
+                file_path = excluded.file_path,
+                checksum = excluded.checksum,
+                duration = excluded.duration,
+                bit_rate = excluded.bit_rate,
+                video_codec = excluded.video_codec,
+                audio_codec = excluded.audio_codec,
+                width = excluded.width,
+                height = excluded.height,
+                fps = excluded.fps,
+                thumb_path = excluded.thumb_path,
+                processed_at = CURRENT_TIMESTAMP
+        ''', media_info.get('file_path'), media_info.get('checksum'), media_info.get('duration'),
+            media_info.get('bit_rate'), media_info.get('video_codec'), media_info.get('audio_codec'),
+            media_info.get('width'), media_info.get('height'), media_info.get('fps'),
+            media_info.get('thumb_path'), record_id)
+        
     async def delete_video(self, record_id):
         """Xóa video theo ID"""
-        await self.db.execute_write("DELETE FROM videos WHERE id = ?", record_id)
+        await self.db.execute_write(
+            "DELETE FROM media_files WHERE video_id = (SELECT video_id FROM videos WHERE id = ?)",
+            (record_id,))
+        await self.db.execute_write(
+            "DELETE FROM download_queue WHERE video_id = (SELECT video_id FROM videos WHERE id = ?)",
+            (record_id,))
+        await self.db.execute_write("DELETE FROM videos WHERE id = ?", (record_id,))
         
     async def delete_all_videos(self):
         """Xóa tất cả video"""
+        await self.db.execute_write("DELETE FROM download_queue")
+        await self.db.execute_write("DELETE FROM media_files")
         await self.db.execute_write("DELETE FROM videos")
+        # Mốc đồng bộ trỏ tới các video vừa xóa: không xóa thì lần load kênh sau
+        # dừng ngay ở video đã biết và bảng trống mãi
+        await self.db.execute_write("DELETE FROM channel_sync")
         
     async def get_videos_by_status(self, status):
         """Lấy danh sách video theo trạng thái"""
         sql = "SELECT * FROM videos WHERE status = ? ORDER BY id"
         return await fetch_all(sql, status)
         
+    async def mark_interrupted_downloads_paused(self):
+        """
+        Video đang tải hoặc đang hậu xử lý khi ứng dụng bị tắt sẽ được chuyển sang
+        paused; lần tải sau dùng lại phần đã tải và chạy lại bước hậu xử lý
+        """
+        await update_db(
+            "UPDATE videos SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE status IN (?, ?)",
+            DownloadStatus.PAUSED, DownloadStatus.DOWNLOADING, DownloadStatus.PROCESSING
+        )
+        await update_db(
+            "UPDATE download_queue SET state = ?, updated_at = CURRENT_TIMESTAMP WHERE state IN (?, ?)",
+            DownloadStatus.PAUSED, DownloadStatus.DOWNLOADING, DownloadStatus.PROCESSING
+        )
+        
     async def get_videos_count(self):
         """Lấy tổng số video"""
         result = await fetch_one("SELECT COUNT(*) as count FROM videos")
@@ -0,0 +1,422 @@
+"""
+Download Engine cho Video Downloader Tool
+Tải file qua HTTP bằng nhiều kết nối song song (HTTP Range segments)
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from .constants import DownloadConfig
+from .http_session import HttpSessionPool
+from .rate_limiter import TokenBucket, ConnectionLimiter
+from .file_writer import PreallocatedFileWriter, BufferPool, iter_into
+from .retry_policy import RetryPolicy
+
+
+class DownloadCancelled(Exception):
+    """Được raise khi quá trình tải bị dừng giữa chừng"""
+
+
+class SegmentManifest:
+    """
+    File sidecar (<file>.part.json) lưu các khoảng byte đã tải và đã ghi xuống đĩa.
+
+    Dữ liệu chỉ được ghi vào manifest sau khi đã flush + fsync file .part, vì vậy
+    mọi khoảng trong manifest đều là dữ liệu đã được xác nhận, có thể tiếp tục
+    tải từ đó sau khi tạm dừng hoặc khởi động lại ứng dụng.
+    """
+
+    def __init__(self, path, total_size, ranges=None):
+        self.path = path
+        self.total_size = total_size
+        self.ranges = ranges or []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, total_size):
+        """Đọc manifest cũ nếu khớp kích thước file, ngược lại tạo manifest mới"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('total_size') == total_size:
+                return cls(path, total_size, [tuple(r) for r in data.get('ranges', [])])
+        except (IOError, ValueError):
+            pass
+        return cls(path, total_size)
+
+    def add_range(self, start, end):
+        """Đánh dấu khoảng [start, end] đã tải xong và lưu manifest"""
+        if end < start:
+            return
+        with self._lock:
+            self.ranges = _merge_ranges(self.ranges + [(start, end)])
+            self._save()
+
+    def completed_bytes(self):
+        with self._lock:
+            return sum(end - start + 1 for start, end in self.ranges)
+
+    def missing_ranges(self):
+        """Các khoảng byte chưa tải"""
+        with self._lock:
+            missing = []
+            position = 0
+            for start, end in self.ranges:
+                if start > position:
+                    missing.append((position, start - 1))
+                position = max(position, end + 1)
+            if position < self.total_size:
+                missing.append((position, self.total_size - 1))
+            return missing
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'total_size': self.total_size, 'ranges': self.ranges}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _merge_ranges(ranges):
+    """Gộp các khoảng byte chồng lấn hoặc liền kề"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SegmentedDownloader:
+    """
+    Tải một file bằng cách chia thành nhiều segment và tải song song qua HTTP Range.
+
+    Nếu server không hỗ trợ Range (hoặc file quá nhỏ) thì tải bằng 1 kết nối.
+    Các segment được submit vào executor dùng chung để tổng số kết nối của cả
+    ứng dụng không vượt quá số luồng người dùng chọn.
+
+    Dữ liệu được ghi vào <file>.part kèm manifest <file>.part.json; khi bị dừng,
+    lần tải sau chỉ tải lại những khoảng byte còn thiếu.
+
+    Mỗi request giữ một slot của connection_limiter (theo host / platform) và
+    mỗi chunk đi qua bandwidth_limiter (token bucket toàn cục). Lỗi mạng tạm thời
+    được retry_policy thử lại; segment bị ngắt tải tiếp từ byte đã nhận.
+
+    File .part được cấp phát trước đủ kích thước và mỗi segment đọc thẳng từ
+    socket vào một buffer mượn từ buffer_pool rồi pwrite vào đúng offset.
+    """
+
+    # Lưu manifest sau mỗi lượng bytes này của một segment
+    CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, executor, session_pool=None, segment_size=DownloadConfig.SEGMENT_SIZE,
+                 chunk_size=DownloadConfig.CHUNK_SIZE, timeout=DownloadConfig.REQUEST_TIMEOUT,
+                 stop_event=None, bandwidth_limiter=None, connection_limiter=None,
+                 retry_policy=None):
+        self.executor = executor
+        self.session_pool = session_pool or HttpSessionPool.get_instance()
+        self.segment_size = segment_size
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.stop_event = stop_event or threading.Event()
+        self.bandwidth_limiter = bandwidth_limiter or TokenBucket()
+        self.connection_limiter = connection_limiter or ConnectionLimiter()
+        self.buffer_pool = BufferPool(chunk_size)
+        self.retry_policy = retry_policy or RetryPolicy.get_instance()
+
+    def probe(self, url):
+        """
+        Kiểm tra kích thước file và khả năng hỗ trợ Range
+
+        Returns:
+            tuple: (total_size hoặc None, supports_range)
+        """
+        return self.retry_policy.call(url, self._probe, url, stop_event=self.stop_event)
+
+    def _probe(self, url):
+        with self.connection_limiter.acquire(url), \
+                self.session_pool.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                                      timeout=self.timeout) as response:
+            response.raise_for_status()
+            if response.status_code == 206:
+                content_range = response.headers.get('Content-Range', '')
+                total = content_range.rsplit('/', 1)[-1]
+                if total.isdigit():
+                    return int(total), True
+            length = response.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else None), False
+
+    def split_segments(self, total_size, ranges=None):
+        """
+        Chia các khoảng byte cần tải thành danh sách segment (start, end) bao gồm cả end
+
+        Args:
+            total_size (int): Kích thước file
+            ranges (list): Các khoảng cần tải, mặc định là toàn bộ file
+        """
+        segments = []
+        for range_start, range_end in (ranges if ranges is not None else [(0, total_size - 1)]):
+            start = range_start
+            while start <= range_end:
+                end = min(start + self.segment_size - 1, range_end)
+                segments.append((start, end))
+                start = end + 1
+        return segments
+
+    def download(self, url, dest_path, progress_callback=None):
+        """
+        Tải url về dest_path, tiếp tục từ manifest nếu đã tải dở
+
+        Args:
+            url (str): Đường dẫn stream trực tiếp
+            dest_path (str): Đường dẫn file đích
+            progress_callback (callable): Hàm nhận (bytes_done, total_size)
+
+        Returns:
+            str: Đường dẫn file đã tải
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        part_path = dest_path + '.part'
+        total_size, supports_range = self.probe(url)
+
+        if not supports_range or total_size < DownloadConfig.MIN_SEGMENT_SIZE:
+            self._download_single(url, part_path, total_size, progress_callback)
+            os.replace(part_path, dest_path)
+            return dest_path
+
+        manifest = SegmentManifest.load(part_path + '.json', total_size)
+        resuming = os.path.exists(part_path) and os.path.getsize(part_path) == total_size
+        if not resuming:
+            manifest = SegmentManifest(manifest.path, total_size)
+
+        progress = _ProgressCounter(total_size, progress_callback, manifest.completed_bytes())
+        abort_event = threading.Event()
+
+        with PreallocatedFileWriter(part_path, total_size).open(preallocate=not resuming) as writer:
+            futures = [
+                self.executor.submit(self._download_segment, url, writer, start, end,
+                                     progress, manifest, abort_event)
+                for start, end in self.split_segments(total_size, manifest.missing_ranges())
+            ]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            if not_done:
+                # Một segment lỗi: dừng các segment còn lại (chúng vẫn lưu manifest)
+                abort_event.set()
+                for future in not_done:
+                    future.cancel()
+                wait(not_done)
+
+        errors = [future.exception() for future in futures
+                  if not future.cancelled() and future.exception()]
+        # Ưu tiên báo lỗi thật thay vì DownloadCancelled của các segment bị dừng theo
+        errors.sort(key=lambda error: isinstance(error, DownloadCancelled))
+        if errors:
+            raise errors[0]
+
+        os.replace(part_path, dest_path)
+        manifest.remove()
+        return dest_path
+
+    def _download_segment(self, url, writer, start, end, progress, manifest, abort_event):
+        """Tải một segment [start, end] và ghi vào đúng offset trong file"""
+        offset = start
+        checkpoint = start
+        buffer = self.buffer_pool.acquire()
+
+        def fetch():
+            # Mỗi lần thử tải tiếp từ offset đã nhận được ở lần trước
+            nonlocal offset, checkpoint
+            if abort_event.is_set():
+                raise DownloadCancelled()
+            headers = {'Range': f'bytes={offset}-{end}'}
+            with self.connection_limiter.acquire(url), \
+                    self.session_pool.get(url, headers=headers, stream=True,
+                                          timeout=self.timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Server không trả về 206 cho segment {start}-{end}")
+                for chunk in iter_into(response, buffer):
+                    if self.stop_event.is_set() or abort_event.is_set():
+                        raise DownloadCancelled()
+                    self.bandwidth_limiter.consume(len(chunk))
+                    writer.write_at(offset, chunk)
+                    offset += len(chunk)
+                    progress.add(len(chunk))
+                    if offset - checkpoint >= self.CHECKPOINT_BYTES:
+                        self._checkpoint(writer, manifest, checkpoint, offset - 1)
+                        checkpoint = offset
+            if offset != end + 1:
+                raise ConnectionError(f"Segment {start}-{end} bị ngắt ở byte {offset}")
+
+        try:
+            self.retry_policy.call(url, fetch, stop_event=self.stop_event)
+        finally:
+            self.buffer_pool.release(buffer)
+            # Luôn lưu phần đã tải được để lần sau tiếp tục từ offset này
+            self._checkpoint(writer, manifest, checkpoint, offset - 1)
+
+    def _checkpoint(self, writer, manifest, start, end):
+        """Flush dữ liệu xuống đĩa rồi mới ghi khoảng [start, end] vào manifest"""
+        if end < start:
+            return
+        writer.flush()
+        manifest.add_range(start, end)
+
+    def iter_stream(self, url, progress_callback=None):
+        """
+        Đọc tuần tự toàn bộ url thành các chunk (dùng cho streaming mux).
+
+        Dữ liệu được lấy theo từng cửa sổ Range kích thước segment_size, lần lượt
+        từ đầu đến cuối file, nên có thể đẩy thẳng vào pipe mà không cần file tạm.
+        Mỗi cửa sổ được đọc hết vào buffer rồi mới trả slot của connection_limiter
+        và yield: nơi nhận (pipe của ffmpeg) có thể chặn rất lâu, giữ slot trong
+        lúc đó thì stream hình của nhiều job có thể chiếm hết slot và stream tiếng
+        không bao giờ được chạy (ffmpeg chờ tiếng, mọi job treo).
+        Mỗi chunk là memoryview của buffer dùng lại, chỉ hợp lệ tới lần lặp sau.
+        """
+        total_size, supports_range = self.probe(url)
+        progress = _ProgressCounter(total_size, progress_callback)
+        if not supports_range:
+            yield from self._iter_stream_single(url, progress)
+            return
+
+        window = bytearray(min(self.segment_size, total_size))
+        for start, end in self.split_segments(total_size):
+            filled = self._read_window(url, start, end, window, progress)
+            view = memoryview(window)[:filled]
+            for offset in range(0, filled, self.chunk_size):
+                if self.stop_event.is_set():
+                    raise DownloadCancelled()
+                yield view[offset:offset + self.chunk_size]
+
+    def _read_window(self, url, start, end, window, progress):
+        """Đọc khoảng [start, end] vào window trong một slot kết nối; trả về số bytes đã đọc"""
+        filled = 0
+        buffer = self.buffer_pool.acquire()
+
+        def fetch():
+            # Mỗi lần thử đọc tiếp từ byte đã nhận được ở lần trước
+            nonlocal filled
+            headers = {'Range': f'bytes={start + filled}-{end}'}
+            with self.connection_limiter.acquire(url), \
+                    self.session_pool.get(url, headers=headers, stream=True,
+                                          timeout=self.timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Server không trả về 206 cho khoảng {start}-{end}")
+                for chunk in iter_into(response, buffer):
+                    if self.stop_event.is_set():
+                        raise DownloadCancelled()
+                    count = len(chunk)
+                    self.bandwidth_limiter.consume(count)
+                    window[filled:filled + count] = chunk
+                    filled += count
+                    progress.add(count)
+            if start + filled != end + 1:
+                raise ConnectionError(f"Stream bị ngắt ở byte {start + filled}")
+
+        try:
+            self.retry_policy.call(url, fetch, stop_event=self.stop_event)
+        finally:
+            self.buffer_pool.release(buffer)
+        return filled
+
+    def _iter_stream_single(self, url, progress):
+        """
+        Đọc url không hỗ trợ Range bằng một kết nối
+
+        Không chia được thành cửa sổ nên kết nối phải mở suốt lúc nơi nhận chặn;
+        kết nối này không lấy slot của connection_limiter để không làm treo các
+        stream khác (giới hạn băng thông vẫn áp dụng). Không thể nối tiếp phần
+        đã đẩy vào pipe, nên chỉ thử lại khi chưa nhận byte nào.
+
+        Kết quả của mỗi lần thử luôn được ghi vào circuit breaker, kể cả khi nơi
+        nhận đóng generator giữa chừng (GeneratorExit), để request thử của breaker
+        half-open không bị giữ mãi.
+        """
+        buffer = self.buffer_pool.acquire()
+        position = 0
+        attempt = 0
+        try:
+            while True:
+                self.retry_policy.before_request(url)
+                recorded = False
+                try:
+                    with self.session_pool.get(url, stream=True, timeout=self.timeout) as response:
+                        response.raise_for_status()
+                        for chunk in iter_into(response, buffer):
+                            if self.stop_event.is_set():
+                                raise DownloadCancelled()
+                            self.bandwidth_limiter.consume(len(chunk))
+                            progress.add(len(chunk))
+                            position += len(chunk)
+                            yield chunk
+                except Exception as e:
+                    recorded = True
+                    if position > 0:
+                        self.retry_policy.record_error(url, e)
+                        raise
+                    attempt += 1
+                    self.retry_policy.handle_failure(url, e, attempt, self.stop_event)
+                else:
+                    recorded = True
+                    self.retry_policy.record_success(url)
+                    return
+                finally:
+                    if not recorded:
+                        # Nơi nhận đóng stream sớm: host vẫn đang trả dữ liệu
+                        self.retry_policy.record_success(url)
+        finally:
+            self.buffer_pool.release(buffer)
+
+    def _download_single(self, url, dest_path, total_size, progress_callback):
+        """Tải toàn bộ file bằng 1 kết nối (lỗi tạm thời thì tải lại từ đầu)"""
+        self.retry_policy.call(url, self._download_single_once, url, dest_path, total_size,
+                               progress_callback, stop_event=self.stop_event)
+
+    def _download_single_once(self, url, dest_path, total_size, progress_callback):
+        progress = _ProgressCounter(total_size, progress_callback)
+        buffer = self.buffer_pool.acquire()
+        try:
+            with self.connection_limiter.acquire(url), \
+                    self.session_pool.get(url, stream=True, timeout=self.timeout) as response, \
+                    PreallocatedFileWriter(dest_path, total_size or 0).open() as writer:
+                response.raise_for_status()
+                offset = 0
+                for chunk in iter_into(response, buffer):
+                    if self.stop_event.is_set():
+                        raise DownloadCancelled()
+                    self.bandwidth_limiter.consume(len(chunk))
+                    writer.write_at(offset, chunk)
+                    offset += len(chunk)
+                    progress.add(len(chunk))
+                if total_size and offset < total_size:
+                    raise ConnectionError(f"Kết nối bị ngắt ở byte {offset}/{total_size}")
+                if offset != total_size:
+                    # Không có Content-Length: cắt file theo số bytes thực nhận
+                    os.truncate(dest_path, offset)
+        finally:
+            self.buffer_pool.release(buffer)
+
+
+class _ProgressCounter:
+    """Bộ đếm bytes đã tải, an toàn khi nhiều segment cùng cập nhật"""
+
+    def __init__(self, total_size, callback=None, done=0):
+        self.total_size = total_size
+        self.callback = callback
+        self.done = done
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done += count
+            done = self.done
+        if self.callback:
+            self.callback(done, self.total_size)
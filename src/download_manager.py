@@ -0,0 +1,333 @@
+"""
+Download Manager cho Video Downloader Tool
+QThread điều phối việc tải các video đang chờ bằng SegmentedDownloader
+"""
+
+import os
+import re
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .constants import DownloadStatus, DownloadConfig
+from .download_engine import SegmentedDownloader, DownloadCancelled
+from .http_session import HttpSessionPool
+from .rate_limiter import TokenBucket, ConnectionLimiter
+from .stream_muxer import StreamingMuxer
+from .download_scheduler import create_scheduler
+from .rate_limiter import platform_for_url
+from .file_reuse import reuse_file
+from .stream_url import url_expiry, url_extension, has_stream
+from .format_selector import mux_extension
+
+
+class DownloadManager(QThread):
+    """
+    Tải danh sách video đang chờ.
+
+    Tổng số kết nối HTTP đồng thời bằng `threads`: mọi segment của mọi file
+    đều chạy trong một executor dùng chung có `threads` worker. Mỗi khi có
+    chỗ trống, scheduler quyết định video nào được tải tiếp theo.
+
+    Khi stop() được gọi, các file đang tải chuyển sang PAUSED và giữ lại
+    file .part + manifest để lần sau tải tiếp.
+
+    Với stream_mux, video có cả pvf và paf được đẩy thẳng vào ffmpeg để ra một
+    file mp4 duy nhất (file ghép dở không tải tiếp được, sẽ tải lại từ đầu).
+
+    Nếu có post_processor, file tải xong được giao cho process pool (trạng thái
+    PROCESSING) và luồng tải chuyển ngay sang video kế tiếp; video chỉ COMPLETED
+    khi hậu xử lý xong. run() chờ hết các việc hậu xử lý trước khi kết thúc.
+
+    Nếu có url_resolver, link stream đã / sắp hết hạn được lấy lại ngay trước
+    khi tải video đó (link mới được báo qua stream_urls_signal để lưu lại).
+    """
+
+    status_signal = pyqtSignal(int, str, int)       # record_id, status, progress
+    file_path_signal = pyqtSignal(int, str)         # record_id, file_path
+    media_info_signal = pyqtSignal(int, dict)       # record_id, kết quả hậu xử lý
+    stream_urls_signal = pyqtSignal(int, dict)      # record_id, link stream vừa lấy lại
+    errors_signal = pyqtSignal(str)
+
+    def __init__(self, jobs, threads, output_dir=DownloadConfig.OUTPUT_DIR, limits=None,
+                 stream_mux=False, scheduler=None, post_processor=None, url_resolver=None):
+        """
+        Args:
+            jobs (list): Danh sách dict video lấy từ bảng videos (xem job_from_row)
+            threads (int): Tổng số kết nối song song
+            output_dir (str): Thư mục lưu file
+            limits (dict): max_speed_kbps, max_per_host, max_per_platform (0 = không giới hạn)
+            stream_mux (bool): Ghép hình + tiếng bằng ffmpeg ngay trong lúc tải
+            scheduler (BaseScheduler): Chiến lược chọn video kế tiếp (mặc định theo priority)
+            post_processor (PostProcessor): Stage hậu xử lý dùng chung (None = bỏ qua)
+            url_resolver (StreamUrlResolver): Lấy lại link stream hết hạn (None = bỏ qua)
+        """
+        super().__init__()
+        self.scheduler = scheduler or create_scheduler(DownloadConfig.SCHEDULER)
+        self.scheduler.extend(jobs)
+        self.threads = max(1, threads)
+        self.output_dir = output_dir
+        self.stop_event = threading.Event()
+        self.session_pool = HttpSessionPool.get_instance()
+        limits = limits or {}
+        self.bandwidth_limiter = TokenBucket(limits.get('max_speed_kbps', 0) * 1024)
+        self.connection_limiter = ConnectionLimiter(limits.get('max_per_host', 0),
+                                                    limits.get('max_per_platform', 0))
+        self.muxer = StreamingMuxer()
+        self.stream_mux = stream_mux and self.muxer.is_available()
+        self.post_processor = post_processor
+        self.url_resolver = url_resolver
+        self._post_futures = set()
+        self._post_lock = threading.Lock()
+
+    @staticmethod
+    def job_from_row(row):
+        """
+        Chuyển một dòng của bảng videos thành dict công việc tải
+
+        Dòng lấy từ get_download_queue() có thêm platform, priority, estimated_size,
+        pvf_expires_at, paf_expires_at, pvf_ext, paf_ext ở sau các cột của videos.
+        """
+        queue_info = row[17:24] if len(row) >= 24 else (None, 0, None, None, None, None, None)
+        return {
+            'record_id': row[0],
+            'video_id': row[1],
+            'title': row[2],
+            'url': row[9],
+            'pvf': row[10],
+            'paf': row[11],
+            'status': row[12],
+            'file_path': row[14],
+            'platform': queue_info[0] or platform_for_url(row[9] or ''),
+            'priority': queue_info[1] or 0,
+            'estimated_size': queue_info[2],
+            'pvf_expires_at': queue_info[3] or url_expiry(row[10]),
+            'paf_expires_at': queue_info[4] or url_expiry(row[11]),
+            'pvf_ext': queue_info[5] or url_extension(row[10]),
+            'paf_ext': queue_info[6] or url_extension(row[11]),
+        }
+
+    @staticmethod
+    def is_downloadable(job, resolve_streams=False):
+        """
+        Chỉ tải những dòng có link stream hợp lệ hoặc đã có file để dùng lại
+
+        resolve_streams: có url_resolver để lấy link stream khi tải, nên dòng chỉ
+        có metadata (load bằng watch_metadata) cũng tải được
+        """
+        if job.get('status') == DownloadStatus.COMPLETED and job.get('file_path'):
+            return True
+        if resolve_streams and job.get('url'):
+            return True
+        return has_stream(job.get('pvf'))
+
+    def stop(self):
+        """Yêu cầu dừng tất cả các file đang tải"""
+        self.stop_event.set()
+
+    @staticmethod
+    def stream_extensions(job):
+        """
+        Phần mở rộng (hình, tiếng) của file tải riêng từng stream
+
+        Theo container thật của stream (webm cho vp9 / av01 / opus); hai stream
+        cùng container thì file tiếng thêm '.audio' để không trùng tên file hình.
+        """
+        video_ext = job.get('pvf_ext') or DownloadConfig.VIDEO_EXTENSION
+        audio_ext = job.get('paf_ext') or DownloadConfig.AUDIO_EXTENSION
+        if audio_ext == video_ext:
+            audio_ext = f"audio.{audio_ext}"
+        return video_ext, audio_ext
+
+    def build_output_path(self, job, extension):
+        """Tạo đường dẫn file đầu ra từ tiêu đề và video_id"""
+        title = re.sub(r'[\\/:*?"<>|\r\n]+', '_', str(job.get('title') or '')).strip()[:80]
+        name = f"{title} [{job['video_id']}]" if title else str(job['video_id'])
+        return os.path.join(self.output_dir, f"{name}.{extension}")
+
+    def run(self):
+        segment_executor = ThreadPoolExecutor(max_workers=self.threads,
+                                              thread_name_prefix='segment')
+        downloader = SegmentedDownloader(segment_executor, session_pool=self.session_pool,
+                                         stop_event=self.stop_event,
+                                         bandwidth_limiter=self.bandwidth_limiter,
+                                         connection_limiter=self.connection_limiter)
+        try:
+            # Số file tải đồng thời cũng giới hạn bởi số luồng, các file chia nhau
+            # worker trong segment_executor
+            slots = threading.Semaphore(self.threads)
+            with ThreadPoolExecutor(max_workers=self.threads,
+                                    thread_name_prefix='download') as file_executor:
+                # Chỉ hỏi scheduler khi có chỗ trống để thứ tự luôn theo lịch mới nhất
+                while not self.stop_event.is_set():
+                    slots.acquire()
+                    job = self.scheduler.next()
+                    if job is None:
+                        slots.release()
+                        break
+                    future = file_executor.submit(self._download_job, downloader, job)
+                    future.add_done_callback(lambda _: slots.release())
+        finally:
+            segment_executor.shutdown(wait=True)
+            # Chờ các video đang hậu xử lý để trạng thái cuối cùng được báo về
+            with self._post_lock:
+                pending = list(self._post_futures)
+            wait(pending)
+
+    def _download_job(self, downloader, job):
+        """Tải một video (stream hình và stream âm thanh nếu có)"""
+        record_id = job['record_id']
+        if self.stop_event.is_set():
+            return
+        if self._reuse_completed_file(job):
+            return
+        self._refresh_stream_urls(job)
+        if not has_stream(job.get('pvf')):
+            # Video load bằng metadata nhanh mà không lấy được link stream
+            self.status_signal.emit(record_id, DownloadStatus.FAILED, 0)
+            self.errors_signal.emit(f"Không lấy được link stream của video {job['video_id']}")
+            return
+
+        video_ext, audio_ext = self.stream_extensions(job)
+        streams = [(job['pvf'], video_ext)]
+        if job.get('paf') and job['paf'] != 'None':
+            streams.append((job['paf'], audio_ext))
+
+        tracker = _JobProgress(len(streams), lambda percent: self.status_signal.emit(
+            record_id, DownloadStatus.DOWNLOADING, percent))
+        self.status_signal.emit(record_id, DownloadStatus.DOWNLOADING, 0)
+
+        try:
+            if self.stream_mux and len(streams) == 2:
+                dest_path = self.build_output_path(job, mux_extension(
+                    job.get('pvf_ext') or DownloadConfig.VIDEO_EXTENSION,
+                    job.get('paf_ext') or DownloadConfig.AUDIO_EXTENSION))
+                self.muxer.mux(downloader.iter_stream(job['pvf'], tracker.callback_for(0)),
+                               downloader.iter_stream(job['paf'], tracker.callback_for(1)),
+                               dest_path)
+                self._finish_job(job, dest_path)
+                return
+
+            output_paths = []
+            for index, (url, extension) in enumerate(streams):
+                dest_path = self.build_output_path(job, extension)
+                if os.path.exists(dest_path) and not os.path.exists(dest_path + '.part'):
+                    # Stream này đã tải xong ở lần trước (file .part đã được đổi tên)
+                    tracker.callback_for(index)(1, 1)
+                else:
+                    downloader.download(url, dest_path, tracker.callback_for(index))
+                output_paths.append(dest_path)
+
+            self._finish_job(job, *output_paths)
+        except DownloadCancelled:
+            self.status_signal.emit(record_id, DownloadStatus.PAUSED, tracker.percent)
+        except Exception as e:
+            traceback.print_exc()
+            self.status_signal.emit(record_id, DownloadStatus.FAILED, tracker.percent)
+            self.errors_signal.emit(f"Không thể tải video {job['video_id']}: {e}")
+
+    def _refresh_stream_urls(self, job):
+        """Lấy lại pvf / paf nếu đã hoặc sắp hết hạn; lỗi thì vẫn thử link cũ"""
+        if self.url_resolver is None or not self.url_resolver.needs_refresh(job):
+            return
+        try:
+            fresh = self.url_resolver.refresh(job)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Không lấy lại được link stream của video {job['video_id']}: {e}")
+            return
+        job.update(fresh)
+        self.stream_urls_signal.emit(job['record_id'], fresh)
+
+    def _finish_job(self, job, video_path, audio_path=None):
+        """Giao file đã tải cho stage hậu xử lý, hoặc đánh dấu hoàn thành ngay"""
+        record_id = job['record_id']
+        if self.post_processor is None:
+            self.file_path_signal.emit(record_id, video_path)
+            self.status_signal.emit(record_id, DownloadStatus.COMPLETED, 100)
+            return
+
+        self.status_signal.emit(record_id, DownloadStatus.PROCESSING, 100)
+        future = self.post_processor.submit(video_path, audio_path)
+        with self._post_lock:
+            self._post_futures.add(future)
+        future.add_done_callback(lambda done: self._on_post_processed(job, video_path, done))
+
+    def _on_post_processed(self, job, video_path, future):
+        """Nhận kết quả hậu xử lý (chạy trên luồng quản lý của process pool)"""
+        record_id = job['record_id']
+        with self._post_lock:
+            self._post_futures.discard(future)
+        try:
+            media_info = future.result()
+        except Exception as e:
+            # File đã tải xong, lỗi hậu xử lý không làm mất video
+            traceback.print_exc()
+            self.errors_signal.emit(f"Không thể hậu xử lý video {job['video_id']}: {e}")
+            media_info = {'file_path': video_path}
+        else:
+            self.media_info_signal.emit(record_id, media_info)
+        self.file_path_signal.emit(record_id, media_info['file_path'])
+        self.status_signal.emit(record_id, DownloadStatus.COMPLETED, 100)
+
+    def _reuse_completed_file(self, job):
+        """
+        Video đã tải xong trước đó: hardlink/reflink file cũ sang vị trí đầu ra mới
+
+        Returns:
+            bool: True nếu đã dùng lại file, không cần tải
+        """
+        existing_path = job.get('file_path')
+        if job.get('status') != DownloadStatus.COMPLETED or not existing_path \
+                or not os.path.isfile(existing_path):
+            return False
+
+        record_id = job['record_id']
+        # Giữ nguyên container của file đã có (mp4 / webm / mkv)
+        base_path, extension = os.path.splitext(existing_path)
+        dest_path = self.build_output_path(job, extension.lstrip('.'))
+        try:
+            pairs = [(existing_path, dest_path)]
+            # File tiếng tải riêng (không ghép) nằm cạnh file hình
+            _, audio_ext = self.stream_extensions(job)
+            existing_audio = f"{base_path}.{audio_ext}"
+            if os.path.isfile(existing_audio):
+                pairs.append((existing_audio, self.build_output_path(job, audio_ext)))
+            for src_path, target_path in pairs:
+                if os.path.abspath(src_path) != os.path.abspath(target_path) \
+                        and not os.path.exists(target_path):
+                    method = reuse_file(src_path, target_path)
+                    print(f"Dùng lại file {src_path} -> {target_path} ({method})")
+        except OSError as e:
+            print(f"Không dùng lại được file {existing_path}: {e}")
+            return False
+
+        self.file_path_signal.emit(record_id, dest_path)
+        self.status_signal.emit(record_id, DownloadStatus.COMPLETED, 100)
+        return True
+
+
+class _JobProgress:
+    """Gộp tiến độ của nhiều stream thành % của cả video, chỉ báo khi % thay đổi"""
+
+    def __init__(self, stream_count, on_percent):
+        self.stream_count = stream_count
+        self.on_percent = on_percent
+        self.fractions = [0.0] * stream_count
+        self.percent = 0
+        self._lock = threading.Lock()
+
+    def callback_for(self, index):
+        def callback(done, total):
+            if not total:
+                return
+            with self._lock:
+                self.fractions[index] = done / total
+                percent = int(sum(self.fractions) / self.stream_count * 100)
+                if percent == self.percent:
+                    return
+                self.percent = percent
+            self.on_percent(percent)
+        return callback
@@ -0,0 +1,126 @@
+"""
+Download Scheduler cho Video Downloader Tool
+Quyết định video nào trong hàng đợi được tải tiếp theo
+"""
+
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class BaseScheduler:
+    """
+    Lớp cơ sở cho các chiến lược lập lịch.
+
+    Lớp con chỉ cần cài đặt _push() và _pop(); add() / next() đã được khóa
+    nên an toàn khi nhiều luồng cùng dùng.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._size = 0
+
+    def add(self, job):
+        """Thêm một công việc vào lịch"""
+        with self._lock:
+            self._push(job, next(self._counter))
+            self._size += 1
+
+    def extend(self, jobs):
+        for job in jobs:
+            self.add(job)
+
+    def next(self):
+        """Lấy công việc kế tiếp, None nếu lịch trống"""
+        with self._lock:
+            if self._size == 0:
+                return None
+            self._size -= 1
+            return self._pop()
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def _push(self, job, sequence):
+        raise NotImplementedError
+
+    def _pop(self):
+        raise NotImplementedError
+
+
+class PriorityScheduler(BaseScheduler):
+    """Ưu tiên cao chạy trước, cùng ưu tiên thì vào trước chạy trước"""
+
+    name = 'priority'
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+
+    def _push(self, job, sequence):
+        heapq.heappush(self._heap, (-job.get('priority', 0), sequence, job))
+
+    def _pop(self):
+        return heapq.heappop(self._heap)[-1]
+
+
+class ShortestFirstScheduler(BaseScheduler):
+    """File nhỏ (theo estimated_size) chạy trước; chưa rõ kích thước thì xếp cuối"""
+
+    name = 'shortest_first'
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+
+    def _push(self, job, sequence):
+        size = job.get('estimated_size') or float('inf')
+        heapq.heappush(self._heap, (size, -job.get('priority', 0), sequence, job))
+
+    def _pop(self):
+        return heapq.heappop(self._heap)[-1]
+
+
+class RoundRobinScheduler(BaseScheduler):
+    """
+    Lần lượt lấy từng platform để một kênh/nền tảng lớn không chiếm hết hàng đợi.
+
+    Trong mỗi platform, công việc được sắp theo priority.
+    """
+
+    name = 'round_robin'
+
+    def __init__(self):
+        super().__init__()
+        self._queues = OrderedDict()
+
+    def _push(self, job, sequence):
+        platform = job.get('platform') or ''
+        heap = self._queues.setdefault(platform, [])
+        heapq.heappush(heap, (-job.get('priority', 0), sequence, job))
+
+    def _pop(self):
+        platform, heap = next(iter(self._queues.items()))
+        job = heapq.heappop(heap)[-1]
+        # Chuyển platform vừa phục vụ xuống cuối vòng
+        del self._queues[platform]
+        if heap:
+            self._queues[platform] = heap
+        return job
+
+
+SCHEDULERS = {
+    PriorityScheduler.name: PriorityScheduler,
+    ShortestFirstScheduler.name: ShortestFirstScheduler,
+    RoundRobinScheduler.name: RoundRobinScheduler,
+}
+
+
+def create_scheduler(name):
+    """Tạo scheduler theo tên, mặc định là PriorityScheduler"""
+    return SCHEDULERS.get(name, PriorityScheduler)()
@@ -0,0 +1,108 @@
+"""
+Extraction Pool cho Video Downloader Tool
+Lấy metadata bằng yt-dlp trong các tiến trình con thay vì các luồng của QThread
+"""
+
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .config_manager import ConfigManager
+from .constants import ExtractionConfig
+from .info_projection import project_info
+from .ytdlp_pool import YoutubeDLPool
+
+
+# Cấu hình của tiến trình con, được gán bởi _init_worker
+_worker_project = None
+
+
+def _init_worker(policy, debug):
+    """Chạy một lần trong mỗi tiến trình con: nạp yt-dlp và tạo sẵn một YoutubeDL"""
+    global _worker_project
+    _worker_project = functools.partial(project_info, policy=policy, debug=debug)
+    YoutubeDLPool.get_instance().warm(1)
+
+
+def _ping():
+    return os.getpid()
+
+
+def extract_lean(url, keep_format_ids=()):
+    """Chạy trong tiến trình con: extract_info rồi chỉ trả về bản rút gọn (project_info)"""
+    project = _worker_project
+    if keep_format_ids:
+        project = functools.partial(project, keep_format_ids=tuple(keep_format_ids))
+    return YoutubeDLPool.get_instance().extract_info(url, project=project)
+
+
+class ExtractionPool:
+    """
+    Backend lấy metadata chạy trên ProcessPoolExecutor (bật bằng extraction.backend = "process").
+
+    Phần việc nặng của yt-dlp (parse JSON, giải mã chữ ký, regex) là Python
+    thuần, chạy trên luồng thì bị GIL tuần tự hóa và làm giao diện giật. Ở đây
+    mỗi tiến trình con giữ một YoutubeDL riêng, rút gọn info dict ngay trong
+    tiến trình con và chỉ gửi bản rút gọn về qua hàng đợi kết quả của pool.
+    Luồng gọi extract() chỉ chờ kết quả nên không giữ GIL.
+
+    Tiến trình con được tạo bằng 'spawn' (giống PostProcessor) và được khởi
+    động sẵn khi mở ứng dụng (warm) để lần load đầu không phải chờ nạp yt-dlp.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers=None, policy=None, debug=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker,
+                                             initargs=(policy or {}, debug or {}))
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Lấy pool dùng chung theo section 'extraction' của app_config.json
+
+        Returns:
+            ExtractionPool hoặc None nếu backend không phải "process"
+        """
+        config_manager = ConfigManager()
+        config = config_manager.get_extraction_config()
+        if config.get('backend', ExtractionConfig.BACKEND) != 'process':
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = ExtractionPool(max_workers=config.get('workers') or None,
+                                               policy=config_manager.get_format_policy(),
+                                               debug=config_manager.get_debug_config())
+            return cls._instance
+
+    def warm(self):
+        """Khởi động đủ max_workers tiến trình con (không chờ)"""
+        return [self._executor.submit(_ping) for _ in range(self.max_workers)]
+
+    def submit(self, url, keep_format_ids=()):
+        """
+        Đưa một link vào hàng đợi lấy metadata
+
+        Args:
+            keep_format_ids (iterable): Giữ thêm các format_id này (xem project_info)
+
+        Returns:
+            Future: kết quả là dict của project_info
+        """
+        return self._executor.submit(extract_lean, url, tuple(keep_format_ids))
+
+    def extract(self, url, keep_format_ids=()):
+        """Lấy metadata rút gọn của url, chờ tới khi tiến trình con trả kết quả"""
+        return self.submit(url, keep_format_ids).result()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        with self._instance_lock:
+            if ExtractionPool._instance is self:
+                ExtractionPool._instance = None
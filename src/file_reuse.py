@@ -0,0 +1,61 @@
+"""
+File Reuse cho Video Downloader Tool
+Dùng lại file đã tải bằng hardlink / reflink thay vì tải lại
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+# ioctl FICLONE của Linux (btrfs, xfs, ...) để tạo reflink
+_FICLONE = 0x40049409
+
+
+def reuse_file(src_path, dest_path):
+    """
+    Tạo dest_path có cùng nội dung với src_path mà không tải lại
+
+    Thử lần lượt: hardlink -> reflink (copy-on-write) -> copy thường.
+
+    Returns:
+        str: Cách đã dùng ('hardlink', 'reflink' hoặc 'copy')
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+    try:
+        os.link(src_path, dest_path)
+        return 'hardlink'
+    except OSError:
+        pass
+
+    if _reflink(src_path, dest_path):
+        return 'reflink'
+
+    shutil.copy2(src_path, dest_path)
+    return 'copy'
+
+
+def _reflink(src_path, dest_path):
+    """Tạo bản sao copy-on-write nếu hệ thống file hỗ trợ"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        try:
+            with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+                fcntl.ioctl(dest.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            return False
+
+    if sys.platform == 'darwin':
+        # cp -c dùng clonefile() trên APFS
+        result = subprocess.run(['cp', '-c', src_path, dest_path],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode == 0:
+            return True
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+
+    return False
@@ -0,0 +1,122 @@
+"""
+File Writer cho Video Downloader Tool
+Ghi segment vào file đã cấp phát trước, dùng lại buffer thay vì tạo bytes mới cho mỗi chunk
+"""
+
+import os
+import queue
+import threading
+
+
+class PreallocatedFileWriter:
+    """
+    Ghi dữ liệu vào đúng offset của một file đã được cấp phát đủ kích thước.
+
+    - Cấp phát trước bằng posix_fallocate (nếu có) để hệ thống file cấp các
+      block liền nhau, tránh phân mảnh khi nhiều luồng ghi xen kẽ.
+    - Ghi bằng os.pwrite nên các luồng ghi song song không cần khóa và không
+      cần seek; trên hệ điều hành không có pwrite thì dùng seek + write có khóa.
+    """
+
+    def __init__(self, path, total_size):
+        self.path = path
+        self.total_size = total_size
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def open(self, preallocate=True):
+        """
+        Mở file để ghi
+
+        Args:
+            preallocate (bool): Cấp phát lại toàn bộ file (dùng khi bắt đầu tải mới)
+        """
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(self.path, flags, 0o644)
+        if preallocate:
+            os.ftruncate(self._fd, 0)
+            self._preallocate()
+        return self
+
+    def _preallocate(self):
+        if self.total_size <= 0:
+            return
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, self.total_size)
+                return
+            except OSError:
+                # Hệ thống file không hỗ trợ fallocate (vd: một số ổ mạng)
+                pass
+        os.ftruncate(self._fd, self.total_size)
+
+    def write_at(self, offset, data):
+        """Ghi toàn bộ data (bytes / memoryview) vào vị trí offset"""
+        view = memoryview(data)
+        if hasattr(os, 'pwrite'):
+            while view:
+                written = os.pwrite(self._fd, view, offset)
+                view = view[written:]
+                offset += written
+            return
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+
+    def flush(self):
+        """Đẩy dữ liệu đã ghi xuống đĩa"""
+        os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+class BufferPool:
+    """Kho bytearray kích thước cố định, được các segment mượn rồi trả lại"""
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self._buffers = queue.SimpleQueue()
+
+    def acquire(self):
+        try:
+            return self._buffers.get_nowait()
+        except queue.Empty:
+            return bytearray(self.buffer_size)
+
+    def release(self, buffer):
+        self._buffers.put(buffer)
+
+
+def iter_into(response, buffer):
+    """
+    Đọc body của response vào buffer, trả về các memoryview của phần vừa đọc.
+
+    Với response không nén, dữ liệu được đọc bằng response.raw.readinto (urllib3)
+    vào buffer dùng lại. Phải đọc qua urllib3 chứ không đọc thẳng socket bên dưới:
+    urllib3 chỉ trả kết nối về pool (keep-alive) khi chính nó thấy body đã đọc hết,
+    nếu không Response.close() sẽ đóng socket và mỗi request mở kết nối mới.
+    Memoryview chỉ hợp lệ tới lần lặp tiếp theo.
+    """
+    view = memoryview(buffer)
+    if not response.headers.get('Content-Encoding'):
+        while True:
+            count = response.raw.readinto(view)
+            if not count:
+                return
+            yield view[:count]
+    else:
+        for chunk in response.iter_content(chunk_size=len(buffer)):
+            count = len(chunk)
+            view[:count] = chunk
+            yield view[:count]
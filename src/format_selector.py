@@ -0,0 +1,180 @@
+"""
+Format Selector cho Video Downloader Tool
+Chọn stream hình + stream tiếng từ danh sách formats của yt-dlp theo chính sách cấu hình
+"""
+
+from .constants import FormatDefaults
+
+
+# Giao thức tải thẳng bằng HTTP Range được; HLS / DASH phân mảnh cần tải theo manifest
+DIRECT_PROTOCOLS = ('https', 'http')
+
+# Tên muxer của ffmpeg theo phần mở rộng của file đầu ra
+FFMPEG_FORMATS = {'mp4': 'mp4', 'm4a': 'mp4', 'webm': 'webm', 'mkv': 'matroska'}
+
+
+def codec_family(codec):
+    """'avc1.64001F' -> 'avc1', 'vp09.00.40.08' -> 'vp9', 'mp4a.40.2' -> 'mp4a'"""
+    if not codec or codec == 'none':
+        return None
+    family = codec.split('.')[0].lower()
+    return {'vp09': 'vp9', 'av1': 'av01', 'h264': 'avc1', 'hevc': 'hev1', 'hvc1': 'hev1'}.get(family, family)
+
+
+def estimate_filesize(fmt, duration=None):
+    """Dung lượng (bytes) của format: filesize, filesize_approx hoặc tbr x duration"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+    bitrate = fmt.get('tbr') or fmt.get('vbr') or fmt.get('abr')
+    if bitrate and duration:
+        return int(bitrate * 125 * duration)   # kbit/s -> bytes/s
+    return None
+
+
+def index_formats(formats, duration=None):
+    """
+    Chuẩn hóa và phân loại formats một lần
+
+    Args:
+        formats (list): info['formats'] của yt-dlp
+        duration (float): Thời lượng video (giây), dùng ước lượng dung lượng
+
+    Returns:
+        dict: 'video' -> {height: [format, ...]} (chỉ hình), 'muxed' -> như 'video'
+              nhưng có cả tiếng, 'audio' -> [format, ...] (chỉ tiếng). Mỗi format là
+              dict gồm url, ext, height, fps, vcodec, acodec, bitrate, abr, filesize, format_id.
+    """
+    index = {'video': {}, 'muxed': {}, 'audio': []}
+    for fmt in formats or []:
+        if not fmt.get('url') or (fmt.get('protocol') or 'https') not in DIRECT_PROTOCOLS:
+            continue
+        vcodec = codec_family(fmt.get('vcodec'))
+        acodec = codec_family(fmt.get('acodec'))
+        entry = {
+            'format_id': fmt.get('format_id'),
+            'url': fmt['url'],
+            'ext': fmt.get('ext'),
+            'height': fmt.get('height') or 0,
+            'fps': fmt.get('fps') or 0,
+            'vcodec': vcodec,
+            'acodec': acodec,
+            'bitrate': fmt.get('tbr') or fmt.get('vbr') or 0,
+            'abr': fmt.get('abr') or 0,
+            'audio_channels': fmt.get('audio_channels'),
+            'filesize': estimate_filesize(fmt, duration),
+        }
+        if vcodec and acodec:
+            index['muxed'].setdefault(entry['height'], []).append(entry)
+        elif vcodec:
+            index['video'].setdefault(entry['height'], []).append(entry)
+        elif acodec:
+            index['audio'].append(entry)
+    return index
+
+
+def mux_extension(video_ext, audio_ext=None):
+    """
+    Phần mở rộng của file ghép từ stream hình và stream tiếng (-c copy)
+
+    mp4 + m4a -> mp4, webm + webm -> webm; các cặp khác (ví dụ vp9 webm với
+    aac m4a) chỉ matroska chứa được nên dùng mkv.
+    """
+    if not audio_ext:
+        return video_ext
+    if video_ext == 'mp4' and audio_ext in ('m4a', 'mp4'):
+        return 'mp4'
+    if video_ext == audio_ext == 'webm':
+        return 'webm'
+    return 'mkv'
+
+
+def ffmpeg_format(path):
+    """Tên muxer ffmpeg (-f) cho file đầu ra theo phần mở rộng, mặc định matroska"""
+    extension = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    return FFMPEG_FORMATS.get(extension, 'matroska')
+
+
+def _codec_rank(codec, preferred):
+    return preferred.index(codec) if codec in preferred else len(preferred)
+
+
+def _size_key(entry, prefer):
+    # Không biết dung lượng thì xếp sau các format đã biết
+    size = entry['filesize']
+    if prefer == 'largest':
+        return -(size or entry['bitrate'] * 1000 or 0)
+    return size if size is not None else float('inf')
+
+
+def select_video(index, policy, group='video'):
+    """
+    Chọn stream hình theo policy
+
+    Độ phân giải cao nhất không vượt max_height, rồi fps cao nhất không vượt
+    max_fps, rồi codec theo thứ tự codecs, cuối cùng theo dung lượng
+    (prefer = 'smallest' hoặc 'largest').
+    """
+    by_height = index[group]
+    max_height = policy.get('max_height') or FormatDefaults.MAX_HEIGHT
+    max_fps = policy.get('max_fps') or FormatDefaults.MAX_FPS
+    codecs = policy.get('codecs') or FormatDefaults.CODECS
+    prefer = policy.get('prefer') or FormatDefaults.PREFER
+
+    if not by_height:
+        return None
+    allowed = [h for h in by_height if h <= max_height]
+    # Video chỉ có độ phân giải lớn hơn giới hạn: lấy mức nhỏ nhất hiện có
+    height = max(allowed) if allowed else min(by_height)
+    candidates = [f for f in by_height[height] if f['fps'] <= max_fps] or by_height[height]
+    return min(candidates, key=lambda f: (-f['fps'], _codec_rank(f['vcodec'], codecs),
+                                          _size_key(f, prefer)))
+
+
+def select_audio(index, policy):
+    """Chọn stream tiếng: stereo, abr cao nhất không vượt max_abr, rồi codec theo audio_codecs"""
+    max_abr = policy.get('max_abr') or FormatDefaults.MAX_ABR
+    codecs = policy.get('audio_codecs') or FormatDefaults.AUDIO_CODECS
+    audios = index['audio']
+    if not audios:
+        return None
+    candidates = [f for f in audios if f['abr'] <= max_abr] or audios
+    # Ưu tiên stereo như trước (bỏ qua bản mono / lồng tiếng 1 kênh)
+    candidates = [f for f in candidates if f['audio_channels'] in (2, None)] or candidates
+    return min(candidates, key=lambda f: (-f['abr'], _codec_rank(f['acodec'], codecs),
+                                          _size_key(f, 'smallest')))
+
+
+def select_formats(formats, policy=None, duration=None):
+    """
+    Chọn cặp (hình, tiếng) cho một video
+
+    Ưu tiên stream hình riêng + stream tiếng riêng; nếu không có stream hình
+    riêng thì dùng format có sẵn cả hình lẫn tiếng và không cần stream tiếng.
+
+    Returns:
+        tuple: (video, audio), mỗi phần là dict của index_formats hoặc None
+    """
+    return select_from_index(index_formats(formats, duration), policy)
+
+
+def select_from_index(index, policy=None):
+    """Như select_formats nhưng dùng index đã có (index_formats)"""
+    policy = policy or {}
+    if index['video']:
+        return select_video(index, policy), select_audio(index, policy)
+    if index['muxed']:
+        return select_video(index, policy, group='muxed'), None
+    return None, select_audio(index, policy)
+
+
+def find_format(index, format_id):
+    """Tìm format theo format_id trong index, None nếu không có"""
+    if not format_id:
+        return None
+    groups = list(index['video'].values()) + list(index['muxed'].values()) + [index['audio']]
+    for group in groups:
+        for fmt in group:
+            if fmt['format_id'] == format_id:
+                return fmt
+    return None
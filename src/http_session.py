@@ -0,0 +1,135 @@
+"""
+HTTP Session Pool cho Video Downloader Tool
+Dùng chung các requests.Session (keep-alive) theo từng host để tái sử dụng kết nối TCP/TLS
+"""
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import NetworkDefaults
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter đếm số request và số socket TCP thật sự được mở.
+
+    Bộ đếm của connection pool của urllib3 không tính socket bị đóng rồi mở lại
+    trên cùng object kết nối, nên ở đây đếm ngay tại HTTPConnection.connect().
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.request_count = 0
+        self.connection_count = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: self._counting_pool(pool_cls)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def _counting_pool(self, pool_cls):
+        adapter = self
+
+        class CountingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                adapter._count_connection()
+                super().connect()
+
+        return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': CountingConnection})
+
+    def _count_connection(self):
+        with self._count_lock:
+            self.connection_count += 1
+
+    def send(self, request, **kwargs):
+        with self._count_lock:
+            self.request_count += 1
+        return super().send(request, **kwargs)
+
+
+class HttpSessionPool:
+    """
+    Quản lý một requests.Session cho mỗi host.
+
+    Mỗi session có connection pool riêng (pool_size kết nối keep-alive), nên các
+    request liên tiếp tới cùng host dùng lại kết nối thay vì bắt tay TCP/TLS mới.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, pool_size=NetworkDefaults.POOL_SIZE, user_agent=NetworkDefaults.USER_AGENT):
+        self.pool_size = pool_size
+        self.user_agent = user_agent
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, pool_size=None):
+        """Lấy pool dùng chung cho toàn ứng dụng"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                if pool_size is None:
+                    from .config_manager import ConfigManager
+                    pool_size = ConfigManager().get_pool_size()
+                cls._instance = HttpSessionPool(pool_size)
+            return cls._instance
+
+    def get_session(self, url):
+        """Lấy session của host trong url (tạo mới nếu chưa có)"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session()
+                self._sessions[host] = session
+            return session
+
+    def get(self, url, **kwargs):
+        """Gửi GET qua session của host tương ứng"""
+        return self.get_session(url).get(url, **kwargs)
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = _CountingAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = self.user_agent
+        return session
+
+    def stats(self):
+        """
+        Thống kê số request và số kết nối TCP mới theo host
+
+        Returns:
+            dict: {host: {'requests': int, 'connections': int, 'reused': int}} -
+                  reused là số request chạy trên kết nối đã mở trước đó
+        """
+        with self._lock:
+            sessions = dict(self._sessions)
+
+        result = {}
+        for host, session in sessions.items():
+            adapters = [adapter for adapter in set(session.adapters.values())
+                        if isinstance(adapter, _CountingAdapter)]
+            requests_count = sum(adapter.request_count for adapter in adapters)
+            connections_count = sum(adapter.connection_count for adapter in adapters)
+            result[host] = {
+                'requests': requests_count,
+                'connections': connections_count,
+                'reused': max(0, requests_count - connections_count),
+            }
+        return result
+
+    def close_all(self):
+        """Đóng tất cả session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
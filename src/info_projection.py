@@ -0,0 +1,61 @@
+"""
+Info Projection cho Video Downloader Tool
+Rút gọn info dict của yt-dlp về các field ứng dụng cần, ghi mẫu bản đầy đủ khi bật debug
+"""
+
+import json
+import os
+import random
+
+from .constants import DebugConfig
+from .format_selector import index_formats, select_from_index, find_format
+
+
+# Các field của info dict được giữ lại
+INFO_FIELDS = ('id', 'title', 'description', 'tags', 'duration', 'view_count', 'like_count',
+               'webpage_url')
+
+
+def project_info(info, policy=None, keep_format_ids=(), debug=None):
+    """
+    Rút gọn info dict của extract_info
+
+    info đầy đủ chứa mọi format (kèm http_headers, fragments, ...), thumbnails,
+    subtitles, ... và có thể nặng vài MB. Hàm này được gọi ngay khi extract_info
+    trả về (xem YoutubeDLPool.extract_info), nên bản đầy đủ được giải phóng
+    trước khi kết quả rời khỏi worker.
+
+    Args:
+        info (dict): Kết quả extract_info
+        policy (dict): Chính sách chọn stream (xem format_selector)
+        keep_format_ids (iterable): Giữ thêm các format_id này trong 'formats'
+        debug (dict): Section 'debug' của app_config.json (ghi mẫu info đầy đủ)
+
+    Returns:
+        dict: INFO_FIELDS, 'video' / 'audio' (stream đã chọn, dạng index_formats)
+              và 'formats' (format_id -> format, chỉ các id trong keep_format_ids)
+    """
+    if debug:
+        dump_info_sample(info, debug)
+    lean = {key: info.get(key) for key in INFO_FIELDS}
+    index = index_formats(info.get('formats'), info.get('duration'))
+    lean['video'], lean['audio'] = select_from_index(index, policy)
+    lean['formats'] = {format_id: fmt for format_id in keep_format_ids
+                       if (fmt := find_format(index, format_id))}
+    return lean
+
+
+def dump_info_sample(info, debug):
+    """Ghi info đầy đủ ra file JSON với xác suất sample_rate (chỉ khi bật dump_info)"""
+    if not debug.get('dump_info'):
+        return
+    if random.random() >= debug.get('sample_rate', DebugConfig.SAMPLE_RATE):
+        return
+    dump_dir = debug.get('dump_dir', DebugConfig.DUMP_DIR)
+    try:
+        os.makedirs(dump_dir, exist_ok=True)
+        path = os.path.join(dump_dir, f"info_{info.get('id') or 'unknown'}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=4, ensure_ascii=False, default=str)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Không ghi được info debug: {e}")
@@ -6,16 +6,23 @@ Chứa giao diện chính của ứng dụng
 import asyncio
 import time
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QTableWidget, 
-                             QInputDialog)
+                             QInputDialog, QMenu)
 from PyQt6.QtCore import Qt, QTimer
 
 from src.yt_loader import YoutuberAssistant
+from .batch_loader import BatchLoader
 from .ui_components import InputSection, ControlSection, MultipleLinksDialog
 from .table_manager import VideoTableManager
 from .platform_detector import PlatformDetector
 from .database_manager import VideoDatabaseManager
 from .message_manager import MessageManager
-from .constants import AppConfig
+from .download_manager import DownloadManager
+from .download_scheduler import create_scheduler
+from .http_session import HttpSessionPool
+from .post_processor import PostProcessor
+from .stream_url import StreamUrlResolver
+from .extraction_pool import ExtractionPool
+from .constants import AppConfig, DownloadStatus
 
 class VideoDownloaderApp(QMainWindow):
     def __init__(self):
@@ -25,6 +32,11 @@ class VideoDownloaderApp(QMainWindow):
         self.platform_detector = PlatformDetector()
         self.message_manager = MessageManager(self)
         self.table_manager = None
+        self.download_manager = None
+        self.post_processor = None
+        self.yt_assistant = None
+        self.batch_loader = None
+        self._download_after_batch = False
         
         # Khởi tạo UI components
         self.input_section = None
@@ -32,6 +44,11 @@ class VideoDownloaderApp(QMainWindow):
         
         self.init_ui()
         
+        # Khởi động sẵn các tiến trình lấy metadata (nếu dùng backend "process")
+        self.extraction_pool = ExtractionPool.get_instance()
+        if self.extraction_pool:
+            self.extraction_pool.warm()
+        
     async def init_database(self):
         """Khởi tạo database và tạo bảng"""
         try:
@@ -73,6 +90,8 @@ class VideoDownloaderApp(QMainWindow):
         # Bảng hiển thị thông tin
         self.table = QTableWidget()
         self.table_manager = VideoTableManager(self.table)
+        self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.show_table_menu)
         
         # Thêm các component vào layout
         main_layout.addWidget(self.input_section)
@@ -81,22 +100,93 @@ class VideoDownloaderApp(QMainWindow):
         
         
     def start_download(self):
-        """Bắt đầu tải xuống"""
+        """
+        Bắt đầu tải (hoặc tải tiếp) các video đang chờ trong database
+
+        Ở chế độ tải nhiều link, load thông tin tất cả link trước rồi mới tải.
+        """
+        if self.download_manager and self.download_manager.isRunning():
+            self.message_manager.download_already_running()
+            return
+        
+        if self.input_section.is_multiple_links_mode():
+            if self.batch_loader and self.batch_loader.isRunning():
+                self._download_after_batch = True
+                return
+            self._download_after_batch = True
+            self.load_video_info()
+            return
+        
+        self._start_queue_download()
+        
+    def _start_queue_download(self):
+        """Tạo DownloadManager cho các video đang chờ trong database"""
         # Cập nhật trạng thái loading
         self.control_section.set_loading_status("Đang bắt đầu tải...")
         
-        # Lấy giá trị filter
-        filter_values = self.input_section.get_filter_values()
+        rows = self._run_coroutine(self.db_manager.get_download_queue()) or []
+        jobs = [DownloadManager.job_from_row(row) for row in rows]
+        jobs = [job for job in jobs if DownloadManager.is_downloadable(job, resolve_streams=True)]
+        if not jobs:
+            self.message_manager.no_pending_downloads()
+            self.control_section.set_info_status("Không có video chờ tải")
+            return
         
-        if self.input_section.is_multiple_links_mode():
-            links_count = self.input_section.get_multiple_links_count()
-            self.message_manager.download_started(links_count)
-            self.control_section.set_loading_status(f"Đang tải {links_count} video...")
-            print(f"Filter values: {filter_values}")
-        else:
-            self.message_manager.download_started()
-            self.control_section.set_loading_status("Đang tải video...")
-            print(f"Filter values: {filter_values}")
+        threads = self.input_section.get_threads_count()
+        limits = self.input_section.get_bandwidth_limits()
+        config_manager = self.input_section.config_manager
+        scheduler = create_scheduler(config_manager.get_scheduler_name())
+        self.download_manager = DownloadManager(jobs, threads,
+                                                output_dir=config_manager.get_output_dir(),
+                                                limits=limits,
+                                                stream_mux=self.input_section.is_stream_mux_enabled(),
+                                                scheduler=scheduler,
+                                                post_processor=self._get_post_processor(),
+                                                url_resolver=StreamUrlResolver(
+                                                    config_manager.get_url_refresh_margin(),
+                                                    config_manager.get_format_policy(),
+                                                    extraction_pool=self.extraction_pool,
+                                                    max_limit=threads))
+        self.download_manager.status_signal.connect(self.download_status_signal)
+        self.download_manager.file_path_signal.connect(self.download_file_path_signal)
+        self.download_manager.media_info_signal.connect(self.download_media_info_signal)
+        self.download_manager.stream_urls_signal.connect(self.download_stream_urls_signal)
+        self.download_manager.finished.connect(self.download_finished)
+        self.download_manager.start()
+        
+        self.message_manager.download_started(len(jobs))
+        self.control_section.set_loading_status(f"Đang tải {len(jobs)} video...")
+        
+    def download_status_signal(self, record_id, status, progress):
+        """Nhận tiến độ từ DownloadManager và cập nhật database + bảng"""
+        self._run_coroutine(self.update_video_status(record_id, status, progress))
+        
+    def download_file_path_signal(self, record_id, file_path):
+        """Lưu đường dẫn file đã tải"""
+        self._run_coroutine(self.db_manager.update_video_file_path(record_id, file_path))
+        self.table_manager.update_video_file_path(record_id, file_path)
+        
+    def download_media_info_signal(self, record_id, media_info):
+        """Lưu kết quả hậu xử lý (checksum, thông tin media, thumbnail)"""
+        self._run_coroutine(self.db_manager.save_media_info(record_id, media_info))
+        
+    def download_stream_urls_signal(self, record_id, stream_urls):
+        """Lưu link stream vừa được lấy lại để lần tải sau dùng tiếp"""
+        self._run_coroutine(self.db_manager.update_stream_urls(record_id, stream_urls))
+        
+    def _get_post_processor(self):
+        """Process pool hậu xử lý dùng chung cho mọi lần tải (None nếu bị tắt)"""
+        config = self.input_section.config_manager.get_post_process_config()
+        if not config.get('enabled'):
+            return None
+        if self.post_processor is None:
+            self.post_processor = PostProcessor.from_config(config)
+        return self.post_processor
+        
+    def download_finished(self):
+        """Được gọi khi DownloadManager kết thúc"""
+        print(f"Thống kê kết nối HTTP: {HttpSessionPool.get_instance().stats()}")
+        self.control_section.set_success_status("Đã tải xong")
         
     def open_multiple_links_dialog(self):
         """Mở cửa sổ nhập nhiều link"""
@@ -151,13 +241,24 @@ class VideoDownloaderApp(QMainWindow):
             self.yt_assistant._isForceClosed = True
         except Exception as e:
             pass
+        self._stop_batch_loader()
+        if self.download_manager:
+            self.download_manager.stop()
         self.message_manager.download_paused()
         self.control_section.set_info_status("Đã tạm dừng")
         
     def clear_all(self):
         """Xóa tất cả dữ liệu"""
         if self.message_manager.clear_all_confirm():
+            # Batch đang load sẽ đưa tiếp dòng vào bảng vừa xóa và tự bắt đầu tải
+            self._stop_batch_loader()
             asyncio.create_task(self._clear_all_async())
+
+    def _stop_batch_loader(self):
+        """Dừng batch đang load nhiều link và bỏ lệnh tải sau khi batch xong"""
+        self._download_after_batch = False
+        if self.batch_loader and self.batch_loader.isRunning():
+            self.batch_loader.stop()
             
     async def _clear_all_async(self):
         """Async function để xóa tất cả dữ liệu"""
@@ -171,6 +272,29 @@ class VideoDownloaderApp(QMainWindow):
             self.message_manager.clear_all_error(str(e))
             self.control_section.set_error_status("Lỗi xóa dữ liệu")
                 
+    def show_table_menu(self, position):
+        """Menu chuột phải của bảng: đặt độ ưu tiên tải cho các dòng được chọn"""
+        if not self.table_manager.get_selected_video_ids():
+            return
+        menu = QMenu(self)
+        priority_action = menu.addAction("Đặt độ ưu tiên tải...")
+        if menu.exec(self.table.viewport().mapToGlobal(position)) == priority_action:
+            self.set_selected_priority()
+            
+    def set_selected_priority(self):
+        """Đổi độ ưu tiên trong hàng đợi (download_queue) của các video được chọn"""
+        video_ids = self.table_manager.get_selected_video_ids()
+        if not video_ids:
+            return
+        priority, ok = QInputDialog.getInt(self, "Độ ưu tiên",
+                                           "Độ ưu tiên (số lớn được tải trước):", 0, -1000, 1000)
+        if not ok:
+            return
+        for video_id in video_ids:
+            self._run_coroutine(self.db_manager.set_queue_priority(video_id, priority))
+        running = bool(self.download_manager and self.download_manager.isRunning())
+        self.message_manager.priority_updated(len(video_ids), priority, running)
+            
     def search_videos(self):
         """Tìm kiếm video"""
         keyword, ok = QInputDialog.getText(self, "Tìm kiếm", "Nhập từ khóa tìm kiếm:")
@@ -179,7 +303,11 @@ class VideoDownloaderApp(QMainWindow):
             asyncio.create_task(self._search_videos_async(keyword))
             
     def load_video_info(self):
-        """Load thông tin video"""
+        """Load thông tin video (một link, hoặc tất cả link ở chế độ tải nhiều)"""
+        if (self.yt_assistant and self.yt_assistant.isRunning()) or \
+                (self.batch_loader and self.batch_loader.isRunning()):
+            return
+        
         # Cập nhật trạng thái loading
         self.control_section.set_loading_status("Đang load thông tin...")
         
@@ -195,7 +323,17 @@ class VideoDownloaderApp(QMainWindow):
         min_likes = filter_values['min_likes']
         min_duration = filter_values['min_duration']
         
+        if self.input_section.is_multiple_links_mode():
+            links = self.input_section.current_links
+            self.batch_loader = BatchLoader(links, threads, max_videos, min_views, min_likes, min_duration)
+            self.batch_loader.load_info_signal.connect(self.load_info_signal)
+            self.batch_loader.update_rowInfo_signal.connect(self.update_rowInfo_signal)
+            self.batch_loader.progress_signal.connect(self.batch_progress_signal)
+            self.batch_loader.finished.connect(self.batch_finished)
+            self.batch_loader.start()
+            return
         
+        self._download_after_batch = False
         self.yt_assistant = YoutuberAssistant(platform, link, threads, max_videos, min_views, min_likes, min_duration)
         self.yt_assistant.load_info_signal.connect(self.load_info_signal)
         self.yt_assistant.update_rowInfo_signal.connect(self.update_rowInfo_signal)
@@ -222,6 +360,20 @@ class VideoDownloaderApp(QMainWindow):
         QTimer.singleShot(0, insert_to_db)
     
     
+    def batch_progress_signal(self, done, total, failed):
+        """Hiển thị tiến độ load nhiều link trên status label"""
+        message = f"Load {done}/{total} link"
+        if failed:
+            message += f" ({failed} lỗi)"
+        self.control_section.set_loading_status(message)
+        
+    def batch_finished(self):
+        """Load nhiều link xong: tải luôn nếu người dùng đã nhấn "Bắt đầu tải" """
+        if self._download_after_batch:
+            self._download_after_batch = False
+            # Chờ các lệnh insert vào database (QTimer) của các dòng cuối chạy xong
+            QTimer.singleShot(0, self._start_queue_download)
+        
     def load_info_signal(self, value, message):
         # print(f'load_info_signal: {value}')
         # Cập nhật trạng thái khi nhận signal
@@ -264,7 +416,8 @@ class VideoDownloaderApp(QMainWindow):
     async def _insert_video_to_db(self, video_data):
         """Insert video data vào database"""
         try:
-            await self.db_manager.insert_video(video_data)
+            record_id = await self.db_manager.insert_video(video_data)
+            self.table_manager.set_record_id(video_data.get('id'), record_id)
             print(f"Đã lưu video: {video_data.get('title', 'Unknown')}")
         except Exception as e:
             print(f"Lỗi lưu video vào database: {e}")
@@ -277,8 +430,32 @@ class VideoDownloaderApp(QMainWindow):
         except Exception as e:
             print(f"Lỗi cập nhật trạng thái: {e}")
                     
+    def _run_coroutine(self, coro):
+        """Chạy một coroutine trên event loop mới và trả về kết quả"""
+        try:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                return loop.run_until_complete(coro)
+            finally:
+                loop.close()
+        except Exception as e:
+            print(f"Lỗi chạy tác vụ database: {e}")
+            return None
+                    
     def closeEvent(self, event):
         """Đóng kết nối database khi đóng ứng dụng"""
+        if self.download_manager and self.download_manager.isRunning():
+            self.download_manager.stop()
+            self.download_manager.wait()
+        if self.batch_loader and self.batch_loader.isRunning():
+            self.batch_loader.stop()
+            self.batch_loader.wait()
+        if self.post_processor:
+            self.post_processor.shutdown()
+        if self.extraction_pool:
+            self.extraction_pool.shutdown(wait=False)
+        HttpSessionPool.get_instance().close_all()
         try:
             # Tạo event loop mới để đóng database
             loop = asyncio.new_event_loop()
@@ -38,16 +38,31 @@ class MessageManager(QObject):
         return reply == QMessageBox.StandardButton.Yes
     
     # Các thông báo cụ thể cho ứng dụng
-    def download_started(self, links_count=None):
+    def download_started(self, videos_count=None):
         """Thông báo bắt đầu tải"""
-        if links_count:
-            self.show_info("Thông báo", f"Bắt đầu tải {links_count} link. Chức năng tải xuống sẽ được triển khai!")
+        if videos_count:
+            self.show_info("Thông báo", f"Bắt đầu tải {videos_count} video!")
         else:
-            self.show_info("Thông báo", "Chức năng tải xuống sẽ được triển khai!")
+            self.show_info("Thông báo", "Bắt đầu tải video!")
+    
+    def download_already_running(self):
+        """Thông báo đang có tiến trình tải"""
+        self.show_info("Thông báo", "Đang có tiến trình tải xuống, vui lòng chờ hoặc tạm dừng trước!")
+    
+    def no_pending_downloads(self):
+        """Thông báo không có video nào chờ tải"""
+        self.show_warning("Cảnh báo", "Không có video nào đang chờ tải. Hãy load thông tin video trước!")
+    
+    def priority_updated(self, videos_count, priority, running=False):
+        """Thông báo đã đổi độ ưu tiên trong hàng đợi"""
+        message = f"Đã đặt độ ưu tiên {priority} cho {videos_count} video."
+        if running:
+            message += " Thứ tự mới được áp dụng từ lần bắt đầu tải sau."
+        self.show_info("Thông báo", message)
     
     def download_paused(self):
         """Thông báo tạm dừng tải"""
-        self.show_info("Thông báo", "Chức năng tạm dừng sẽ được triển khai!")
+        self.show_info("Thông báo", "Đã tạm dừng. Nhấn \"Bắt đầu tải\" để tải tiếp từ vị trí đã dừng.")
     
     def clear_all_confirm(self):
         """Xác nhận xóa tất cả dữ liệu"""
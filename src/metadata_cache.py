@@ -0,0 +1,120 @@
+"""
+Metadata Cache cho Video Downloader Tool
+Lưu metadata đã lấy của video (bảng metadata_cache) để lần load sau không phải lấy lại
+"""
+
+import json
+import time
+
+from .DBF import fetch_one, update_db
+from .constants import CacheConfig
+from .stream_url import is_expiring
+
+
+class CachedMetadata:
+    """Một bản ghi trong cache kèm trạng thái hết hạn của từng nhóm field"""
+
+    def __init__(self, data, static_expired, volatile_expired):
+        self.data = data
+        self.static_expired = static_expired
+        self.volatile_expired = volatile_expired
+
+    @property
+    def is_fresh(self):
+        return not self.static_expired and not self.volatile_expired
+
+
+class MetadataCache:
+    """
+    Cache metadata theo video_id với hai TTL.
+
+    - Field tĩnh (tiêu đề, mô tả, thời lượng, ...) hiếm khi đổi, TTL dài.
+    - Field biến động (views, likes, link stream) đổi liên tục, TTL ngắn.
+
+    Mỗi nhóm được lưu thành một cột JSON với thời điểm cập nhật riêng, nên khi
+    chỉ một nhóm hết hạn thì chỉ nhóm đó được ghi đè bằng dữ liệu mới.
+    """
+
+    STATIC_FIELDS = ('id', 'title', 'desc', 'tags', 'duration', 'thumb_url', 'url')
+    VOLATILE_FIELDS = ('views', 'likes', 'pvf', 'paf', 'pvf_ext', 'paf_ext', 'filesize')
+
+    def __init__(self, static_ttl=CacheConfig.STATIC_TTL_HOURS * 3600,
+                 volatile_ttl=CacheConfig.VOLATILE_TTL_HOURS * 3600):
+        self.static_ttl = static_ttl
+        self.volatile_ttl = volatile_ttl
+
+    @classmethod
+    def from_config(cls, config):
+        """Tạo cache từ section 'cache' của app_config.json (TTL tính bằng giờ)"""
+        return cls(static_ttl=config.get('static_ttl_hours', CacheConfig.STATIC_TTL_HOURS) * 3600,
+                   volatile_ttl=config.get('volatile_ttl_hours', CacheConfig.VOLATILE_TTL_HOURS) * 3600)
+
+    async def lookup(self, video_id, require_streams=False):
+        """
+        Lấy metadata đã cache của video
+
+        Args:
+            video_id (str): ID video
+            require_streams (bool): Coi nhóm biến động là hết hạn nếu chưa có link stream
+                                    (bản ghi lấy từ danh sách kênh không có pvf / paf)
+                                    hoặc link stream đã / sắp hết hạn
+
+        Returns:
+            CachedMetadata hoặc None nếu chưa có trong cache
+        """
+        row = await fetch_one(
+            "SELECT static_data, volatile_data, static_updated_at, volatile_updated_at "
+            "FROM metadata_cache WHERE video_id = ?", video_id)
+        if not row:
+            return None
+
+        static_data, volatile_data, static_updated_at, volatile_updated_at = row
+        now = time.time()
+        data = dict(json.loads(static_data or '{}'), **json.loads(volatile_data or '{}'))
+        static_expired = static_data is None or now - (static_updated_at or 0) > self.static_ttl
+        volatile_expired = volatile_data is None or now - (volatile_updated_at or 0) > self.volatile_ttl
+        if require_streams and (not data.get('pvf') or is_expiring(data['pvf'])
+                                or is_expiring(data.get('paf'))):
+            volatile_expired = True
+        return CachedMetadata(data, static_expired, volatile_expired)
+
+    async def store(self, video_data, static=True, volatile=True):
+        """
+        Ghi metadata vào cache
+
+        Args:
+            video_data (dict): Dict đã chuẩn hóa (cùng dạng với getMetadataFromYtdlp)
+            static (bool): Ghi nhóm field tĩnh
+            volatile (bool): Ghi nhóm field biến động
+        """
+        if not (static or volatile) or not video_data.get('id'):
+            return
+        # Bản ghi chỉ có tiêu đề / thumbnail (oEmbed) không được cache, lần sau lấy lại đủ
+        if video_data.get('duration') in (None, 'None'):
+            return
+        now = time.time()
+        static_data = json.dumps({key: video_data.get(key) for key in self.STATIC_FIELDS},
+                                 ensure_ascii=False) if static else None
+        volatile_data = json.dumps({key: video_data.get(key) for key in self.VOLATILE_FIELDS},
+                                   ensure_ascii=False) if volatile else None
+        await update_db('''
+            INSERT INTO metadata_cache (video_id, static_data, volatile_data,
+                                        static_updated_at, volatile_updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                static_data = COALESCE(excluded.static_data, metadata_cache.static_data),
+                volatile_data = COALESCE(excluded.volatile_data, metadata_cache.volatile_data),
+                static_updated_at = COALESCE(excluded.static_updated_at, metadata_cache.static_updated_at),
+                volatile_updated_at = COALESCE(excluded.volatile_updated_at, metadata_cache.volatile_updated_at)
+        ''', video_data['id'], static_data, volatile_data,
+            now if static else None, now if volatile else None)
+
+    @staticmethod
+    def merge(cached, fresh):
+        """Giữ field còn hạn từ cache, lấy field hết hạn từ dữ liệu mới"""
+        merged = dict(cached.data)
+        if cached.static_expired:
+            merged.update({key: fresh.get(key) for key in MetadataCache.STATIC_FIELDS})
+        if cached.volatile_expired:
+            merged.update({key: fresh.get(key) for key in MetadataCache.VOLATILE_FIELDS})
+        return merged
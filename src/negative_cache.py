@@ -0,0 +1,108 @@
+"""
+Negative Cache cho Video Downloader Tool
+Ghi nhớ video không lấy được metadata (riêng tư, đã xóa, chặn theo vùng, ...) để không thử lại mỗi lần load
+"""
+
+import time
+
+from .DBF import fetch_one, update_db
+from .constants import NegativeCacheConfig
+
+
+# Thông báo của lỗi tạm thời, xét trước FAILURE_PATTERNS: YouTube cũng mở đầu chúng bằng
+# "Video unavailable" ("Video unavailable. This content isn't available, try again later")
+TRANSIENT_PATTERNS = ('try again later', 'please try again', 'temporarily', 'not a bot',
+                      'too many requests', 'rate limit', 'rate-limit')
+
+# Nhận diện loại lỗi theo nội dung thông báo của yt-dlp, xét theo thứ tự
+# ("Video unavailable. This video is private" là 'private', không phải 'unavailable').
+# Lỗi không khớp mẫu nào (mạng, bot check, lỗi của chương trình) không được cache.
+FAILURE_PATTERNS = (
+    ('private', ('private video', 'this video is private')),
+    ('members', ('members-only', 'members only', 'join this channel')),
+    ('age', ('confirm your age', 'age-restricted', 'age restricted')),
+    ('geo', ('not available in your country', 'not made this video available in your country',
+             'blocked it in your country', 'geo restrict', 'geo-restrict')),
+    ('upcoming', ('premieres in', 'live event will begin', 'this live event will')),
+    ('deleted', ('removed by the uploader', 'has been removed', 'account associated with this video',
+                 'has been terminated', 'copyright claim', 'violating youtube', 'does not exist')),
+    ('unavailable', ('video unavailable', 'this video is unavailable', 'no longer available')),
+)
+
+
+def classify_failure(error):
+    """Loại lỗi cố định của video (key trong FAILURE_PATTERNS), None nếu là lỗi tạm thời / lỗi khác"""
+    message = str(error).lower()
+    if any(pattern in message for pattern in TRANSIENT_PATTERNS):
+        return None
+    for failure_class, patterns in FAILURE_PATTERNS:
+        if any(pattern in message for pattern in patterns):
+            return failure_class
+    return None
+
+
+class NegativeEntry:
+    """Một video đang bị bỏ qua do lần lấy metadata trước thất bại"""
+
+    def __init__(self, failure_class, reason, failed_at, expires_at):
+        self.failure_class = failure_class
+        self.reason = reason
+        self.failed_at = failed_at
+        self.expires_at = expires_at
+
+
+class NegativeCache:
+    """
+    Cache kết quả thất bại theo video_id (bảng negative_cache).
+
+    Video riêng tư / đã xóa / bị chặn theo vùng lỗi lại ở mọi lần load và mỗi
+    lần chiếm một worker cho tới khi yt-dlp báo lỗi. Lỗi được phân loại theo
+    classify_failure, mỗi loại có TTL riêng (ttl_hours): video đã xóa gần như
+    không bao giờ quay lại, còn video sắp công chiếu chỉ nên bỏ qua vài giờ.
+    Loại có TTL bằng 0 không được cache.
+    """
+
+    def __init__(self, ttl_hours=None):
+        self.ttl_hours = dict(NegativeCacheConfig.TTL_HOURS, **(ttl_hours or {}))
+
+    @classmethod
+    def from_config(cls, config):
+        """Tạo cache từ section 'negative_cache' của app_config.json"""
+        return cls(ttl_hours=config.get('ttl_hours'))
+
+    async def lookup(self, video_id):
+        """
+        Lấy lần thất bại còn hạn của video
+
+        Returns:
+            NegativeEntry hoặc None nếu video chưa lỗi hoặc đã hết thời gian bỏ qua
+        """
+        row = await fetch_one(
+            "SELECT failure_class, reason, failed_at, expires_at FROM negative_cache "
+            "WHERE video_id = ?", video_id)
+        if not row or (row[3] or 0) <= time.time():
+            return None
+        return NegativeEntry(*row)
+
+    async def record(self, video_id, error):
+        """
+        Ghi lại lần lấy metadata thất bại
+
+        Returns:
+            str: Loại lỗi đã ghi, None nếu lỗi không thuộc loại được cache
+        """
+        failure_class = classify_failure(error)
+        ttl = self.ttl_hours.get(failure_class) if failure_class else None
+        if not ttl:
+            return None
+        now = time.time()
+        await update_db('''
+            INSERT INTO negative_cache (video_id, failure_class, reason, failed_at, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                failure_class = excluded.failure_class,
+                reason = excluded.reason,
+                failed_at = excluded.failed_at,
+                expires_at = excluded.expires_at
+        ''', video_id, failure_class, str(error)[:500], now, now + ttl * 3600)
+        return failure_class
@@ -0,0 +1,188 @@
+"""
+Post Processor cho Video Downloader Tool
+Hậu xử lý file đã tải (checksum, đọc thông tin media, remux, thumbnail) trên process pool
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import PostProcessConfig
+from .format_selector import mux_extension, ffmpeg_format
+
+
+class PostProcessError(Exception):
+    """Lỗi khi chạy ffmpeg / ffprobe trong bước hậu xử lý"""
+
+
+# Các hàm dưới đây chạy trong tiến trình con nên phải ở mức module (pickle được)
+
+def file_checksum(path, algorithm=PostProcessConfig.CHECKSUM_ALGORITHM,
+                  block_size=PostProcessConfig.READ_BLOCK_SIZE):
+    """Tính checksum của file (hex)"""
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+def probe_media(path, ffprobe_path):
+    """
+    Đọc thông tin media bằng ffprobe
+
+    Returns:
+        dict: duration, bit_rate, video_codec, width, height, fps, audio_codec
+              (rỗng nếu không có ffprobe)
+    """
+    if not ffprobe_path:
+        return {}
+    result = subprocess.run(
+        [ffprobe_path, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise PostProcessError(result.stderr.decode('utf-8', errors='replace').strip()
+                               or f"ffprobe thoát với mã {result.returncode}")
+
+    data = json.loads(result.stdout or b'{}')
+    media_format = data.get('format', {})
+    info = {
+        'duration': float(media_format['duration']) if media_format.get('duration') else None,
+        'bit_rate': int(media_format['bit_rate']) if media_format.get('bit_rate') else None,
+    }
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') == 'video' and 'video_codec' not in info:
+            info['video_codec'] = stream.get('codec_name')
+            info['width'] = stream.get('width')
+            info['height'] = stream.get('height')
+            numerator, _, denominator = (stream.get('avg_frame_rate') or '0/0').partition('/')
+            if denominator and float(denominator):
+                info['fps'] = round(float(numerator) / float(denominator), 2)
+        elif stream.get('codec_type') == 'audio' and 'audio_codec' not in info:
+            info['audio_codec'] = stream.get('codec_name')
+    return info
+
+
+def remux_streams(video_path, audio_path, ffmpeg_path):
+    """
+    Ghép file hình và file tiếng thành một file (-c copy), thay thế video_path
+
+    Container theo cặp stream (mux_extension): mp4 + m4a -> mp4, webm + webm -> webm,
+    còn lại mkv. Trả về đường dẫn file đã ghép (có thể khác phần mở rộng của video_path).
+    """
+    base_path, video_ext = os.path.splitext(video_path)
+    dest_path = f"{base_path}.{mux_extension(video_ext.lstrip('.'), os.path.splitext(audio_path)[1].lstrip('.'))}"
+    tmp_path = video_path + '.remux'
+    result = subprocess.run(
+        [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y',
+         '-i', video_path, '-i', audio_path,
+         '-map', '0:v:0', '-map', '1:a:0', '-c', 'copy', '-f', ffmpeg_format(dest_path), tmp_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise PostProcessError(result.stderr.decode('utf-8', errors='replace').strip()
+                               or f"ffmpeg thoát với mã {result.returncode}")
+    os.replace(tmp_path, dest_path)
+    if dest_path != video_path:
+        os.remove(video_path)
+    os.remove(audio_path)
+    return dest_path
+
+
+def extract_thumbnail(video_path, dest_path, ffmpeg_path, seek=PostProcessConfig.THUMBNAIL_SEEK):
+    """Lấy một khung hình làm thumbnail; trả về None nếu video quá ngắn"""
+    result = subprocess.run(
+        [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y',
+         '-ss', str(seek), '-i', video_path, '-frames:v', '1', '-q:v', '2', dest_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0 or not os.path.exists(dest_path):
+        return None
+    return dest_path
+
+
+def run_post_process(task):
+    """
+    Chạy toàn bộ các bước hậu xử lý cho một video (trong tiến trình con)
+
+    Args:
+        task (dict): video_path, audio_path, ffmpeg_path, ffprobe_path và các cờ
+                     remux / checksum / inspect / thumbnail
+
+    Returns:
+        dict: file_path, checksum, thumb_path và thông tin media của probe_media
+    """
+    video_path = task['video_path']
+    audio_path = task.get('audio_path')
+    ffmpeg_path = task.get('ffmpeg_path')
+    result = {'file_path': video_path, 'audio_path': audio_path}
+
+    if task.get('remux') and ffmpeg_path and audio_path and os.path.exists(audio_path):
+        video_path = result['file_path'] = remux_streams(video_path, audio_path, ffmpeg_path)
+        result['audio_path'] = None
+    if task.get('checksum'):
+        result['checksum'] = file_checksum(video_path)
+    if task.get('inspect'):
+        result.update(probe_media(video_path, task.get('ffprobe_path')))
+    if task.get('thumbnail') and ffmpeg_path:
+        result['thumb_path'] = extract_thumbnail(
+            video_path, os.path.splitext(video_path)[0] + '.jpg', ffmpeg_path)
+    return result
+
+
+class PostProcessor:
+    """
+    Stage hậu xử lý chạy trên ProcessPoolExecutor (mặc định bằng số core).
+
+    Luồng tải chỉ submit file đã tải xong rồi chuyển ngay sang video kế tiếp;
+    các việc tốn CPU / đĩa (băm, ffprobe, remux, thumbnail) không chiếm luồng mạng.
+    Tiến trình con được tạo bằng 'spawn' để không fork tiến trình đang chạy Qt.
+    """
+
+    def __init__(self, max_workers=None, checksum=True, inspect=True, remux=True, thumbnail=True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.options = {
+            'checksum': checksum,
+            'inspect': inspect,
+            'remux': remux,
+            'thumbnail': thumbnail,
+        }
+        self.ffmpeg_path = shutil.which('ffmpeg')
+        self.ffprobe_path = shutil.which('ffprobe')
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+
+    @classmethod
+    def from_config(cls, config):
+        """Tạo PostProcessor từ section 'post_process' của app_config.json"""
+        return cls(max_workers=config.get('workers') or None,
+                   checksum=config.get('checksum', True),
+                   inspect=config.get('inspect', True),
+                   remux=config.get('remux', True),
+                   thumbnail=config.get('thumbnail', True))
+
+    def submit(self, video_path, audio_path=None):
+        """
+        Đưa một video đã tải vào hàng đợi hậu xử lý
+
+        Returns:
+            Future: kết quả là dict của run_post_process
+        """
+        task = dict(self.options, video_path=video_path, audio_path=audio_path,
+                    ffmpeg_path=self.ffmpeg_path, ffprobe_path=self.ffprobe_path)
+        return self._executor.submit(run_post_process, task)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,111 @@
+"""
+Rate Limiter cho Video Downloader Tool
+Giới hạn băng thông toàn cục (token bucket) và số kết nối đồng thời theo host / platform
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from .constants import PLATFORMS, STREAM_HOST_KEYWORDS
+
+
+def platform_for_url(url):
+    """
+    Xác định platform của một URL (kể cả URL stream trên CDN như googlevideo.com)
+
+    Returns:
+        str: key của platform hoặc host nếu không nhận diện được
+    """
+    host = urlparse(url).netloc.lower()
+    for key, keywords in STREAM_HOST_KEYWORDS.items():
+        if any(keyword in host for keyword in keywords):
+            return key
+    for key, info in PLATFORMS.items():
+        if any(keyword in host for keyword in info['keywords']):
+            return key
+    return host
+
+
+class TokenBucket:
+    """
+    Token bucket giới hạn tổng số bytes/giây của mọi kết nối.
+
+    consume() cho phép "nợ" token: luồng lấy quá phần đang có sẽ ngủ đúng
+    khoảng thời gian cần để trả nợ, nhờ vậy không phải chia nhỏ chunk.
+    rate <= 0 nghĩa là không giới hạn.
+    """
+
+    def __init__(self, rate_bytes_per_sec=0):
+        self._lock = threading.Lock()
+        self.set_rate(rate_bytes_per_sec)
+
+    def set_rate(self, rate_bytes_per_sec):
+        """Đổi giới hạn tốc độ (bytes/giây), cho phép burst tối đa 1 giây"""
+        with self._lock:
+            self.rate = max(0, rate_bytes_per_sec)
+            self.capacity = self.rate
+            self._tokens = self.capacity
+            self._last = time.monotonic()
+
+    def consume(self, amount):
+        """Lấy `amount` token, ngủ nếu vượt quá tốc độ cho phép"""
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            deficit = -self._tokens
+            rate = self.rate
+        if deficit > 0:
+            time.sleep(deficit / rate)
+
+
+class ConnectionLimiter:
+    """
+    Giới hạn số kết nối đồng thời theo host và theo platform.
+
+    Giá trị <= 0 nghĩa là không giới hạn ở cấp đó.
+    """
+
+    def __init__(self, max_per_host=0, max_per_platform=0):
+        self.max_per_host = max_per_host
+        self.max_per_platform = max_per_platform
+        self._host_semaphores = {}
+        self._platform_semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, semaphores, key, limit):
+        if limit <= 0:
+            return None
+        with self._lock:
+            semaphore = semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(limit)
+                semaphores[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def acquire(self, url):
+        """Giữ một slot kết nối của platform và host trong suốt khối with"""
+        platform_semaphore = self._semaphore(self._platform_semaphores, platform_for_url(url),
+                                             self.max_per_platform)
+        host_semaphore = self._semaphore(self._host_semaphores, urlparse(url).netloc.lower(),
+                                         self.max_per_host)
+        # Luôn lấy platform trước host để tránh deadlock giữa các luồng
+        if platform_semaphore:
+            platform_semaphore.acquire()
+        try:
+            if host_semaphore:
+                host_semaphore.acquire()
+            try:
+                yield
+            finally:
+                if host_semaphore:
+                    host_semaphore.release()
+        finally:
+            if platform_semaphore:
+                platform_semaphore.release()
@@ -0,0 +1,199 @@
+"""
+Retry Policy cho Video Downloader Tool
+Thử lại theo exponential backoff có jitter và ngắt mạch (circuit breaker) theo từng host
+"""
+
+import http.client
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from .constants import RetryDefaults
+
+
+class CircuitOpenError(Exception):
+    """Host đang bị ngắt mạch do lỗi liên tiếp, chưa hết thời gian nghỉ"""
+
+    def __init__(self, host, retry_after):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"Tạm ngừng gửi request tới {host} do lỗi liên tiếp "
+                         f"(thử lại sau {retry_after:.0f}s)")
+
+
+class _CircuitBreaker:
+    """
+    Trạng thái ngắt mạch của một host.
+
+    - closed: request đi bình thường, đếm số lỗi liên tiếp
+    - open: đủ failure_threshold lỗi liên tiếp -> từ chối mọi request trong cooldown giây
+    - half-open: hết cooldown, cho đúng một request thử; thành công thì đóng lại,
+      thất bại thì mở tiếp một chu kỳ cooldown
+    """
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def before_request(self, host):
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.cooldown - time.monotonic()
+        if remaining > 0 or self.probing:
+            raise CircuitOpenError(host, max(remaining, 0))
+        self.probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+
+class RetryPolicy:
+    """
+    Chính sách thử lại dùng chung cho lấy metadata và tải file.
+
+    Mỗi lần gọi được thử tối đa max_attempts lần, lần thứ n chờ ngẫu nhiên trong
+    [0, min(max_delay, base_delay * 2^n)] (full jitter) để các luồng không dồn
+    request vào cùng một thời điểm. Mỗi host có một circuit breaker riêng nên
+    host lỗi liên tục bị ngừng gọi tạm thời mà không chiếm luồng của host khác.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Mã HTTP nên thử lại (quá tải / lỗi tạm thời phía server)
+    RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+    # Lỗi từ yt-dlp chỉ là chuỗi, nhận diện lỗi tạm thời theo nội dung
+    RETRYABLE_MESSAGES = ('timed out', 'timeout', 'temporarily', 'connection reset',
+                          'connection aborted', 'remote end closed', 'http error 429',
+                          'http error 5', 'too many requests', 'incomplete read')
+
+    def __init__(self, max_attempts=RetryDefaults.MAX_ATTEMPTS, base_delay=RetryDefaults.BASE_DELAY,
+                 max_delay=RetryDefaults.MAX_DELAY, failure_threshold=RetryDefaults.FAILURE_THRESHOLD,
+                 cooldown=RetryDefaults.COOLDOWN):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Lấy policy dùng chung cho toàn ứng dụng (cấu hình trong app_config.json)"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                from .config_manager import ConfigManager
+                cls._instance = RetryPolicy(**ConfigManager().get_retry_config())
+            return cls._instance
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).netloc.lower() or url
+
+    def _breaker(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = _CircuitBreaker(self.failure_threshold, self.cooldown)
+            self._breakers[host] = breaker
+        return breaker
+
+    def before_request(self, url):
+        """Báo sắp gửi request; raise CircuitOpenError nếu host đang bị ngắt mạch"""
+        host = self.host_of(url)
+        with self._lock:
+            self._breaker(host).before_request(host)
+
+    def record_success(self, url):
+        with self._lock:
+            self._breaker(self.host_of(url)).record_success()
+
+    def record_failure(self, url):
+        with self._lock:
+            self._breaker(self.host_of(url)).record_failure()
+
+    def record_error(self, url, error):
+        """Ghi request lỗi vào circuit breaker (không thử lại); trả về error có nên thử lại hay không"""
+        if not self.is_retryable(error):
+            # Lỗi cố định (404, video riêng tư, ...) nghĩa là host vẫn phản hồi
+            self.record_success(url)
+            return False
+        self.record_failure(url)
+        return True
+
+    def is_retryable(self, error):
+        """Lỗi tạm thời (mạng, timeout, 429, 5xx) thì thử lại; lỗi cố định thì không"""
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, requests.HTTPError):
+            response = error.response
+            return response is not None and response.status_code in self.RETRYABLE_STATUS
+        if isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError,
+                              http.client.IncompleteRead, ConnectionError, TimeoutError)):
+            return True
+        message = str(error).lower()
+        return any(keyword in message for keyword in self.RETRYABLE_MESSAGES)
+
+    def backoff(self, attempt):
+        """Thời gian chờ trước lần thử thứ attempt + 1 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, url, func, *args, stop_event=None, **kwargs):
+        """
+        Gọi func(*args, **kwargs) theo chính sách thử lại của host trong url
+
+        Args:
+            url (str): URL dùng để xác định host (circuit breaker)
+            func (callable): Hàm thực hiện request
+            stop_event (threading.Event): Dừng chờ backoff sớm khi người dùng tạm dừng
+
+        Returns:
+            Kết quả của func
+        """
+        attempt = 0
+        while True:
+            self.before_request(url)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                self.handle_failure(url, e, attempt, stop_event)
+            else:
+                self.record_success(url)
+                return result
+
+    def handle_failure(self, url, error, attempt, stop_event=None):
+        """
+        Xử lý lỗi của lần thử thứ attempt (bắt đầu từ 1)
+
+        Raise lại error nếu lỗi không nên thử lại, đã hết số lần thử hoặc
+        stop_event được set trong lúc chờ; ngược lại chờ backoff rồi trả về
+        để nơi gọi thử lại.
+        """
+        if not self.record_error(url, error):
+            raise error
+        if attempt >= self.max_attempts:
+            raise error
+        delay = self.backoff(attempt)
+        print(f"Lỗi tạm thời với {self.host_of(url)} ({error}), "
+              f"thử lại lần {attempt} sau {delay:.1f}s")
+        if stop_event is not None:
+            if stop_event.wait(delay):
+                raise error
+        else:
+            time.sleep(delay)
@@ -0,0 +1,77 @@
+"""
+Single Flight cho Video Downloader Tool
+Gộp các lần lấy metadata cùng một video đang chạy song song thành một lần duy nhất
+"""
+
+import threading
+
+
+class _Call:
+    """Một lần gọi đang chạy: các luồng đến sau chờ event rồi dùng chung kết quả"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi trùng key đang chạy cùng lúc.
+
+    Một video thường xuất hiện trong nhiều kênh / playlist / link lẻ của cùng
+    một lần tải nhiều link, các worker khác nhau sẽ lấy metadata của nó cùng
+    lúc. Với do(key, fn), luồng đầu tiên (leader) chạy fn(); các luồng gọi cùng
+    key trong lúc đó chỉ chờ và nhận lại đúng kết quả (hoặc lỗi) của leader.
+    Key được bỏ ngay khi leader xong, nên đây không phải cache: lần gọi sau đó
+    sẽ chạy lại fn() (metadata_cache lo phần dùng lại dữ liệu đã lưu).
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Lấy SingleFlight dùng chung cho toàn ứng dụng"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = SingleFlight()
+            return cls._instance
+
+    def do(self, key, fn):
+        """
+        Chạy fn() một lần cho mỗi key đang chạy
+
+        Args:
+            key (str): Key gộp (ví dụ ID video)
+            fn (callable): Hàm lấy kết quả, chỉ leader gọi
+
+        Returns:
+            tuple: (kết quả, shared) - shared là True nếu kết quả lấy từ lời gọi của luồng khác
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
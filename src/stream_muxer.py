@@ -0,0 +1,112 @@
+"""
+Stream Muxer cho Video Downloader Tool
+Ghép stream hình và stream tiếng thành một file ngay trong lúc tải (qua pipe vào ffmpeg)
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+from .download_engine import DownloadCancelled
+from .format_selector import ffmpeg_format
+
+
+class MuxError(Exception):
+    """Lỗi khi ffmpeg không ghép được hai stream"""
+
+
+class StreamingMuxer:
+    """
+    Đẩy dữ liệu hình và tiếng vào hai pipe của một tiến trình ffmpeg (-c copy).
+
+    Không ghi file tạm cho từng stream và không cần bước remux sau khi tải xong.
+    Cần ffmpeg trong PATH và hệ điều hành hỗ trợ truyền file descriptor cho tiến
+    trình con (POSIX); nếu không, DownloadManager quay về tải hai file riêng.
+    """
+
+    def __init__(self, ffmpeg_path=None):
+        self.ffmpeg_path = ffmpeg_path or shutil.which('ffmpeg')
+
+    def is_available(self):
+        """Kiểm tra có thể dùng streaming mux trên máy này không"""
+        return bool(self.ffmpeg_path) and os.name == 'posix'
+
+    def mux(self, video_chunks, audio_chunks, dest_path):
+        """
+        Ghép hai nguồn chunk thành dest_path
+
+        Args:
+            video_chunks (iterable): Các chunk bytes của stream hình
+            audio_chunks (iterable): Các chunk bytes của stream tiếng
+            dest_path (str): File đầu ra, container theo phần mở rộng (mp4 / webm / mkv)
+
+        Returns:
+            str: Đường dẫn file đã ghép
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        part_path = dest_path + '.part'
+        video_read, video_write = os.pipe()
+        audio_read, audio_write = os.pipe()
+
+        command = [
+            self.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y',
+            '-i', f'pipe:{video_read}',
+            '-i', f'pipe:{audio_read}',
+            '-map', '0:v:0', '-map', '1:a:0',
+            '-c', 'copy', '-f', ffmpeg_format(dest_path), part_path
+        ]
+        try:
+            process = subprocess.Popen(command, pass_fds=(video_read, audio_read),
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE)
+        except OSError:
+            for fd in (video_read, video_write, audio_read, audio_write):
+                os.close(fd)
+            raise
+        # Đầu đọc đã được chuyển cho ffmpeg
+        os.close(video_read)
+        os.close(audio_read)
+
+        errors = []
+        pumps = [
+            threading.Thread(target=self._pump, args=(video_chunks, video_write, process, errors),
+                             name='mux-video', daemon=True),
+            threading.Thread(target=self._pump, args=(audio_chunks, audio_write, process, errors),
+                             name='mux-audio', daemon=True),
+        ]
+        for pump in pumps:
+            pump.start()
+        _, stderr = process.communicate()
+        for pump in pumps:
+            pump.join()
+
+        # Lỗi tải (kể cả DownloadCancelled) quan trọng hơn lỗi ffmpeg do bị kill
+        source_errors = [error for error in errors if not isinstance(error, BrokenPipeError)]
+        if source_errors or process.returncode != 0:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            if source_errors:
+                source_errors.sort(key=lambda error: isinstance(error, DownloadCancelled))
+                raise source_errors[0]
+            raise MuxError(stderr.decode('utf-8', errors='replace').strip()
+                           or f"ffmpeg thoát với mã {process.returncode}")
+
+        os.replace(part_path, dest_path)
+        return dest_path
+
+    @staticmethod
+    def _pump(chunks, fd, process, errors):
+        """Ghi toàn bộ chunk vào pipe; lỗi nguồn sẽ dừng ffmpeg để không tạo file cụt"""
+        try:
+            with os.fdopen(fd, 'wb') as pipe:
+                for chunk in chunks:
+                    pipe.write(chunk)
+        except BaseException as e:
+            errors.append(e)
+            if not isinstance(e, BrokenPipeError) and process.poll() is None:
+                process.kill()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
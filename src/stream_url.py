@@ -0,0 +1,173 @@
+"""
+Stream URL cho Video Downloader Tool
+Đọc thời điểm hết hạn của link stream đã ký, lấy lại link mới ngay trước khi tải nếu cần
+"""
+
+import functools
+import re
+import time
+from urllib.parse import urlparse, parse_qs, unquote
+
+from .adaptive_concurrency import AdaptiveConcurrency
+from .constants import DownloadConfig
+from .info_projection import project_info
+from .retry_policy import RetryPolicy
+from .single_flight import SingleFlight
+from .ytdlp_pool import YoutubeDLPool
+
+
+# googlevideo.com dùng ?expire=<epoch>, một số link cũ để trong path /expire/<epoch>/
+_EXPIRE_PATH_PATTERN = re.compile(r'/expire/(\d+)')
+_ITAG_PATH_PATTERN = re.compile(r'/itag/(\d+)')
+_MIME_PATH_PATTERN = re.compile(r'/mime/([^/]+)')
+
+
+def _query_or_path(url, name, path_pattern):
+    if not url or url == 'None':
+        return None
+    parsed = urlparse(url)
+    values = parse_qs(parsed.query).get(name)
+    if values:
+        return values[0]
+    match = path_pattern.search(parsed.path)
+    return match.group(1) if match else None
+
+
+def url_expiry(url):
+    """Thời điểm hết hạn (epoch giây) của link stream, None nếu link không có hạn"""
+    value = _query_or_path(url, 'expire', _EXPIRE_PATH_PATTERN)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def url_format_id(url):
+    """format_id (itag) của link stream YouTube, None nếu không có"""
+    return _query_or_path(url, 'itag', _ITAG_PATH_PATTERN)
+
+
+def url_extension(url):
+    """
+    Phần mở rộng của stream theo tham số mime của link YouTube, None nếu không có
+
+    'video/webm' -> 'webm', 'video/mp4' -> 'mp4', 'audio/mp4' -> 'm4a'
+    """
+    mime = unquote(_query_or_path(url, 'mime', _MIME_PATH_PATTERN) or '')
+    if not mime or '/' not in mime:
+        return None
+    kind, subtype = mime.lower().split('/', 1)
+    return 'm4a' if (kind, subtype) == ('audio', 'mp4') else subtype
+
+
+def has_stream(url):
+    """Có link stream thật (bản ghi chưa lấy stream lưu '' / None / 'None')"""
+    return bool(url) and url != 'None'
+
+
+def is_expiring(url, margin=DownloadConfig.URL_REFRESH_MARGIN, now=None):
+    """Link đã hết hạn hoặc sẽ hết hạn trong margin giây tới"""
+    return expires_within(url_expiry(url), margin, now)
+
+
+def expires_within(expiry, margin=DownloadConfig.URL_REFRESH_MARGIN, now=None):
+    """Thời điểm hết hạn expiry (epoch giây, None nếu không có hạn) đã qua hoặc còn dưới margin giây"""
+    return expiry is not None and expiry - (now or time.time()) <= margin
+
+
+class StreamUrlResolver:
+    """
+    Lấy lại link stream (pvf / paf) của video khi link đã lưu sắp hết hạn.
+
+    Link stream của YouTube được ký kèm thời điểm hết hạn (thường vài giờ), trong
+    khi video có thể nằm trong hàng đợi lâu hơn thế. DownloadManager gọi
+    needs_refresh() ngay trước khi tải; chỉ link hết hạn hoặc sắp hết hạn mới
+    được lấy lại, link còn hạn được dùng nguyên. Link mới giữ đúng format_id
+    (itag) của link cũ để file .part đang tải dở vẫn tải tiếp được.
+
+    Video load bằng metadata nhanh (watch_metadata) chưa có link stream; link
+    của chúng được lấy lần đầu tại đây, chọn stream theo policy.
+    """
+
+    def __init__(self, margin=DownloadConfig.URL_REFRESH_MARGIN, policy=None,
+                 ydl_pool=None, retry_policy=None, extraction_pool=None, concurrency=None,
+                 max_limit=1, single_flight=None):
+        """
+        Args:
+            extraction_pool (ExtractionPool): Lấy bằng tiến trình con như khi load (None = ydl_pool)
+            concurrency (AdaptiveConcurrency): Limiter theo platform dùng chung với loader
+            max_limit (int): Giới hạn trên của limiter (số luồng tải)
+        """
+        self.margin = margin
+        self.policy = policy or {}
+        self.ydl_pool = ydl_pool or YoutubeDLPool.get_instance()
+        self.retry_policy = retry_policy or RetryPolicy.get_instance()
+        self.extraction_pool = extraction_pool
+        self.concurrency = concurrency or AdaptiveConcurrency.get_instance()
+        self.max_limit = max_limit
+        self.single_flight = single_flight or SingleFlight.get_instance()
+
+    def needs_refresh(self, job):
+        """
+        Job chưa có link stream hoặc có link đã / sắp hết hạn
+
+        Dùng thời điểm hết hạn đã lưu (pvf_expires_at / paf_expires_at của
+        download_queue); chỉ đọc từ link khi chưa lưu (NULL).
+        """
+        if not has_stream(job.get('pvf')):
+            return True
+        for key in ('pvf', 'paf'):
+            if not has_stream(job.get(key)):
+                continue
+            expiry = job.get(f'{key}_expires_at') or url_expiry(job[key])
+            if expires_within(expiry, self.margin):
+                return True
+        return False
+
+    def refresh(self, job):
+        """
+        Lấy link stream mới cho job
+
+        Returns:
+            dict: pvf, paf, pvf_ext, paf_ext, pvf_expires_at, paf_expires_at
+        """
+        video_id = url_format_id(job.get('pvf'))
+        audio_id = url_format_id(job.get('paf'))
+        keep_format_ids = tuple(i for i in (video_id, audio_id) if i)
+        info, _ = self.single_flight.do(('stream_url', job['url'], keep_format_ids),
+                                        lambda: self.extract(job['url'], keep_format_ids))
+        # Giữ format cũ nếu vẫn còn, để kích thước file không đổi
+        video = info['formats'].get(video_id) or info['video']
+        if has_stream(job.get('paf')) or not has_stream(job.get('pvf')):
+            audio = info['formats'].get(audio_id) or info['audio']
+        else:
+            audio = None
+        if video is None:
+            raise ValueError(f"Không tìm thấy stream hình cho {job['url']}")
+
+        pvf = video['url']
+        paf = audio['url'] if audio else None
+        return {
+            'pvf': pvf,
+            'paf': paf,
+            'pvf_ext': video.get('ext'),
+            'paf_ext': audio.get('ext') if audio else None,
+            'pvf_expires_at': url_expiry(pvf),
+            'paf_expires_at': url_expiry(paf),
+        }
+
+    def extract(self, url, keep_format_ids=()):
+        """
+        Lấy info rút gọn của url qua cùng đường với YoutuberAssistant.extractMetadataFromYtdlp
+
+        RetryPolicy (ngắt mạch theo host) -> limiter AIMD của platform -> tiến trình
+        con của ExtractionPool (hoặc YoutubeDLPool), để lần lấy link lúc tải cũng bị
+        giới hạn và bị bóp cùng với các lần lấy metadata đang chạy.
+        """
+        if self.extraction_pool is not None:
+            return self.retry_policy.call(url, self.concurrency.call, url, self.max_limit,
+                                          self.extraction_pool.extract, url, keep_format_ids)
+        project = functools.partial(project_info, policy=self.policy,
+                                    keep_format_ids=keep_format_ids)
+        return self.retry_policy.call(url, self.concurrency.call, url, self.max_limit,
+                                      self.ydl_pool.extract_info, url, project=project)
@@ -131,6 +131,19 @@ class VideoTableManager:
                         progress_bar.setValue(progress)
                 break
                 
+    def update_video_file_path(self, record_id, file_path):
+        """Cập nhật đường dẫn file của video trong bảng"""
+        row = self.find_row_by_record_id(record_id)
+        if row >= 0:
+            self.table.item(row, TableColumns.FILE_PATH).setText(str(file_path))
+            
+    def set_record_id(self, video_id, record_id):
+        """Gán record_id cho dòng vừa thêm (sau khi insert vào database)"""
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, TableColumns.VIDEO_ID)
+            if item and item.text() == str(video_id):
+                self.table.item(row, TableColumns.RECORD_ID).setText(str(record_id))
+                
     def get_selected_rows(self):
         """Lấy danh sách các dòng được chọn"""
         selected_rows = []
@@ -140,6 +153,15 @@ class VideoTableManager:
                 selected_rows.append(row)
         return selected_rows
         
+    def get_selected_video_ids(self):
+        """Lấy video_id của các dòng được chọn"""
+        video_ids = []
+        for row in self.get_selected_rows():
+            item = self.table.item(row, TableColumns.VIDEO_ID)
+            if item and item.text():
+                video_ids.append(item.text())
+        return video_ids
+        
     def get_row_data(self, row):
         """Lấy dữ liệu của một dòng"""
         if row >= self.table.rowCount():
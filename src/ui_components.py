@@ -27,6 +27,11 @@ class InputSection(QWidget):
         self.multiple_links_count = 0
         self.current_links = []
         self.filter_section = None
+        self.speed_limit_spinbox = None
+        self.per_host_spinbox = None
+        self.per_platform_spinbox = None
+        self.stream_mux_checkbox = None
+        self.config_manager = ConfigManager()
         self.init_ui()
         
     def init_ui(self):
@@ -73,7 +78,7 @@ class InputSection(QWidget):
         self.threads_spinbox.setPrefix("Số luồng: ")
         
         # Áp dụng styling cho spinbox với màu sáng hơn
-        self.threads_spinbox.setStyleSheet("""
+        spinbox_style = """
             QSpinBox {
                 padding: 6px 8px;
                 border: 1px solid #999999;
@@ -125,7 +130,8 @@ class InputSection(QWidget):
             QSpinBox::down-button:pressed {
                 background-color: #B8B8B8;
             }
-        """)
+        """
+        self.threads_spinbox.setStyleSheet(spinbox_style)
         
         # Thêm vào hàng đầu tiên (platform + input + spinbox)
         first_row_layout.addWidget(self.platform_display)
@@ -137,6 +143,56 @@ class InputSection(QWidget):
         # Thêm hàng đầu tiên vào layout chính
         main_layout.addLayout(first_row_layout)
         
+        # Hàng giới hạn băng thông / số kết nối (0 = không giới hạn)
+        self.speed_limit_spinbox = QSpinBox()
+        self.speed_limit_spinbox.setRange(0, 1000000)
+        self.speed_limit_spinbox.setSingleStep(256)
+        self.speed_limit_spinbox.setValue(self.config_manager.get_max_speed_kbps())
+        self.speed_limit_spinbox.setPrefix("Tốc độ: ")
+        self.speed_limit_spinbox.setSuffix(" KB/s")
+        self.speed_limit_spinbox.setSpecialValueText("Tốc độ: không giới hạn")
+        self.speed_limit_spinbox.setMinimumHeight(35)
+        self.speed_limit_spinbox.setFixedWidth(200)
+        self.speed_limit_spinbox.setStyleSheet(spinbox_style)
+        self.speed_limit_spinbox.valueChanged.connect(self._on_speed_limit_changed)
+        
+        self.per_host_spinbox = QSpinBox()
+        self.per_host_spinbox.setRange(0, AppConfig.MAX_THREADS)
+        self.per_host_spinbox.setValue(self.config_manager.get_max_per_host())
+        self.per_host_spinbox.setPrefix("Mỗi host: ")
+        self.per_host_spinbox.setSpecialValueText("Mỗi host: ∞")
+        self.per_host_spinbox.setMinimumHeight(35)
+        self.per_host_spinbox.setFixedWidth(120)
+        self.per_host_spinbox.setStyleSheet(spinbox_style)
+        self.per_host_spinbox.valueChanged.connect(self._on_per_host_changed)
+        
+        self.per_platform_spinbox = QSpinBox()
+        self.per_platform_spinbox.setRange(0, AppConfig.MAX_THREADS)
+        self.per_platform_spinbox.setValue(self.config_manager.get_max_per_platform())
+        self.per_platform_spinbox.setPrefix("Mỗi platform: ")
+        self.per_platform_spinbox.setSpecialValueText("Mỗi platform: ∞")
+        self.per_platform_spinbox.setMinimumHeight(35)
+        self.per_platform_spinbox.setFixedWidth(140)
+        self.per_platform_spinbox.setStyleSheet(spinbox_style)
+        self.per_platform_spinbox.valueChanged.connect(self._on_per_platform_changed)
+        
+        limits_row_layout = QHBoxLayout()
+        limits_row_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        limits_row_layout.addWidget(self.speed_limit_spinbox)
+        limits_row_layout.addSpacing(10)
+        limits_row_layout.addWidget(self.per_host_spinbox)
+        limits_row_layout.addSpacing(10)
+        limits_row_layout.addWidget(self.per_platform_spinbox)
+        
+        # Ghép hình + tiếng qua ffmpeg ngay khi tải (không tạo 2 file tạm)
+        self.stream_mux_checkbox = QCheckBox("Ghép hình + tiếng khi tải")
+        self.stream_mux_checkbox.setChecked(self.config_manager.get_stream_mux())
+        self.stream_mux_checkbox.toggled.connect(self.config_manager.update_stream_mux)
+        limits_row_layout.addSpacing(10)
+        limits_row_layout.addWidget(self.stream_mux_checkbox)
+        
+        main_layout.addLayout(limits_row_layout)
+        
         # Thêm tiêu đề "Tải nhiều link" căn giữa
         self.multiple_links_title = QLabel("Tải nhiều link ?")
         self.multiple_links_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -211,8 +267,8 @@ class InputSection(QWidget):
         
         main_layout.addLayout(title_layout)
         
-        # Thêm filter section
-        self.filter_section = FilterSection()
+        # Thêm filter section (dùng chung ConfigManager để không ghi đè cấu hình của nhau)
+        self.filter_section = FilterSection(config_manager=self.config_manager)
         main_layout.addWidget(self.filter_section)
         
         # Thêm button "Bắt đầu tải" căn giữa
@@ -255,6 +311,30 @@ class InputSection(QWidget):
         """Lấy số luồng từ spinbox"""
         return self.threads_spinbox.value()
         
+    def get_bandwidth_limits(self):
+        """Lấy giới hạn tốc độ (KB/s) và số kết nối theo host / platform"""
+        return {
+            'max_speed_kbps': self.speed_limit_spinbox.value(),
+            'max_per_host': self.per_host_spinbox.value(),
+            'max_per_platform': self.per_platform_spinbox.value()
+        }
+        
+    def is_stream_mux_enabled(self):
+        """Kiểm tra có bật chế độ ghép hình + tiếng khi tải không"""
+        return self.stream_mux_checkbox.isChecked()
+        
+    def _on_speed_limit_changed(self, value):
+        """Xử lý khi thay đổi giới hạn tốc độ"""
+        self.config_manager.update_bandwidth_config(max_speed_kbps=value)
+        
+    def _on_per_host_changed(self, value):
+        """Xử lý khi thay đổi số kết nối mỗi host"""
+        self.config_manager.update_bandwidth_config(max_per_host=value)
+        
+    def _on_per_platform_changed(self, value):
+        """Xử lý khi thay đổi số kết nối mỗi platform"""
+        self.config_manager.update_bandwidth_config(max_per_platform=value)
+        
     def set_platform_display(self, text, style_sheet=None):
         """Cập nhật hiển thị platform"""
         # Không cho phép thay đổi platform display khi đang ở chế độ multiple links
@@ -421,13 +501,13 @@ class InputSection(QWidget):
 class FilterSection(QWidget):
     """Phần filter với các tùy chọn lọc video"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, config_manager=None):
         super().__init__(parent)
         self.max_videos_spinbox = None
         self.min_videos_spinbox = None
         self.min_likes_spinbox = None
         self.min_duration_spinbox = None
-        self.config_manager = ConfigManager()
+        self.config_manager = config_manager or ConfigManager()
         self.init_ui()
         
     def init_ui(self):
@@ -834,7 +914,7 @@ class MultipleLinksDialog(QDialog):
         instruction_text = QLabel("""
 • Nhập mỗi link video trên một dòng
 • Hỗ trợ các platform: YouTube, TikTok, Instagram, Facebook
-• Có thể nhập tối đa 50 link cùng lúc
+• Có thể dán hàng trăm link, các link được load song song theo từng platform
 • Các link không hợp lệ sẽ được bỏ qua
 • Nhấn Enter để xuống dòng mới
         """)
@@ -0,0 +1,238 @@
+"""
+Watch Metadata cho Video Downloader Tool
+Lấy metadata cấp danh sách (tiêu đề, views, thời lượng, thumbnail) từ JSON nhúng trong trang watch
+hoặc oEmbed, không chạy yt-dlp
+"""
+
+import json
+import re
+from urllib.parse import quote
+
+from .constants import NetworkDefaults
+from .format_selector import select_formats
+from .http_session import HttpSessionPool
+from .negative_cache import classify_failure
+from .youtube_listing import parse_count
+
+
+class FastPathError(Exception):
+    """Không đọc được metadata từ trang watch / oEmbed, cần lấy bằng yt-dlp"""
+
+
+class VideoUnavailableError(Exception):
+    """Trang watch báo video không xem được (riêng tư, đã xóa, ...), thông báo giữ nguyên lý do của YouTube"""
+
+
+_PLAYER_RESPONSE_PATTERN = re.compile(r'ytInitialPlayerResponse"?\]?\s*=\s*')
+_LIKE_PATTERNS = (
+    re.compile(r'"likeCount"\s*:\s*"?(\d+)'),
+    re.compile(r'along with ([\d,.]+[KMB]?) other (?:people|person)', re.I),
+)
+# Cookie đồng ý của YouTube, tránh bị chuyển sang trang consent (không có dữ liệu video)
+_CONSENT_COOKIES = {'SOCS': 'CAI', 'CONSENT': 'YES+'}
+
+
+def parse_player_response(html):
+    """Đọc ytInitialPlayerResponse trong HTML trang watch; raise FastPathError nếu không có"""
+    decoder = json.JSONDecoder()
+    for match in _PLAYER_RESPONSE_PATTERN.finditer(html):
+        try:
+            # raw_decode dừng đúng ở cuối object, kể cả khi mô tả video có '};'
+            data, _ = decoder.raw_decode(html, match.end())
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    raise FastPathError("Không tìm thấy ytInitialPlayerResponse trong trang watch")
+
+
+def parse_like_count(html):
+    """Số like hiển thị trên trang watch, None nếu không đọc được"""
+    for pattern in _LIKE_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return parse_count(match.group(1))
+    return None
+
+
+def best_thumbnail(thumbnails):
+    """URL thumbnail lớn nhất trong danh sách {'url', 'width', 'height'}"""
+    thumbnails = [t for t in thumbnails or [] if t.get('url')]
+    if not thumbnails:
+        return None
+    return max(thumbnails, key=lambda t: (t.get('width') or 0) * (t.get('height') or 0))['url']
+
+
+def formats_from_streaming_data(streaming):
+    """
+    Chuyển streamingData.adaptiveFormats về dạng formats của yt-dlp (chỉ để chọn stream)
+
+    Link của phần lớn format bị mã hóa trong signatureCipher; ở đây không giải mã,
+    'url' chỉ là chỗ giữ chỗ để format_selector không bỏ qua format, không dùng để tải.
+    """
+    formats = []
+    for fmt in (streaming or {}).get('adaptiveFormats') or []:
+        mime = (fmt.get('mimeType') or '').lower()
+        kind, _, rest = mime.partition('/')
+        subtype, _, params = rest.partition(';')
+        codec = params.split('codecs=', 1)[-1].strip(' "') if 'codecs=' in params else None
+        try:
+            size = int(fmt['contentLength'])
+        except (KeyError, TypeError, ValueError):
+            size = None
+        bitrate = (fmt.get('averageBitrate') or fmt.get('bitrate') or 0) / 1000
+        entry = {
+            'format_id': str(fmt.get('itag')),
+            'url': fmt.get('url') or fmt.get('signatureCipher') or fmt.get('cipher'),
+            'ext': 'm4a' if (kind, subtype) == ('audio', 'mp4') else subtype,
+            'height': fmt.get('height'),
+            'fps': fmt.get('fps'),
+            'filesize': size,
+            'tbr': bitrate,
+            'audio_channels': fmt.get('audioChannels'),
+        }
+        if kind == 'video':
+            entry.update(vcodec=codec, acodec='none')
+        elif kind == 'audio':
+            entry.update(vcodec='none', acodec=codec, abr=bitrate)
+        else:
+            continue
+        formats.append(entry)
+    return formats
+
+
+def estimate_stream_size(player, duration=None, policy=None):
+    """
+    Dung lượng ước lượng (bytes) của cặp stream policy sẽ chọn, từ contentLength của trang watch
+
+    Returns:
+        int hoặc None nếu trang không có streamingData
+    """
+    formats = formats_from_streaming_data(player.get('streamingData'))
+    video, audio = select_formats(formats, policy, duration)
+    return sum((fmt['filesize'] or 0) for fmt in (video, audio) if fmt) or None
+
+
+def info_from_player_response(player, html='', policy=None):
+    """
+    Chuyển ytInitialPlayerResponse về dict cùng dạng với project_info (không có stream)
+
+    'filesize' là dung lượng ước lượng của stream sẽ tải (estimate_stream_size),
+    để hàng đợi vẫn ưu tiên được file nhỏ khi link stream chỉ được lấy lúc tải.
+
+    Raises:
+        VideoUnavailableError: playabilityStatus báo lỗi cố định của video
+        FastPathError: Thiếu videoDetails hoặc lỗi không rõ (ví dụ bot check)
+    """
+    status = player.get('playabilityStatus') or {}
+    if status.get('status', 'OK') != 'OK':
+        reason = status.get('reason') or ' '.join(
+            filter(None, [status.get('status'), *(status.get('messages') or [])]))
+        # Chỉ tin các lý do nhận diện được; còn lại (bot check, ...) để yt-dlp thử
+        if classify_failure(reason) is None:
+            raise FastPathError(f"Trang watch báo {status.get('status')}: {reason}")
+        raise VideoUnavailableError(reason)
+
+    details = player.get('videoDetails')
+    if not details or not details.get('videoId'):
+        raise FastPathError("ytInitialPlayerResponse không có videoDetails")
+    try:
+        duration = int(details['lengthSeconds'])
+    except (KeyError, TypeError, ValueError):
+        duration = None
+    try:
+        view_count = int(details['viewCount'])
+    except (KeyError, TypeError, ValueError):
+        view_count = None
+    return {
+        'id': details['videoId'],
+        'title': details.get('title'),
+        'description': details.get('shortDescription'),
+        'tags': details.get('keywords') or [],
+        'duration': duration,
+        'view_count': view_count,
+        'like_count': parse_like_count(html) if html else None,
+        'thumbnail': best_thumbnail((details.get('thumbnail') or {}).get('thumbnails')),
+        'webpage_url': None,
+        'filesize': estimate_stream_size(player, duration, policy),
+    }
+
+
+def info_from_oembed(data, video_id):
+    """Chuyển response oEmbed về dict như info_from_player_response (chỉ có tiêu đề, thumbnail)"""
+    if not data.get('title'):
+        raise FastPathError("oEmbed không có tiêu đề")
+    return {
+        'id': video_id,
+        'title': data['title'],
+        'description': None,
+        'tags': [],
+        'duration': None,
+        'view_count': None,
+        'like_count': None,
+        'thumbnail': data.get('thumbnail_url'),
+        'webpage_url': None,
+        'filesize': None,
+    }
+
+
+class WatchPageMetadata:
+    """
+    Backend lấy metadata nhanh: một request GET cho mỗi video.
+
+    Trang watch nhúng sẵn ytInitialPlayerResponse (videoDetails: tiêu đề, mô tả,
+    từ khóa, thời lượng, lượt xem, thumbnail) và playabilityStatus; số like nằm
+    trong ytInitialData của cùng trang. Nếu trang không có dữ liệu (trang
+    consent, giao diện lạ) thì thử oEmbed, chỉ có tiêu đề và thumbnail.
+
+    Không lấy link stream: link stream được lấy khi tải (StreamUrlResolver).
+    """
+
+    def __init__(self, base_url=NetworkDefaults.YOUTUBE_BASE_URL, session_pool=None,
+                 timeout=15, oembed=True, policy=None):
+        self.base_url = base_url.rstrip('/')
+        self.session_pool = session_pool or HttpSessionPool.get_instance()
+        self.timeout = timeout
+        self.oembed = oembed
+        self.policy = policy or {}
+
+    def watch_url(self, video_id):
+        return f"{self.base_url}/watch?v={video_id}&hl=en"
+
+    def oembed_url(self, video_id):
+        watch_url = quote(f"https://www.youtube.com/watch?v={video_id}", safe='')
+        return f"{self.base_url}/oembed?url={watch_url}&format=json"
+
+    def fetch(self, video_id):
+        """
+        Lấy metadata của video
+
+        Returns:
+            dict: Như project_info nhưng không có 'video' / 'audio' / 'formats';
+                  field không đọc được là None
+
+        Raises:
+            VideoUnavailableError: Video không xem được (lỗi cố định)
+            FastPathError: Không đọc được trang watch lẫn oEmbed
+            requests.RequestException: Lỗi mạng / HTTP (để RetryPolicy xử lý)
+        """
+        response = self.session_pool.get(self.watch_url(video_id), timeout=self.timeout,
+                                         cookies=_CONSENT_COOKIES)
+        response.raise_for_status()
+        html = response.text
+        try:
+            return info_from_player_response(parse_player_response(html), html, self.policy)
+        except FastPathError:
+            if not self.oembed:
+                raise
+        return self.fetch_oembed(video_id)
+
+    def fetch_oembed(self, video_id):
+        response = self.session_pool.get(self.oembed_url(video_id), timeout=self.timeout)
+        if response.status_code != 200:
+            raise FastPathError(f"oEmbed trả về HTTP {response.status_code}")
+        try:
+            data = response.json()
+        except ValueError:
+            raise FastPathError("oEmbed không trả về JSON")
+        return info_from_oembed(data, video_id)
@@ -0,0 +1,319 @@
+"""
+YouTube Listing cho Video Downloader Tool
+Liệt kê video của kênh / playlist bằng asyncio + aiohttp (trang đầu + các trang continuation)
+"""
+
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+
+from .constants import NetworkDefaults
+
+
+class ListingError(Exception):
+    """Không đọc được dữ liệu danh sách (trang thay đổi cấu trúc, bị chặn, ...)"""
+
+
+# handle_entry trả về FILTERED: video đã xử lý xong nhưng không được đưa lên bảng
+FILTERED = 'filtered'
+
+
+class ListingResult:
+    """Kết quả một lần duyệt danh sách"""
+
+    def __init__(self):
+        self.listed = []         # ID video đã giao cho handler, theo thứ tự của danh sách
+        self.settled = set()     # ID đã xử lý xong: đã đưa lên bảng hoặc bị lọc bỏ có chủ ý
+        self.added = set()       # ID đã đưa lên bảng (tập con của settled)
+        self.complete = False    # Đã duyệt hết danh sách hoặc gặp video đã biết
+        self.skipped = 0         # Số video bị loại bởi bộ lọc rẻ (do handler đếm)
+
+    def record(self, video_id, outcome):
+        """Ghi kết quả xử lý một video: True (lên bảng), FILTERED hoặc False (chưa xong)"""
+        if outcome:
+            self.settled.add(video_id)
+        if outcome is True:
+            self.added.add(video_id)
+
+    @property
+    def ids(self):
+        """
+        ID dùng làm mốc đồng bộ: các video đã lên bảng trong đoạn cuối danh sách
+        mà mọi video đều đã xử lý xong
+
+        Lần đồng bộ sau dừng ở video đã biết đầu tiên (danh sách xếp mới nhất
+        trước), nên video chưa xử lý xong (lỗi tạm thời, bị bỏ do should_stop /
+        đủ max_videos) phải nằm trên mọi ID được ghi: chỉ ghi các video sau video
+        chưa xử lý xong cuối cùng, lần sau duyệt lại từ đầu tới được nó. Video bị
+        lọc bỏ không chặn mốc nhưng cũng không được ghi, để lần load sau với bộ
+        lọc khác không dừng ở video chưa từng lên bảng.
+        """
+        ids = []
+        for video_id in reversed(self.listed):
+            if video_id not in self.settled:
+                break
+            if video_id in self.added:
+                ids.append(video_id)
+        return ids[::-1]
+
+
+# Các renderer chứa một video trong ytInitialData / response continuation
+VIDEO_RENDERERS = ('videoRenderer', 'gridVideoRenderer', 'playlistVideoRenderer',
+                   'reelItemRenderer', 'compactVideoRenderer')
+
+_INITIAL_DATA_PATTERNS = (
+    re.compile(r'var ytInitialData\s*=\s*(\{.*?\});\s*</script>', re.S),
+    re.compile(r'window\["ytInitialData"\]\s*=\s*(\{.*?\});', re.S),
+)
+_API_KEY_PATTERN = re.compile(r'"INNERTUBE_API_KEY"\s*:\s*"([^"]+)"')
+_CLIENT_VERSION_PATTERN = re.compile(r'"INNERTUBE_CLIENT_VERSION"\s*:\s*"([^"]+)"')
+
+
+class YouTubeListingEngine:
+    """
+    Duyệt danh sách video của kênh / playlist.
+
+    Việc lấy trang là tuần tự (mỗi trang chứa token của trang sau), nhưng mỗi
+    entry được giao cho handler chạy song song (giới hạn bởi semaphore) ngay khi
+    trang về, trong lúc trang kế tiếp đang được tải. Nếu handler chậm hơn tốc độ
+    duyệt trang, engine ngừng tải trang mới khi đã có max_pending entry chờ xử lý.
+
+    base_url có thể trỏ tới server giả lập (cùng định dạng trang + endpoint
+    /youtubei/v1/browse) để chạy thử không cần mạng.
+    """
+
+    def __init__(self, base_url=NetworkDefaults.YOUTUBE_BASE_URL, concurrency=4,
+                 timeout=30, max_pending=None, user_agent=NetworkDefaults.USER_AGENT):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = max(1, concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_pending = max_pending or self.concurrency * 4
+        self.headers = {'User-Agent': user_agent, 'Accept-Language': 'en-US,en;q=0.9'}
+
+    def channel_url(self, channel_id, tab='videos'):
+        return f"{self.base_url}/channel/{channel_id}/{tab}"
+
+    def playlist_url(self, playlist_id):
+        return f"{self.base_url}/playlist?list={playlist_id}"
+
+    def rebase(self, url):
+        """
+        Đổi một link YouTube (kênh / playlist) sang base_url, giữ nguyên path và query
+
+        Link có tham số list (watch?v=...&list=..., playlist?list=...) được đổi
+        sang trang playlist: trang watch chỉ nhúng một phần playlist.
+        """
+        parsed = urlparse(url)
+        list_id = parse_qs(parsed.query).get('list')
+        if list_id:
+            return self.playlist_url(list_id[0])
+        return f"{self.base_url}{parsed.path}" + (f"?{parsed.query}" if parsed.query else '')
+
+    async def iter_pages(self, session, list_url):
+        """
+        Async generator trả về danh sách entry của từng trang
+
+        Yields:
+            list: các dict id, title, duration (giây), views, url
+        """
+        separator = '&' if '?' in list_url else '?'
+        async with session.get(f"{list_url}{separator}hl=en") as response:
+            response.raise_for_status()
+            html = await response.text()
+
+        data = self._parse_initial_data(html)
+        api_key = _search(_API_KEY_PATTERN, html)
+        client_version = _search(_CLIENT_VERSION_PATTERN, html) or '2.20240101.00.00'
+
+        seen = set()
+        first = True
+        while data is not None:
+            entries, token = self._parse_page(data, seen)
+            if first and not entries:
+                # Trang đổi cấu trúc / không phải trang danh sách: để yt-dlp liệt kê
+                raise ListingError(f"Trang đầu của {list_url} không có video nào")
+            first = False
+            yield entries
+            if not token:
+                return
+            data = await self._fetch_continuation(session, token, api_key, client_version)
+
+    async def run(self, list_url, handle_entry, should_stop=None, stop_at=None, result=None):
+        """
+        Duyệt toàn bộ danh sách và gọi handle_entry(entry) (coroutine) cho từng video
+
+        Args:
+            list_url (str): Trang danh sách (channel_url / playlist_url)
+            handle_entry (callable): async def handle_entry(entry), trả về True nếu video
+                                     đã lên bảng (được ghi vào mốc đồng bộ result.ids),
+                                     FILTERED nếu bị lọc bỏ, False nếu chưa xử lý xong
+            should_stop (callable): Trả về True để ngừng tải thêm trang / entry
+            stop_at (set): ID video đã biết, gặp một ID trong đây thì dừng duyệt
+            result (ListingResult): Ghi kết quả vào đây (tạo mới nếu None)
+
+        Returns:
+            ListingResult
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+        result = result or ListingResult()
+
+        async def guarded(entry):
+            async with semaphore:
+                if should_stop and should_stop():
+                    return
+                result.record(entry['id'], await handle_entry(entry))
+
+        async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
+            pages = self.iter_pages(session, list_url)
+            try:
+                async for entries in pages:
+                    for entry in entries:
+                        if stop_at and entry['id'] in stop_at:
+                            result.complete = True
+                            return result
+                        if should_stop and should_stop():
+                            return result
+                        result.listed.append(entry['id'])
+                        pending.add(asyncio.ensure_future(guarded(entry)))
+                    # Backpressure: chờ handler bớt việc trước khi tải trang kế tiếp
+                    while len(pending) >= self.max_pending:
+                        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    if should_stop and should_stop():
+                        return result
+                result.complete = True
+            finally:
+                await pages.aclose()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+        return result
+
+    async def _fetch_continuation(self, session, token, api_key, client_version):
+        payload = {
+            'context': {'client': {'clientName': 'WEB', 'clientVersion': client_version, 'hl': 'en'}},
+            'continuation': token,
+        }
+        params = {'key': api_key} if api_key else None
+        async with session.post(f"{self.base_url}/youtubei/v1/browse", params=params,
+                                json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    @staticmethod
+    def _parse_initial_data(html):
+        for pattern in _INITIAL_DATA_PATTERNS:
+            match = pattern.search(html)
+            if match:
+                try:
+                    return json.loads(match.group(1))
+                except ValueError:
+                    continue
+        raise ListingError("Không tìm thấy ytInitialData trong trang danh sách")
+
+    def _parse_page(self, data, seen):
+        """Lấy các video và token continuation (nếu có) của một trang"""
+        entries = []
+        token = None
+        for kind, node in _walk(data):
+            if kind == 'continuation':
+                token = token or _continuation_token(node)
+                continue
+            entry = self._entry_from_renderer(node)
+            if entry and entry['id'] not in seen:
+                seen.add(entry['id'])
+                entries.append(entry)
+        return entries, token
+
+    def _entry_from_renderer(self, renderer):
+        video_id = renderer.get('videoId')
+        if not video_id:
+            return None
+        title = _text(renderer.get('title')) or _text(renderer.get('headline'))
+        duration = renderer.get('lengthSeconds')
+        duration = int(duration) if duration and str(duration).isdigit() \
+            else parse_length(_text(renderer.get('lengthText')))
+        return {
+            'id': video_id,
+            'title': title,
+            'duration': duration,
+            'views': parse_count(_text(renderer.get('viewCountText'))),
+            'url': f"{self.base_url}/watch?v={video_id}",
+        }
+
+
+def _walk(node):
+    """Duyệt cây JSON, trả về ('video', renderer) và ('continuation', renderer)"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in VIDEO_RENDERERS and isinstance(value, dict):
+                yield 'video', value
+            elif key == 'continuationItemRenderer':
+                yield 'continuation', value
+            else:
+                yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+
+def _continuation_token(node):
+    if isinstance(node, dict):
+        command = node.get('continuationCommand')
+        if isinstance(command, dict) and command.get('token'):
+            return command['token']
+        for value in node.values():
+            token = _continuation_token(value)
+            if token:
+                return token
+    elif isinstance(node, list):
+        for item in node:
+            token = _continuation_token(item)
+            if token:
+                return token
+    return None
+
+
+def _text(node):
+    """Đọc text từ dạng {'simpleText': ...} hoặc {'runs': [{'text': ...}]}"""
+    if not isinstance(node, dict):
+        return node if isinstance(node, str) else None
+    if 'simpleText' in node:
+        return node['simpleText']
+    runs = node.get('runs')
+    if runs:
+        return ''.join(run.get('text', '') for run in runs)
+    return None
+
+
+def _search(pattern, text):
+    match = pattern.search(text)
+    return match.group(1) if match else None
+
+
+def parse_length(text):
+    """'1:02:03' -> 3723 giây; None nếu không đọc được"""
+    if not text:
+        return None
+    try:
+        seconds = 0
+        for part in text.strip().split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def parse_count(text):
+    """'1,234,567 views' -> 1234567, '1.2M views' -> 1200000; None nếu không đọc được"""
+    if not text:
+        return None
+    text = text.replace(',', '').strip()
+    match = re.search(r'(\d+(?:\.\d+)?)\s*([KMB])?\b', text, re.I)
+    if not match:
+        return 0 if text.lower().startswith('no ') else None
+    value = float(match.group(1))
+    multiplier = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}.get((match.group(2) or '').upper(), 1)
+    return int(value * multiplier)
@@ -12,7 +12,7 @@ from pytubefix import Channel
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from urllib.parse import  urlparse
 import urllib
 import asyncio,aiohttp
@@ -22,9 +22,25 @@ from typing import Union, List, Any
 
 import yt_dlp,re,json,bs4,traceback,requests
 import datetime
+import functools
 from multiprocessing import Queue, Process
 import random
 
+from .http_session import HttpSessionPool
+from .retry_policy import RetryPolicy, CircuitOpenError
+from .ytdlp_pool import YoutubeDLPool
+from .bounded_executor import BoundedExecutor
+from .metadata_cache import MetadataCache
+from .config_manager import ConfigManager
+from .youtube_listing import FILTERED, YouTubeListingEngine, ListingError, ListingResult
+from .channel_sync import ChannelSyncStore
+from .info_projection import project_info
+from .extraction_pool import ExtractionPool
+from .single_flight import SingleFlight
+from .negative_cache import NegativeCache
+from .adaptive_concurrency import AdaptiveConcurrency, WATCH_PAGE
+from .watch_metadata import WatchPageMetadata, VideoUnavailableError
+
 def log_traceback_to_file(traceback_info: str):
     
     """
@@ -61,7 +77,33 @@ class YoutuberAssistant(QThread):
         self.dal = False
         self.type = 'video'
         self.real = 0
+        self._count_lock = threading.Lock()
         self._isForceClosed = False
+        self.retry_policy = RetryPolicy.get_instance()
+        self.ydl_pool = YoutubeDLPool.get_instance()
+        self.flat_pool = YoutubeDLPool.get_flat_instance()
+        config_manager = ConfigManager()
+        self.metadata_cache = MetadataCache.from_config(config_manager.get_cache_config())
+        self.youtube_base_url = config_manager.get_youtube_base_url()
+        self.extraction_pool = ExtractionPool.get_instance()
+        self.single_flight = SingleFlight.get_instance()
+        self.concurrency = AdaptiveConcurrency.get_instance()
+        # BatchLoader gán hàm giành quyền đưa video lên bảng (mỗi video một dòng cho cả batch)
+        self.claim_row = None
+        format_policy = config_manager.get_format_policy()
+        self.project_info = functools.partial(project_info, policy=format_policy,
+                                              debug=config_manager.get_debug_config())
+        metadata_config = config_manager.get_metadata_config()
+        self.watch_metadata = WatchPageMetadata(self.youtube_base_url,
+                                                oembed=metadata_config.get('oembed', True),
+                                                policy=format_policy) \
+            if metadata_config.get('backend', 'fast') == 'fast' else None
+        negative_config = config_manager.get_negative_cache_config()
+        self.negative_cache = NegativeCache.from_config(negative_config) \
+            if negative_config.get('enabled', True) else None
+        sync_config = config_manager.get_channel_sync_config()
+        self.channel_sync = ChannelSyncStore.from_config(sync_config) \
+            if sync_config.get('enabled', True) else None
         # self.load_info_signal = pyqtSignal(bool, str)
     
         
@@ -73,122 +115,277 @@ class YoutuberAssistant(QThread):
         self.load_info_signal.emit(True, 'CCC')
         
         try:
-            check = self.check_youtube_link(self.link)
-            if check =='error':
-                self.errors_signal.emit('Đường link bạn đưa vào không phải là link Youtube, vui lòng kiểm tra lại!')
-                return
-            
-            elif check =='video':
-                print('Link dạng video')
-                id_video = self.takeVideoIDFromUrl(self.link)
-                
-                
-                if self.api == 'NoAPI':
-                    # chạy hàm loading mà không có api
-                    print('chạy hàm loading mà không có api video')
-            
-                    theInfo = self.getMetadataFromYtdlp(f'https://www.youtube.com/watch?v={id_video}',True)   
-                    # self.update_rowInfo_signal.emit(
-                    #                 theInfo,self.dal)
-                else:
-                    print('chạy hàm loading có api')
-                    # theInfo = self.getVideoInfoByRequest(id_video,self.source)
-                    # self.update_rowInfo_signal.emit(
-                    #                 theInfo,self.dal)
-                    
-            elif check =='playlist':
-                print('Link dạng playlist')
-                self.getAllVideosFromPlaylist(self.link)
-        
-
-            elif check == 'channel':
-                print('Link dạng channel')
-                id_channel = self.turnChannelUrlToId(self.link)
-                print(f"==>> id_channel: {id_channel}")
-                if id_channel == False:
-                    self.errors_signal.emit('Kênh không tồn tại hoặc đường dẫn sai! Vui lòng kiểm tra lại!!!')
-                    return
-                
-                if self.api == 'NoAPI':
-                    print('chạy hàm loading mà không có api')
-                    self.getAllVideosUrlFromChannelToTable(id_channel)
-                else:
-                    print('chạy hàm loading có api')
-                    # self.getAllVideosUrlFromChannelToTableWithAPI(id_channel)
+            # Tạo sẵn mỗi luồng một YoutubeDL (chỉ tốn lần đầu, các lần sau dùng lại)
+            if self.extraction_pool is None:
+                self.ydl_pool.warm(self.threads)
+            self.loadLink(self.link)
             
         except Exception as e:
-            # self.load_info_signal.emit(False)
-            return
+            log_traceback_to_file(traceback.format_exc())
+            self.errors_signal.emit(f'Lỗi xảy ra khi tải thông tin, lý do:<br>{str(e)}')
         
         finally:
             self.load_info_signal.emit(False,'')
     
+    def loadLink(self, link):
+        """
+        Load thông tin của một link (video / playlist / kênh) lên bảng
+
+        Chạy đồng bộ trên luồng gọi: run() dùng cho một link, BatchLoader gọi
+        trực tiếp từ worker pool khi tải nhiều link.
+
+        Returns:
+            bool: False nếu link không hợp lệ hoặc không lấy được thông tin
+        """
+        check = self.check_youtube_link(link)
+        if check =='error':
+            self.errors_signal.emit('Đường link bạn đưa vào không phải là link Youtube, vui lòng kiểm tra lại!')
+            return False
+        
+        elif check =='video':
+            print('Link dạng video')
+            id_video = self.takeVideoIDFromUrl(link)
+            
+            
+            if self.api == 'NoAPI':
+                # chạy hàm loading mà không có api
+                print('chạy hàm loading mà không có api video')
+        
+                theInfo = self.getVideoMetadata(f'https://www.youtube.com/watch?v={id_video}',True)   
+                if theInfo is None:
+                    return False
+                self._emit_row(theInfo)
+            else:
+                print('chạy hàm loading có api')
+                # theInfo = self.getVideoInfoByRequest(id_video,self.source)
+                # self.update_rowInfo_signal.emit(
+                #                 theInfo,self.dal)
+                
+        elif check =='playlist':
+            print('Link dạng playlist')
+            self.getAllVideosFromPlaylist(link)
+    
+
+        elif check == 'channel':
+            print('Link dạng channel')
+            id_channel = self.turnChannelUrlToId(link)
+            print(f"==>> id_channel: {id_channel}")
+            if id_channel == False:
+                self.errors_signal.emit('Kênh không tồn tại hoặc đường dẫn sai! Vui lòng kiểm tra lại!!!')
+                return False
+            
+            if self.api == 'NoAPI':
+                print('chạy hàm loading mà không có api')
+                self.getAllVideosUrlFromChannelToTable(id_channel)
+            else:
+                print('chạy hàm loading có api')
+                # self.getAllVideosUrlFromChannelToTableWithAPI(id_channel)
+        return True
+    
     def getAllVideosFromPlaylist(self, url_playlist):
 
-        self.real = 0
+        try:
+            self.loadVideosFromListing(url_playlist)
+        except Exception as e:
+            log_traceback_to_file(traceback.format_exc())
+            self.error = True
+            self.errors_signal.emit(f'Lỗi xảy ra khi thu thập đường link từ playlist, lý do:<br>{str(e)}')
+
+    def listVideosFlat(self, list_url):
+        """
+        Danh sách video rẻ (extract_flat) của kênh / playlist
+
+        Chỉ đọc các trang danh sách, không mở trang từng video; mỗi entry đã có
+        sẵn tiêu đề, thời lượng và lượt xem (có thể None tùy loại danh sách).
+        Instance YoutubeDL được giữ trong suốt vòng lặp vì entries được tải dần.
+
+        Yields:
+            dict: id, title, duration (giây), views, url
+        """
+        with self.flat_pool.checkout() as ydl:
+            info = self.retry_policy.call(list_url, ydl.extract_info, list_url, download=False)
+            for entry in info.get('entries') or []:
+                if not entry or not entry.get('id'):
+                    continue
+                yield {
+                    'id': entry['id'],
+                    'title': entry.get('title'),
+                    'duration': entry.get('duration'),
+                    'views': entry.get('view_count'),
+                    'url': entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}",
+                }
+
+    def passesFlatFilters(self, entry):
+        """Bộ lọc áp dụng trên danh sách rẻ; field chưa biết thì cho qua"""
+        if entry.get('views') is not None and entry['views'] < self.min_views:
+            return False
+        if entry.get('duration') is not None and entry['duration'] < self.min_duration * 60:
+            return False
+        return True
 
-        def callit(v,pll:Playlist):
-            print(v)
+    def passesFullFilters(self, rs):
+        """Bộ lọc áp dụng sau khi đã lấy metadata đầy đủ (min_likes chỉ có ở bước này)"""
+        return (int(rs.get('views') or 0) >= self.min_views
+                and int(rs.get('likes') or 0) >= self.min_likes
+                and self.hms_to_seconds(rs.get('duration')) >= self.min_duration * 60)
 
-           
-            if self.real == self.countVideosLimit or self._isForceClosed:
-                pll.needToStop = True
-                print('dừng cái pll lại')
-                return 
+    def loadVideosFromListing(self, list_url, known_ids=None):
+        """
+        Tải video của kênh / playlist theo hai tầng
 
-            if self.api == 'NoAPI':
-                # print(' chạy hàm loading mà không có api')
-                
-                rs = self.getMetadataFromYtdlp(v)
-                
-            else:
-                print('chạy hàm loading mà có api')
-                rs = self.getVideoInfoByRequest(self.takeVideoIDFromUrl(v),v)
+        1. Duyệt danh sách rẻ, loại ngay video không đạt min_views / min_duration
+        2. Chỉ những video còn lại mới được lấy metadata đầy đủ (song song, tối đa
+           self.threads luồng), rồi lọc tiếp min_likes
 
-            rs = self.getMetadataFromYtdlp(v)
-            if rs is None:
-                return v
-            views = rs.get('views')
-            likes = rs.get('likes')
+        Số video đang lấy metadata không vượt quá số chỗ còn trống của max_videos,
+        nên khi đã đủ video thì không tốn thêm lượt lấy metadata nào.
 
-            
-            if int(views) >= self.xThousandViews and int(likes) >= self.xLikes and self.real < self.countVideosLimit:
-                
-                self.update_rowInfo_signal.emit(rs,self.dal)
-                self.real +=1
-                
-            # return v
+        Danh sách được duyệt bằng YouTubeListingEngine (aiohttp); nếu không đọc
+        được trang danh sách thì quay về liệt kê bằng yt-dlp.
 
+        Args:
+            list_url (str): Link kênh / playlist
+            known_ids (set): ID video đã biết, duyệt tới đây thì dừng (đồng bộ tăng dần)
+
+        Returns:
+            ListingResult
+        """
+        self.real = 0
         try:
-            
-            delay = 0.6
-            
-            pll = Playlist(url_playlist,None,callit)
-            
-            for video in pll.url_generator1():
-                thread = threading.Thread(target=callit,args=(video,pll))
-                thread.start()
-                sleep(delay)
-            
-         
-           
-        except Exception as e:
+            result = asyncio.run(self._loadVideosAsync(list_url, known_ids))
+        except (ListingError, aiohttp.ClientError) as e:
+            if self.real:
+                raise
+            print(f"Không liệt kê được bằng aiohttp ({e}), chuyển sang yt-dlp")
+            result = self._loadVideosFromFlatListing(list_url, known_ids)
+
+        print(f"Bỏ qua {result.skipped} video không đạt bộ lọc trước khi lấy metadata")
+        return result
+
+    async def _loadVideosAsync(self, list_url, known_ids=None):
+        """Duyệt danh sách bằng YouTubeListingEngine, lấy metadata trên thread pool"""
+        engine = YouTubeListingEngine(self.youtube_base_url, concurrency=self.threads)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='listing')
+        slots = asyncio.Condition()
+        state = {'in_flight': 0}
+        result = ListingResult()
+
+        async def handle_entry(entry):
+            if not self.passesFlatFilters(entry):
+                result.skipped += 1
+                return FILTERED
+            async with slots:
+                # Chờ bớt việc đang chạy nếu chúng đã đủ lấp các chỗ còn lại của max_videos
+                await slots.wait_for(lambda: self.real + state['in_flight'] < self.max_videos
+                                     or not self._has_room())
+                if not self._has_room():
+                    return False
+                state['in_flight'] += 1
+            try:
+                return await loop.run_in_executor(executor, self._loadEntry, entry)
+            finally:
+                async with slots:
+                    state['in_flight'] -= 1
+                    slots.notify_all()
+
+        try:
+            await engine.run(engine.rebase(list_url), handle_entry,
+                             should_stop=lambda: self._isForceClosed or not self._has_room(),
+                             stop_at=known_ids, result=result)
+        finally:
+            executor.shutdown(wait=True)
+        return result
+
+    def _loadVideosFromFlatListing(self, list_url, known_ids=None):
+        """Như _loadVideosAsync nhưng liệt kê bằng yt-dlp (extract_flat)"""
+        result = ListingResult()
+        in_flight = set()
+        loads = {}
+        with BoundedExecutor(self.threads, thread_name_prefix='listing') as executor:
+            for entry in self.listVideosFlat(list_url):
+                if known_ids and entry['id'] in known_ids:
+                    result.complete = True
+                    break
+                if self._isForceClosed or not self._has_room():
+                    break
+                result.listed.append(entry['id'])
+                if not self.passesFlatFilters(entry):
+                    result.skipped += 1
+                    result.record(entry['id'], FILTERED)
+                    continue
+                # Chờ bớt việc đang chạy nếu chúng đã đủ lấp các chỗ còn lại của max_videos
+                while in_flight and self.real + len(in_flight) >= self.max_videos:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                if not self._has_room():
+                    break
+                future = executor.submit(self._loadEntry, entry)
+                loads[future] = entry['id']
+                in_flight.add(future)
+            else:
+                result.complete = True
+        for future, video_id in loads.items():
+            result.record(video_id, future.result())
+        return result
+
+    def _loadEntry(self, entry):
+        """
+        Lấy metadata đầy đủ của một entry đã qua bộ lọc rẻ và đưa lên bảng nếu đạt
+
+        Returns:
+            True nếu video đã lên bảng; FILTERED nếu bị lọc bỏ hoặc lỗi cố định đã vào
+            negative_cache; False nếu lỗi tạm thời hoặc bị bỏ do đủ max_videos
+        """
+        if self._isForceClosed or not self._has_room():
+            return False
+        try:
+            rs = self.getVideoMetadata(entry['url'])
+            if rs is None:
+                return FILTERED if self.lookupFailure(entry['id']) is not None else False
+            if not self.passesFullFilters(rs):
+                return FILTERED
+            return self._emit_row(rs)
+        except Exception:
             log_traceback_to_file(traceback.format_exc())
-            self.toggleLoadingWindow_signal.emit(False) 
-            self.error = True
-            self.errors_signal.emit(f'Lỗi xảy ra khi thu thập đường link từ channel, lý do:<br>{str(e)}')
-            
-    
+            return False
+
+    def _has_room(self):
+        """Còn được thêm video vào bảng (chưa đủ max_videos) hay không"""
+        with self._count_lock:
+            return self.real < self.max_videos
+
+    def _emit_row(self, rs):
+        """
+        Đưa một video đạt bộ lọc lên bảng, không vượt quá max_videos khi nhiều luồng cùng gọi
+
+        Returns:
+            bool: Video đã nằm trên bảng (kể cả do loader khác đưa lên); False nếu đã đủ max_videos
+        """
+        if self.claim_row is not None and not self.claim_row(rs['id']):
+            # Video đã được loader khác trong batch đưa lên bảng
+            return True
+        with self._count_lock:
+            if self.real >= self.max_videos:
+                return False
+            self.real += 1
+        self.update_rowInfo_signal.emit(rs,self.dal)
+        return True
     
     def turnChannelUrlToId(self, url):
+        def fetch():
+            rs = HttpSessionPool.get_instance().get(url, timeout=30)
+            rs.raise_for_status()
+            return rs
+
         try:
-            rs = requests.get(url)
+            rs = self.retry_policy.call(url, fetch)
             soup = bs4.BeautifulSoup(rs.text, 'html.parser')
             tag = soup.findAll('meta', property="og:url")
             url = tag[0]['content']
             id = url.split('channel/')[1]
             return id
-        except:
+        except Exception:
+            log_traceback_to_file(traceback.format_exc())
             return False
     
     def convert_duration(self,duration_str):
@@ -225,181 +422,230 @@ class YoutuberAssistant(QThread):
     
     def getAllVideosUrlFromChannelToTable(self, id_channel):
         
-         
         urlWithID = "https://www.youtube.com/channel/"+id_channel
-
-        self.real = 0
-
-        def callit(theVideo:YouTubeFix,channel:Channel):
-            
-            # print(v)
-      
-
-            if self.real == self.max_videos or self._isForceClosed:
-                channel.needToStop = True
-                return
-            
-            if self.api == 'NoAPI':
-                # print('chạy hàm loading mà không có api youtube')
-                
-                # theVideo = YouTubeFix(v)
-                # title = theVideo.title
-                views = theVideo.views
-                # likes = theVideo.likes
-                rs = {
-                    'id': theVideo.video_id,
-                    'title': theVideo.title,
-                    'desc': theVideo.description,
-                    'tags' : [],
-                    'duration' : self.convert_duration(str(theVideo.length)),
-                    'thumb_url': theVideo.thumbnail_url,
-                    'views': views,
-                    'likes': theVideo.likes,
-                    'url': theVideo.watch_url,
-                    'pvf': None,
-                    'paf': None
-                }
-                # print(f"==>> rs: {rs}")
-            else:
-                print('chạy hàm loading mà có api')
-                # rs = self.getVideoInfoByRequest(self.takeVideoIDFromUrl(v),v)
-                
-
-                # if rs is None:
-                #     return v
-            
-        
-                # views = int(rs.get('views'))
-                # likes = int(rs.get('likes'))
-
-            
-            if int(views) >= self.min_views and self.real < self.max_videos:
-                self.update_rowInfo_signal.emit(rs,self.dal)
-                self.real +=1
-             
-        
-        channel = Channel(urlWithID)
-        
+        tab = 'shorts' if self.type == "shorts" else 'videos'
+        list_url = f"{urlWithID}/{tab}"
           
         try:
-            if self.type == "shorts":
-                channel.html_url = channel.shorts_url
-            else:
-                channel.html_url = channel.videos_url
-        
-            for video in channel.url_generator():
-                if self._isForceClosed:
-                    return
-                # video : YouTubeFix
-                # video.get_info()
-                # title = video.title
-                # print(f"==>> title: {title}")
-                thread = threading.Thread(target=callit,args=(video,channel))
-                thread.start()
-                sleep(0.1)
-                
+            cursor = self._run_db(self.channel_sync.lookup(id_channel, tab)) if self.channel_sync else None
+            if cursor:
+                print(f"Đồng bộ tăng dần: chỉ lấy video mới hơn {cursor.newest_video_id}")
+            result = self.loadVideosFromListing(list_url, cursor.known_ids if cursor else None)
+            # Chỉ dời mốc khi đã duyệt tới video đã biết / hết danh sách hoặc đã đủ max_videos;
+            # dừng giữa chừng (người dùng hủy) thì lần sau duyệt lại từ đầu
+            if self.channel_sync and (result.complete or not self._has_room()):
+                self._run_db(self.channel_sync.update(id_channel, tab, result.ids, cursor))
         except Exception as e:
             log_traceback_to_file(traceback.format_exc())
             self.error = True
             self.errors_signal.emit(f'Lỗi xảy ra khi thu thập đường link từ channel 123, lý do:<br>{str(e)}')
   
 
-    
+    def hms_to_seconds(self, duration_str):
+        """Đổi chuỗi HH:MM:SS (convert_to_hms) về số giây, 0 nếu không đọc được"""
+        try:
+            seconds = 0
+            for part in str(duration_str).split(':'):
+                seconds = seconds * 60 + int(part)
+            return seconds
+        except ValueError:
+            return 0
+
+    def getVideoMetadata(self, url, returnIfFalse=None):
+        """
+        Lấy metadata để đưa video lên bảng (không cần link stream)
+
+        Với metadata.backend = "fast", chỉ đọc trang watch / oEmbed (một request);
+        yt-dlp chỉ chạy khi trang không đọc được hoặc thiếu field mà bộ lọc cần.
+        Link stream được lấy khi tải (StreamUrlResolver).
+        """
+        video_id = self.takeVideoIDFromUrl(url)
+        if self.watch_metadata is None or not video_id:
+            return self.getMetadataFromYtdlp(url, returnIfFalse)
+        rs = self._getMetadata(video_id, url, returnIfFalse,
+                               lambda: self.fetchWatchMetadata(video_id, url, returnIfFalse),
+                               require_streams=False)
+        if rs is not None and not self.hasFilterFields(rs):
+            # Bản ghi cache của lần load trước thiếu field mà bộ lọc lần này cần
+            rs = self.getMetadataFromYtdlp(url, returnIfFalse)
+        return rs
 
     def getMetadataFromYtdlp(self,url,returnIfFalse = None):
+        """Lấy metadata (kèm link stream) của video bằng yt-dlp, dùng metadata_cache nếu còn hạn"""
+        video_id = self.takeVideoIDFromUrl(url)
+        if not video_id:
+            return self.extractMetadataFromYtdlp(url, returnIfFalse)
+        return self._getMetadata(video_id, url, returnIfFalse,
+                                 lambda: self.extractMetadataFromYtdlp(url, returnIfFalse),
+                                 require_streams=True)
+
+    def _getMetadata(self, video_id, url, returnIfFalse, fetch, require_streams):
+        """
+        Bỏ qua video vừa lỗi cố định (negative_cache), rồi lấy từ metadata_cache hoặc fetch()
+
+        Các luồng cùng lấy một video (cùng ID) trong lúc lần lấy đầu chưa xong
+        sẽ dùng chung kết quả của lần đó qua single_flight.
+        """
+        def load():
+            failure = self.lookupFailure(video_id)
+            if failure:
+                if returnIfFalse:
+                    self.errors_signal.emit(f'Bỏ qua link: {url} do lần trước không lấy được thông tin '
+                                            f'({failure.failure_class}):<br>{failure.reason}')
+                return None
+            return self.getCachedMetadata(video_id, fetch, require_streams=require_streams)
 
+        rs, shared = self.single_flight.do((video_id, require_streams), load)
+        if shared:
+            print(f"Dùng chung metadata đang lấy của video {video_id}")
+        return rs
 
-        def findVideoStreamYtDlp(formats, res):
-            # quality_list = ['4320p','2160p','1440p','1080p','720p','480p','360p','240p','144p']
-            quality_list = ['4320p','4320p60','2160p','2160p60','1440p','1440p60','1080p','1080p60','720p','720p60', '480p','360p','240p','144p']
-            index = quality_list.index(res)
-            for i in range(index, len(quality_list)):
-                for fmt in formats:
-                    if fmt.get('format_note') == quality_list[i]:
-                        return fmt['url']
-            return ''
-
-        def findHighestAudioStreamYtDlp(objects,requested_formats):
-            # First try to get audio from requested_formats
-            for fmt in requested_formats:
-                if fmt.get("fps") is None and fmt.get("audio_channels") == 2:
-                    return fmt['url']
-            
-            # If not found in requested_formats, check objects list
-            filtered_objects = [obj for obj in objects if obj.get("fps") is None and obj.get("audio_channels") == 2]
-            if filtered_objects:
-                rs = max(filtered_objects, key=lambda obj: obj.get("abr", 0))
-                return rs['url']
-            
+    def fetchWatchMetadata(self, video_id, url, returnIfFalse=None):
+        """Lấy metadata từ trang watch / oEmbed; quay về yt-dlp nếu không đọc được hoặc thiếu field"""
+        try:
+            info = self.retry_policy.call(url, self.concurrency.call, url, self.threads,
+                                          self.watch_metadata.fetch, video_id, kind=WATCH_PAGE)
+        except VideoUnavailableError as e:
+            self.recordFailure(url, e)
+            if returnIfFalse:
+                self.errors_signal.emit(f'Không thể lấy thông tin của link: {url} bởi vì:<br>{str(e)}')
+            return None
+        except Exception as e:
+            print(f"Không đọc được trang watch của {video_id} ({e}), chuyển sang yt-dlp")
+            return self.extractMetadataFromYtdlp(url, returnIfFalse)
+
+        rs = self.buildDataVideo(info, url)
+        if not self.hasFilterFields(rs):
+            return self.extractMetadataFromYtdlp(url, returnIfFalse)
+        return rs
+
+    def hasFilterFields(self, rs):
+        """Dòng metadata có đủ field mà bộ lọc cần hay không (metadata nhanh có thể thiếu)"""
+        if not rs.get('title'):
+            return False
+        if self.min_views and rs.get('views') is None:
+            return False
+        if self.min_likes and rs.get('likes') is None:
+            return False
+        return not (self.min_duration and rs.get('duration') in (None, 'None'))
+
+    def buildDataVideo(self, info, url, video_format=None, audio_format=None):
+        """Dict một dòng của bảng từ info (project_info / watch_metadata) và stream đã chọn"""
+        # Ước lượng dung lượng để hàng đợi có thể ưu tiên file nhỏ; metadata nhanh
+        # không có stream nhưng có ước lượng từ contentLength của trang watch
+        filesize = sum((fmt['filesize'] or 0) for fmt in (video_format, audio_format) if fmt) \
+            or info.get('filesize') or None
+        return {
+            'id': info['id'],
+            'title': info['title'],
+            'desc': info['description'],
+            'tags' : info['tags'],
+            'duration' : self.convert_to_hms(info['duration']) if info['duration'] is not None else 'None',
+            'thumb_url': info.get('thumbnail') or "None",
+            'views': info.get('view_count'),        # None: metadata nhanh không đọc được
+            'likes': info.get('like_count'),
+            'url': url,
+            'pvf': video_format['url'] if video_format else '',
+            'paf' : audio_format['url'] if audio_format else None,
+            'pvf_ext': video_format['ext'] if video_format else None,
+            'paf_ext': audio_format['ext'] if audio_format else None,
+            'filesize': filesize
+        }
+
+    def lookupFailure(self, video_id):
+        """Lần thất bại còn hạn của video trong negative_cache (NegativeEntry) hoặc None"""
+        if self.negative_cache is None:
             return None
-        
         try:
-            
-            ydl_opts = {
-                'extract_flat': True,
-                'skip_download': True,
-                'quiet': True,
-            }
-            ytt = yt_dlp.YoutubeDL(ydl_opts)
-            info = ytt.extract_info(url, download=False)
-            # print(f"==>> info: {info}")
-           
-            with open('video_info.json', 'w', encoding='utf-8') as f:
-                json.dump(info, f, indent=4, ensure_ascii=False)
-            return
-            media = info['formats']
-            requested_formats = info['requested_formats']
-            thumb_url = 'http://img.youtube.com/vi/' + \
-                info['id'] + '/maxresdefault.jpg'
-            video = findVideoStreamYtDlp(media,'1080p')
-            audio = findHighestAudioStreamYtDlp(media,requested_formats)
+            return self._run_db(self.negative_cache.lookup(video_id))
+        except Exception:
+            log_traceback_to_file(traceback.format_exc())
+            return None
 
-            try:
-                views = info['view_count']
-                if views == None:
-                    views = 0
-            except:
-                views = 0
-            try:
-                likes = info['like_count']
-                if likes == None:
-                    likes = 0
-            except:
-                likes = 0
-
-            dataVideo = {
-                'id': info['id'],
-                'title': info['title'],
-                'desc': info['description'],
-                'tags' : info['tags'],
-                'duration' : self.convert_to_hms(info['duration']),
-                'thumb_url': "None",
-                'views': views,
-                'likes': likes,
-                'url': url,
-                'pvf':video,
-                'paf' :audio
-            }
-        except Exception as e:
+    def recordFailure(self, url, error):
+        """
+        Ghi lỗi lấy metadata vào negative_cache
+
+        Returns:
+            str: Loại lỗi đã ghi, None nếu lỗi không được cache (lỗi tạm thời / không rõ)
+        """
+        video_id = self.takeVideoIDFromUrl(url)
+        if self.negative_cache is None or not video_id:
+            return None
+        try:
+            return self._run_db(self.negative_cache.record(video_id, error))
+        except Exception:
             log_traceback_to_file(traceback.format_exc())
-            if not returnIfFalse:
-                return None
-            self.error = True
-            self.errors_signal.emit(f'Không thể lấy thông tin của link: {url} bởi vì:<br>{str(e)}')
-            dataVideo = {
-                'id': f'LỖI! KHÔNG THỂ LẤY LINK {url}',
-                'title': f'LỖI! KHÔNG THỂ LẤY LINK {url}',
-                'desc': f'LỖI! KHÔNG THỂ LẤY LINK {url}',
-                'tags' : "None",
-                'duration' : "None",
-                'thumb_url': "None",
-                'views': "None",
-                'likes': "None",
-                'url': "None",
-                'pvf':"None",
-                'paf' :"None"
-
-            }
+            return None
+
+    def getCachedMetadata(self, video_id, fetch, require_streams=False):
+        """
+        Trả về metadata từ cache; chỉ gọi fetch() khi chưa có hoặc có nhóm field hết hạn
+
+        Args:
+            video_id (str): ID video
+            fetch (callable): Lấy dict metadata mới (trả về None nếu lỗi)
+            require_streams (bool): Bản ghi cache phải có link stream mới được dùng
+        """
+        try:
+            cached = self._run_db(self.metadata_cache.lookup(video_id, require_streams))
+        except Exception:
+            log_traceback_to_file(traceback.format_exc())
+            cached = None
+        if cached and cached.is_fresh:
+            return cached.data
+
+        rs = fetch()
+        if rs is None:
+            return None
+        if cached:
+            rs = MetadataCache.merge(cached, rs)
+        try:
+            self._run_db(self.metadata_cache.store(
+                rs,
+                static=cached is None or cached.static_expired,
+                volatile=cached is None or cached.volatile_expired))
+        except Exception:
+            log_traceback_to_file(traceback.format_exc())
+        return rs
+
+    def _run_db(self, coro):
+        """Chạy một coroutine database trên event loop riêng của luồng hiện tại"""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def extractMetadataFromYtdlp(self,url,returnIfFalse = None):
+
+
+        try:
+            
+            # Chỉ giữ bản rút gọn; bật debug.dump_info để ghi mẫu info đầy đủ.
+            # Mỗi lần thử đi qua limiter của platform: số luồng chỉ là giới hạn trên,
+            # số request thật sự chạy cùng lúc tự giảm khi bị 429 / 403 / chậm dần
+            if self.extraction_pool is not None:
+                info = self.retry_policy.call(url, self.concurrency.call, url, self.threads,
+                                              self.extraction_pool.extract, url)
+            else:
+                info = self.retry_policy.call(url, self.concurrency.call, url, self.threads,
+                                              self.ydl_pool.extract_info, url,
+                                              project=self.project_info)
+            dataVideo = self.buildDataVideo(info, url, info['video'], info['audio'])
+        except CircuitOpenError as e:
+            # Host đang bị ngắt mạch: không ghi traceback cho từng video bị từ chối
+            if returnIfFalse:
+                self.errors_signal.emit(f'Không thể lấy thông tin của link: {url} bởi vì:<br>{str(e)}')
+            return None
+        except Exception as e:
+            # Lỗi cố định của video (riêng tư, đã xóa, ...) là bình thường, không cần traceback
+            if self.recordFailure(url, e) is None:
+                log_traceback_to_file(traceback.format_exc())
+            if returnIfFalse:
+                self.error = True
+                self.errors_signal.emit(f'Không thể lấy thông tin của link: {url} bởi vì:<br>{str(e)}')
+            return None
         
         return dataVideo          
       
@@ -421,7 +667,7 @@ class YoutuberAssistant(QThread):
     
     
     def takeVideoIDFromUrl(self, url):
-        patterns = [r'watch\?v=([a-zA-Z0-9_-]+)', r'shorts/([a-zA-Z0-9_-]+)']
+        patterns = [r'watch\?v=([a-zA-Z0-9_-]+)', r'shorts/([a-zA-Z0-9_-]+)', r'youtu\.be/([a-zA-Z0-9_-]+)']
         for pattern in patterns:
             match = re.search(pattern, url)
             if match:
@@ -440,7 +686,7 @@ class YoutuberAssistant(QThread):
                     return api
                 else:
                     return 'NoAPI'
-            except:
+            except KeyError:
                 data['api'] = ''
                 f.seek(0)
                 f.write(json.dumps(data))
@@ -454,7 +700,7 @@ class YoutuberAssistant(QThread):
                     return api
                 else:
                     return 'NoAPI'
-            except:
+            except KeyError:
                 data['api'] = ''
                 f.seek(0)
                 f.write(json.dumps(data))
@@ -467,7 +713,7 @@ class YoutuberAssistant(QThread):
                     return cookie
                 else:
                     return 'NoCookie'
-            except:
+            except KeyError:
                 data['cookie'] = ''
                 f.seek(0)
                 f.write(json.dumps(data))
@@ -481,7 +727,7 @@ class YoutuberAssistant(QThread):
                     return instagram
                 else:
                     return 'NoCookie'
-            except:
+            except KeyError:
                 data['instagram'] = ''
                 f.seek(0)
                 f.write(json.dumps(data))
@@ -495,7 +741,7 @@ class YoutuberAssistant(QThread):
                     return douyin
                 else:
                     return 'NoCookie'
-            except:
+            except KeyError:
                 data['douyin'] = ''
                 f.seek(0)
                 f.write(json.dumps(data))
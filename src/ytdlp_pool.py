@@ -0,0 +1,124 @@
+"""
+YoutubeDL Pool cho Video Downloader Tool
+Giữ sẵn các instance yt_dlp.YoutubeDL để dùng lại giữa các lần lấy metadata
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+
+import yt_dlp
+
+
+# Tùy chọn dùng để lấy metadata (không tải file)
+METADATA_OPTIONS = {
+    'extract_flat': True,
+    'skip_download': True,
+    'quiet': True,
+}
+
+# Tùy chọn để liệt kê video của kênh / playlist mà không mở từng video
+FLAT_LIST_OPTIONS = {
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+    'skip_download': True,
+    'quiet': True,
+}
+
+
+class YoutubeDLPool:
+    """
+    Pool các instance YoutubeDL sống lâu.
+
+    Tạo YoutubeDL phải nạp danh sách extractor và dựng opener (cookie jar,
+    handler HTTP), nên thay vì tạo mới cho mỗi video, mỗi luồng mượn một
+    instance qua checkout() rồi trả lại. YoutubeDL không an toàn khi nhiều luồng
+    dùng chung, pool đảm bảo mỗi instance chỉ thuộc một luồng tại một thời điểm.
+    Instance được tạo khi cần (tối đa max_size, None = không giới hạn) và giữ lại
+    cho các lần sau.
+    """
+
+    _instance = None
+    _flat_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, options=None, max_size=None):
+        self.options = dict(options or METADATA_OPTIONS)
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Lấy pool dùng chung cho toàn ứng dụng (tùy chọn METADATA_OPTIONS)"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = YoutubeDLPool()
+            return cls._instance
+
+    @classmethod
+    def get_flat_instance(cls):
+        """Lấy pool dùng chung để liệt kê kênh / playlist (tùy chọn FLAT_LIST_OPTIONS)"""
+        with cls._instance_lock:
+            if cls._flat_instance is None:
+                cls._flat_instance = YoutubeDLPool(FLAT_LIST_OPTIONS)
+            return cls._flat_instance
+
+    @property
+    def size(self):
+        """Số instance đã tạo"""
+        with self._lock:
+            return self._created
+
+    def warm(self, count):
+        """Tạo trước cho đủ count instance để lần lấy metadata đầu không phải chờ"""
+        while True:
+            with self._lock:
+                if self._created >= count or (self.max_size and self._created >= self.max_size):
+                    return
+                self._created += 1
+            self._idle.put(self._create())
+
+    def _create(self):
+        return yt_dlp.YoutubeDL(dict(self.options))
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = not self.max_size or self._created < self.max_size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Đã đủ max_size: chờ luồng khác trả instance
+        return self._idle.get()
+
+    @contextmanager
+    def checkout(self):
+        """Mượn một instance YoutubeDL, tự trả lại khi ra khỏi khối with"""
+        ydl = self._acquire()
+        try:
+            yield ydl
+        finally:
+            self._idle.put(ydl)
+
+    def extract_info(self, url, project=None):
+        """
+        Lấy metadata của url (không tải) bằng một instance trong pool
+
+        Args:
+            project (callable): Rút gọn info dict ngay trong worker (xem project_info),
+                                để bản đầy đủ không bị giữ lại sau lời gọi
+        """
+        with self.checkout() as ydl:
+            info = ydl.extract_info(url, download=False)
+            return project(info) if project else info
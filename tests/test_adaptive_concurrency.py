@@ -0,0 +1,153 @@
+"""Test AIMD của AdaptiveLimiter (đồng hồ giả, không chờ thật)"""
+
+import pytest
+
+from src import adaptive_concurrency
+from src.adaptive_concurrency import (EXTRACT, WATCH_PAGE, AdaptiveConcurrency, AdaptiveLimiter,
+                                      http_status)
+
+
+TOO_MANY_REQUESTS = Exception("ERROR: [youtube] abc: HTTP Error 429: Too Many Requests")
+FORBIDDEN = Exception("ERROR: [youtube] abc: HTTP Error 403: Forbidden")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(adaptive_concurrency.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def make_limiter(max_limit=16, **options):
+    defaults = dict(initial=8, min_limit=1, increase=1, decrease=0.5, latency_factor=3,
+                    forbidden_burst=3, forbidden_window=10)
+    defaults.update(options)
+    return AdaptiveLimiter('youtube', max_limit, **defaults)
+
+
+def request(limiter, clock, error=None, latency=1.0):
+    """Một request trọn vẹn: acquire, chạy latency giây, release"""
+    clock.now += 0.01
+    started = limiter.acquire()
+    clock.now += latency
+    limiter.release(started, error)
+
+
+def test_http_status_reads_ytdlp_messages():
+    assert http_status(TOO_MANY_REQUESTS) == 429
+    assert http_status(FORBIDDEN) == 403
+    assert http_status(Exception("Private video")) is None
+
+
+def test_429_halves_limit(clock):
+    limiter = make_limiter()
+    request(limiter, clock, TOO_MANY_REQUESTS)
+    assert limiter.limit == 4
+
+
+def test_429_burst_from_one_round_decreases_once(clock):
+    limiter = make_limiter()
+    started = [limiter.acquire() for _ in range(3)]
+    clock.now += 1
+    for begin in started:
+        limiter.release(begin, TOO_MANY_REQUESTS)
+    assert limiter.limit == 4
+    # Request gửi sau lần giảm vẫn bị 429: giảm tiếp
+    request(limiter, clock, TOO_MANY_REQUESTS)
+    assert limiter.limit == 2
+
+
+def test_403_decreases_only_on_burst_within_window(clock):
+    limiter = make_limiter(forbidden_burst=3, forbidden_window=10)
+    request(limiter, clock, FORBIDDEN)
+    request(limiter, clock, FORBIDDEN)
+    assert limiter.limit == 8
+    request(limiter, clock, FORBIDDEN)
+    assert limiter.limit == 4
+
+
+def test_403_outside_window_does_not_count(clock):
+    limiter = make_limiter(forbidden_burst=3, forbidden_window=10)
+    request(limiter, clock, FORBIDDEN)
+    request(limiter, clock, FORBIDDEN)
+    clock.now += 30
+    request(limiter, clock, FORBIDDEN)
+    assert limiter.limit == 8
+
+
+def test_other_errors_do_not_change_limit(clock):
+    limiter = make_limiter()
+    request(limiter, clock, Exception("Private video"))
+    assert limiter.limit == 8
+
+
+def test_successes_increase_additively(clock):
+    limiter = make_limiter(initial=4, increase=1)
+    for _ in range(4):
+        request(limiter, clock)
+    # Mỗi request cộng increase / limit: khoảng +1 sau một "vòng" limit request
+    assert 4.8 < limiter.limit < 5
+
+
+def test_slow_latency_decreases(clock):
+    limiter = make_limiter(latency_factor=3)
+    for _ in range(3):
+        request(limiter, clock, latency=1.0)
+    before = limiter.limit
+    for _ in range(10):
+        request(limiter, clock, latency=20.0)
+        if limiter.limit < before:
+            break
+    assert limiter.limit == before * 0.5
+
+
+def test_limit_is_clamped_to_max(clock):
+    limiter = make_limiter(initial=15, max_limit=16)
+    for _ in range(200):
+        request(limiter, clock)
+    assert limiter.limit == 16
+    limiter.set_max(6)
+    assert limiter.limit == 6
+
+
+def test_limit_is_clamped_to_min(clock):
+    limiter = make_limiter(initial=8, min_limit=2)
+    for _ in range(10):
+        request(limiter, clock, TOO_MANY_REQUESTS)
+    assert limiter.limit == 2
+
+
+def test_initial_is_clamped_into_range():
+    assert make_limiter(initial=100, max_limit=16).limit == 16
+    assert make_limiter(initial=0, min_limit=2).limit == 2
+
+
+def test_not_adaptive_stays_at_max(clock):
+    limiter = make_limiter(adaptive=False, max_limit=16)
+    assert limiter.limit == 16
+    request(limiter, clock, TOO_MANY_REQUESTS)
+    assert limiter.limit == 16
+
+
+def test_request_kinds_have_separate_latency_baselines(clock):
+    concurrency = AdaptiveConcurrency({'initial': 8, 'latency_factor': 3})
+    url = 'https://www.youtube.com/watch?v=abc'
+    watch = concurrency.limiter('youtube', 16, WATCH_PAGE)
+    extract = concurrency.limiter('youtube', 16, EXTRACT)
+    assert watch is not extract
+    for _ in range(5):
+        request(watch, clock, latency=0.2)
+    # yt-dlp chậm hơn trang watch hàng chục lần: không phải dấu hiệu bị bóp
+    for _ in range(5):
+        clock.now += 0.01
+        concurrency.call(url, 16, lambda: setattr(clock, 'now', clock.now + 8.0))
+    assert watch.limit >= 8 and extract.limit >= 8
+    assert concurrency.limiter('youtube', 16, WATCH_PAGE) is watch
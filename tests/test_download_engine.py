@@ -0,0 +1,215 @@
+"""Test SegmentedDownloader với server HTTP cục bộ (có / không hỗ trợ Range)"""
+
+import http.server
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.download_engine import SegmentedDownloader, SegmentManifest
+from src.http_session import HttpSessionPool
+from src.rate_limiter import ConnectionLimiter
+from src.retry_policy import RetryPolicy
+
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+SEGMENT_SIZE = 512 * 1024
+_RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)')
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        # Mỗi handler ứng với một kết nối TCP (keep-alive phục vụ nhiều request)
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        header = self.headers.get('Range')
+        match = _RANGE_PATTERN.match(header or '')
+        if match and server.supports_range:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else len(DATA) - 1, len(DATA) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+        else:
+            start, end = 0, len(DATA) - 1
+            self.send_response(200)
+        with server.lock:
+            server.requests.append((start, end, header))
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        body = DATA[start:end + 1]
+        break_at = server.break_at
+        if break_at is not None and start <= break_at <= end:
+            # Giả lập mất kết nối giữa chừng: gửi thiếu rồi đóng
+            self.wfile.write(body[:break_at - start])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    httpd.daemon_threads = True
+    httpd.supports_range = True
+    httpd.break_at = None
+    httpd.requests = []
+    httpd.connections = 0
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f'http://127.0.0.1:{httpd.server_port}/video.mp4'
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def make_downloader(executor, max_attempts=3, **options):
+    return SegmentedDownloader(executor, session_pool=HttpSessionPool(), segment_size=SEGMENT_SIZE,
+                               chunk_size=64 * 1024, timeout=10,
+                               retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0,
+                                                        max_delay=0),
+                               **options)
+
+
+def downloaded_ranges(server):
+    """Các khoảng byte server đã gửi cho request tải dữ liệu (bỏ request probe bytes=0-0)"""
+    return [(start, end) for start, end, header in server.requests if header != 'bytes=0-0']
+
+
+def test_segmented_download(server, executor, tmp_path):
+    dest = str(tmp_path / 'video.mp4')
+    progress = []
+    make_downloader(executor).download(server.url, dest, lambda done, total: progress.append(done))
+
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(dest + '.part') and not os.path.exists(dest + '.part.json')
+    ranges = downloaded_ranges(server)
+    assert len(ranges) == -(-len(DATA) // SEGMENT_SIZE)
+    assert all(end - start + 1 <= SEGMENT_SIZE for start, end in ranges)
+    assert progress[-1] == len(DATA)
+
+
+def test_resume_from_interrupted_manifest(server, executor, tmp_path):
+    dest = str(tmp_path / 'video.mp4')
+    server.break_at = 2 * SEGMENT_SIZE + 1000
+    with pytest.raises(Exception):
+        make_downloader(executor, max_attempts=1).download(server.url, dest)
+
+    # Lần tải bị ngắt để lại .part và manifest các khoảng đã ghi xuống đĩa
+    manifest = SegmentManifest.load(dest + '.part.json', len(DATA))
+    completed = manifest.completed_bytes()
+    assert 0 < completed < len(DATA)
+    for start, end in manifest.ranges:
+        with open(dest + '.part', 'rb') as f:
+            f.seek(start)
+            assert f.read(end - start + 1) == DATA[start:end + 1]
+
+    server.break_at = None
+    server.requests.clear()
+    make_downloader(executor).download(server.url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    resumed = sum(end - start + 1 for start, end in downloaded_ranges(server))
+    assert resumed == len(DATA) - completed
+    assert not os.path.exists(dest + '.part.json')
+
+
+def test_server_without_range_falls_back_to_single_connection(server, executor, tmp_path):
+    server.supports_range = False
+    dest = str(tmp_path / 'video.mp4')
+    make_downloader(executor).download(server.url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    assert downloaded_ranges(server) == [(0, len(DATA) - 1)]
+    assert not os.path.exists(dest + '.part.json')
+
+
+@pytest.mark.parametrize('supports_range', [True, False])
+def test_iter_stream_reads_whole_file(server, executor, supports_range):
+    server.supports_range = supports_range
+    data = b''.join(bytes(chunk) for chunk in make_downloader(executor).iter_stream(server.url))
+    assert data == DATA
+
+
+def test_interleaved_streams_share_one_connection_slot(server, executor):
+    # Như streaming mux: hai stream được đọc xen kẽ; slot phải được trả trước khi yield
+    downloader = make_downloader(executor, connection_limiter=ConnectionLimiter(max_per_host=1))
+    result = {}
+
+    def mux():
+        video, audio = bytearray(), bytearray()
+        for video_chunk, audio_chunk in zip(downloader.iter_stream(server.url),
+                                            downloader.iter_stream(server.url + '?audio')):
+            video.extend(video_chunk)
+            audio.extend(audio_chunk)
+        result['data'] = (bytes(video), bytes(audio))
+
+    thread = threading.Thread(target=mux, daemon=True)
+    thread.start()
+    thread.join(20)
+    assert not thread.is_alive(), "Hai stream chờ nhau slot kết nối"
+    assert result['data'] == (DATA, DATA)
+
+
+def test_segment_requests_reuse_keep_alive_connections(server, tmp_path):
+    dest = str(tmp_path / 'video.mp4')
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        make_downloader(pool).download(server.url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    # Body đọc hết qua urllib3 thì kết nối được trả về pool và dùng lại
+    assert server.connections < len(server.requests)
+    assert server.connections <= 3
+
+
+def test_session_stats_count_real_connections(server, executor, tmp_path):
+    session_pool = HttpSessionPool()
+    downloader = make_downloader(executor)
+    downloader.session_pool = session_pool
+    downloader.download(server.url, str(tmp_path / 'video.mp4'))
+
+    stats = session_pool.stats()[f'127.0.0.1:{server.server_port}']
+    assert stats['requests'] == len(server.requests)
+    assert stats['connections'] == server.connections
+    assert stats['reused'] == len(server.requests) - server.connections
+
+
+def test_closing_single_stream_early_releases_half_open_probe(server, executor):
+    server.supports_range = False
+    downloader = make_downloader(executor)
+    retry_policy = RetryPolicy(max_attempts=1, base_delay=0, max_delay=0, failure_threshold=1,
+                               cooldown=0)
+    downloader.retry_policy = retry_policy
+    downloader.probe = lambda url: (len(DATA), False)
+    # Breaker mở rồi hết cooldown: request kế tiếp là request thử (half-open)
+    retry_policy.record_failure(server.url)
+
+    stream = downloader.iter_stream(server.url)
+    assert len(next(stream)) > 0
+    stream.close()
+
+    # Request thử đã được ghi nhận nên breaker không bị kẹt ở trạng thái probing
+    retry_policy.before_request(server.url)
@@ -0,0 +1,26 @@
+"""Test phân loại lỗi của negative_cache"""
+
+import pytest
+
+from src.negative_cache import classify_failure
+
+
+@pytest.mark.parametrize('message, expected', [
+    ("ERROR: [youtube] abc: Video unavailable. This video is private", 'private'),
+    ("ERROR: [youtube] abc: This video has been removed by the uploader", 'deleted'),
+    ("Video unavailable. The uploader has not made this video available in your country", 'geo'),
+    ("ERROR: [youtube] abc: Video unavailable", 'unavailable'),
+])
+def test_permanent_failures_are_classified(message, expected):
+    assert classify_failure(message) == expected
+
+
+@pytest.mark.parametrize('message', [
+    "ERROR: [youtube] abc: Video unavailable. This content isn't available, try again later.",
+    "Video unavailable. This video is temporarily unavailable",
+    "ERROR: [youtube] abc: Sign in to confirm you’re not a bot",
+    "HTTP Error 429: Too Many Requests",
+    "Connection reset by peer",
+])
+def test_transient_failures_are_not_cached(message):
+    assert classify_failure(message) is None
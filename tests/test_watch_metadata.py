@@ -0,0 +1,217 @@
+"""Test đọc metadata từ trang watch (fixtures/watch) và đường quay về yt-dlp"""
+
+import json
+import os
+
+import pytest
+
+from src.watch_metadata import (FastPathError, VideoUnavailableError, WatchPageMetadata,
+                                estimate_stream_size, info_from_player_response,
+                                parse_player_response)
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'watch')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text=''):
+        self.status_code = status_code
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSessionPool:
+    """Trả trang watch theo ID video và oEmbed theo fixture '<page>.oembed.json'"""
+
+    def __init__(self, pages):
+        self.pages = pages      # video_id -> tên fixture
+        self.requests = []
+
+    def get(self, url, timeout=None, cookies=None):
+        self.requests.append(url)
+        video_id = url.rsplit('v%3D', 1)[-1].split('&')[0] if '/oembed' in url \
+            else url.split('v=', 1)[1].split('&')[0]
+        page = self.pages.get(video_id)
+        if page is None:
+            return FakeResponse(404)
+        if '/oembed' in url:
+            name = page.replace('.html', '.oembed.json')
+            if not os.path.exists(os.path.join(FIXTURES, name)):
+                return FakeResponse(404)
+            return FakeResponse(200, read_fixture(name))
+        return FakeResponse(200, read_fixture(page))
+
+
+def watch_metadata(oembed=True, **pages):
+    return WatchPageMetadata('https://www.youtube.com', session_pool=FakeSessionPool(pages),
+                             oembed=oembed)
+
+
+def test_parse_player_response_reads_whole_object():
+    player = parse_player_response(read_fixture('normal.html'))
+    details = player['videoDetails']
+    assert details['videoId'] == 'okVideo0001'
+    # Mô tả chứa '};' không làm cắt ngang object
+    assert details['shortDescription'] == 'Mô tả có cả }; và </script> ở giữa'
+
+
+def test_parse_player_response_on_consent_page_raises():
+    with pytest.raises(FastPathError):
+        parse_player_response(read_fixture('consent.html'))
+
+
+def test_info_from_player_response_normal_page():
+    html = read_fixture('normal.html')
+    info = info_from_player_response(parse_player_response(html), html)
+    assert info['id'] == 'okVideo0001'
+    assert info['title'] == 'Tiêu đề "hay"'
+    assert info['duration'] == 754
+    assert info['view_count'] == 98765
+    assert info['like_count'] == 12345
+    assert info['tags'] == ['music', 'live']
+    assert info['thumbnail'] == 'https://i.ytimg.com/vi/okVideo0001/maxresdefault.jpg'
+
+
+def adaptive_format(itag, mime, content_length, bitrate, **fields):
+    return {'itag': itag, 'mimeType': mime, 'contentLength': str(content_length),
+            'bitrate': bitrate, 'signatureCipher': f's=sig&url=https%3A%2F%2Fv%2F{itag}', **fields}
+
+
+def test_estimate_stream_size_follows_policy():
+    player = {'streamingData': {'adaptiveFormats': [
+        adaptive_format(137, 'video/mp4; codecs="avc1.640028"', 50_000_000, 4_000_000,
+                        height=1080, fps=30),
+        adaptive_format(136, 'video/mp4; codecs="avc1.4d401f"', 20_000_000, 1_500_000,
+                        height=720, fps=30),
+        adaptive_format(140, 'audio/mp4; codecs="mp4a.40.2"', 3_000_000, 130_000,
+                        audioChannels=2),
+    ]}}
+    assert estimate_stream_size(player, 600, {'max_height': 720}) == 23_000_000
+    assert estimate_stream_size(player, 600, {'max_height': 1080}) == 53_000_000
+    assert estimate_stream_size({}, 600) is None
+
+
+def test_info_from_player_response_without_formats_has_no_size():
+    html = read_fixture('normal.html')
+    assert info_from_player_response(parse_player_response(html), html)['filesize'] is None
+
+
+@pytest.mark.parametrize('page, reason', [
+    ('private.html', 'Private video'),
+    ('removed.html', 'This video has been removed by the uploader'),
+])
+def test_info_from_player_response_unavailable_video(page, reason):
+    html = read_fixture(page)
+    with pytest.raises(VideoUnavailableError, match=reason):
+        info_from_player_response(parse_player_response(html), html)
+
+
+def test_info_from_player_response_bot_check_is_not_final():
+    # Bot check không phải lỗi của video: để yt-dlp thử lại
+    html = read_fixture('bot_check.html')
+    with pytest.raises(FastPathError):
+        info_from_player_response(parse_player_response(html), html)
+
+
+def test_fetch_consent_page_falls_back_to_oembed():
+    backend = watch_metadata(consent0001='consent.html')
+    info = backend.fetch('consent0001')
+    assert info['title'] == 'Tiêu đề từ oEmbed'
+    assert info['duration'] is None and info['view_count'] is None
+    assert any('/oembed' in url for url in backend.session_pool.requests)
+
+
+def test_fetch_without_oembed_raises_fast_path_error():
+    backend = watch_metadata(oembed=False, consent0001='consent.html')
+    with pytest.raises(FastPathError):
+        backend.fetch('consent0001')
+
+
+def test_fetch_bot_check_without_oembed_raises_fast_path_error():
+    backend = watch_metadata(oembed=False, botcheck001='bot_check.html')
+    with pytest.raises(FastPathError):
+        backend.fetch('botcheck001')
+
+
+class TestLoaderFallback:
+    """YoutuberAssistant.fetchWatchMetadata quay về yt-dlp khi trang watch không đủ dữ liệu"""
+
+    @pytest.fixture
+    def loader(self):
+        pytest.importorskip('PyQt6')
+        pytest.importorskip('yt_dlp')
+        pytest.importorskip('bs4')
+        pytest.importorskip('pytubefix')
+        from src.yt_loader import YoutuberAssistant
+
+        class Signal:
+            def __init__(self):
+                self.messages = []
+
+            def emit(self, message):
+                self.messages.append(message)
+
+        class DirectRetry:
+            def call(self, url, func, *args, stop_event=None, **kwargs):
+                return func(*args, **kwargs)
+
+        class DirectConcurrency:
+            def call(self, url, max_limit, func, *args, kind=None, **kwargs):
+                return func(*args, **kwargs)
+
+        loader = YoutuberAssistant.__new__(YoutuberAssistant)
+        loader.retry_policy = DirectRetry()
+        loader.concurrency = DirectConcurrency()
+        loader.threads = 1
+        loader.min_views = loader.min_likes = loader.min_duration = 0
+        loader.errors_signal = Signal()
+        loader.failures = []
+        loader.ytdlp_calls = []
+        loader.recordFailure = lambda url, error: loader.failures.append(str(error))
+
+        def extract(url, returnIfFalse=None):
+            loader.ytdlp_calls.append(url)
+            return {'id': url.rsplit('=', 1)[-1], 'title': 'yt-dlp', 'views': 1, 'likes': 2,
+                    'duration': '00:00:10'}
+
+        loader.extractMetadataFromYtdlp = extract
+        loader.watch_metadata = watch_metadata(
+            oembed=True, okVideo0001='normal.html', consent0001='consent.html',
+            private0001='private.html', botcheck001='bot_check.html')
+        return loader
+
+    @staticmethod
+    def fetch(loader, video_id):
+        return loader.fetchWatchMetadata(video_id, f'https://www.youtube.com/watch?v={video_id}', True)
+
+    def test_normal_page_does_not_run_ytdlp(self, loader):
+        rs = self.fetch(loader, 'okVideo0001')
+        assert rs['title'] == 'Tiêu đề "hay"' and rs['likes'] == 12345
+        assert loader.ytdlp_calls == []
+
+    def test_private_page_is_recorded_without_ytdlp(self, loader):
+        assert self.fetch(loader, 'private0001') is None
+        assert loader.failures == ['Private video']
+        assert loader.ytdlp_calls == []
+
+    def test_bot_check_falls_back_to_ytdlp(self, loader):
+        rs = self.fetch(loader, 'botcheck001')
+        assert rs['title'] == 'yt-dlp'
+        assert len(loader.ytdlp_calls) == 1
+
+    def test_consent_page_with_filters_falls_back_to_ytdlp(self, loader):
+        loader.min_views = 100
+        rs = self.fetch(loader, 'consent0001')
+        assert rs['title'] == 'yt-dlp'
+        assert len(loader.ytdlp_calls) == 1
@@ -0,0 +1,200 @@
+"""Test YouTubeListingEngine với server aiohttp giả lập trang kênh + /youtubei/v1/browse"""
+
+import asyncio
+import contextlib
+import json
+
+import pytest
+from aiohttp import web
+
+from src.youtube_listing import FILTERED, ListingError, YouTubeListingEngine
+
+
+PAGE_SIZE = 10
+PAGE_COUNT = 3
+
+
+def video_ids():
+    return [f'vid{i:08d}' for i in range(PAGE_SIZE * PAGE_COUNT)]
+
+
+def page_items(page):
+    """Các renderer của trang thứ page (0 là trang đầu), kèm token của trang sau nếu còn"""
+    items = [{'richItemRenderer': {'content': {'videoRenderer': {
+        'videoId': video_id,
+        'title': {'runs': [{'text': f'Video {video_id}'}]},
+        'lengthText': {'simpleText': '1:05'},
+        'viewCountText': {'simpleText': '1,234 views'},
+    }}}} for video_id in video_ids()[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]]
+    if page + 1 < PAGE_COUNT:
+        items.append({'continuationItemRenderer': {'continuationEndpoint': {
+            'continuationCommand': {'token': f'page-{page + 1}'}}}})
+    return items
+
+
+class ListingServer:
+    """Trang đầu nhúng ytInitialData, các trang sau trả qua POST /youtubei/v1/browse"""
+
+    def __init__(self):
+        self.browse_requests = []
+
+    async def channel(self, request):
+        items = [] if request.match_info['channel_id'] == 'UCempty' else page_items(0)
+        data = {'contents': {'twoColumnBrowseResultsRenderer': {'tabs': [{'tabRenderer': {
+            'content': {'richGridRenderer': {'contents': items}}}}]}}}
+        html = ('<html><script>ytcfg.set({"INNERTUBE_API_KEY": "test-key", '
+                '"INNERTUBE_CLIENT_VERSION": "2.20240101.00.00"});</script>'
+                f'<script>var ytInitialData = {json.dumps(data)};</script></html>')
+        return web.Response(text=html, content_type='text/html')
+
+    async def browse(self, request):
+        assert request.query.get('key') == 'test-key'
+        token = (await request.json())['continuation']
+        self.browse_requests.append(token)
+        page = int(token.split('-')[1])
+        return web.json_response({'onResponseReceivedActions': [
+            {'appendContinuationItemsAction': {'continuationItems': page_items(page)}}]})
+
+
+@contextlib.asynccontextmanager
+async def listing_server():
+    server = ListingServer()
+    app = web.Application()
+    app.router.add_get('/channel/{channel_id}/videos', server.channel)
+    app.router.add_post('/youtubei/v1/browse', server.browse)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield server, f'http://127.0.0.1:{port}'
+    finally:
+        await runner.cleanup()
+
+
+def run_listing(handle_entry=None, engine_options=None, channel_id='UCtest', **run_options):
+    """Chạy engine.run trên server giả lập; trả về (result, server, các entry đã xử lý)"""
+    handled = []
+
+    async def default_handler(entry):
+        handled.append(entry)
+        return True
+
+    async def main():
+        async with listing_server() as (server, base_url):
+            engine = YouTubeListingEngine(base_url, **(engine_options or {}))
+            result = await engine.run(engine.channel_url(channel_id), handle_entry or default_handler,
+                                      **run_options)
+            return result, server
+
+    result, server = asyncio.run(main())
+    return result, server, handled
+
+
+def test_run_reads_every_page_in_order():
+    result, server, handled = run_listing()
+    assert result.complete
+    assert server.browse_requests == ['page-1', 'page-2']
+    assert sorted(entry['id'] for entry in handled) == video_ids()
+    assert result.ids == video_ids()
+    entry = handled[0]
+    assert entry['duration'] == 65 and entry['views'] == 1234
+    assert entry['url'].endswith(f"/watch?v={entry['id']}")
+
+
+def test_empty_first_page_raises_listing_error():
+    # Để loader chuyển sang liệt kê bằng yt-dlp thay vì coi danh sách là rỗng
+    with pytest.raises(ListingError):
+        run_listing(channel_id='UCempty')
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=abcdefghijk&list=PLtest123&index=2',
+    'https://www.youtube.com/playlist?list=PLtest123',
+])
+def test_rebase_routes_list_links_to_playlist_page(url):
+    engine = YouTubeListingEngine('http://127.0.0.1:1')
+    assert engine.rebase(url) == 'http://127.0.0.1:1/playlist?list=PLtest123'
+
+
+def test_rebase_keeps_channel_path():
+    engine = YouTubeListingEngine('http://127.0.0.1:1')
+    assert engine.rebase('https://www.youtube.com/@name/videos') == 'http://127.0.0.1:1/@name/videos'
+
+
+def test_stop_at_known_video_stops_listing():
+    known = video_ids()[12]
+    result, server, handled = run_listing(stop_at={known})
+    assert result.complete
+    assert server.browse_requests == ['page-1']
+    assert sorted(entry['id'] for entry in handled) == video_ids()[:12]
+    assert known not in result.ids
+
+
+def test_should_stop_ends_listing_early():
+    handled = []
+
+    async def handler(entry):
+        handled.append(entry['id'])
+        return True
+
+    result, server, _ = run_listing(handler, engine_options={'concurrency': 1},
+                                    should_stop=lambda: len(handled) >= 5)
+    assert not result.complete
+    assert len(handled) == 5
+    assert server.browse_requests == []
+
+
+def test_unsettled_entries_stay_above_cursor():
+    failed = video_ids()[15]
+
+    async def handler(entry):
+        return entry['id'] != failed
+
+    result, _, _ = run_listing(handler)
+    assert result.complete
+    assert result.ids == video_ids()[16:]
+
+
+def test_filtered_entries_do_not_enter_cursor():
+    filtered = set(video_ids()[::3])
+
+    async def handler(entry):
+        return FILTERED if entry['id'] in filtered else True
+
+    result, _, _ = run_listing(handler)
+    assert result.complete
+    # Video bị lọc không chặn mốc, nhưng mốc chỉ gồm video đã lên bảng
+    assert result.ids == [video_id for video_id in video_ids() if video_id not in filtered]
+
+
+def test_backpressure_waits_for_handlers_before_next_page():
+    observed = {}
+
+    async def main():
+        async with listing_server() as (server, base_url):
+            engine = YouTubeListingEngine(base_url, concurrency=2, max_pending=PAGE_SIZE)
+            release = asyncio.Event()
+            started = []
+
+            async def handler(entry):
+                started.append(entry['id'])
+                await release.wait()
+                return True
+
+            task = asyncio.ensure_future(engine.run(engine.channel_url('UCtest'), handler))
+            await asyncio.sleep(0.3)
+            # Trang đầu đã đủ max_pending entry chờ xử lý: chưa được tải trang sau
+            observed['browse_while_blocked'] = list(server.browse_requests)
+            observed['started_while_blocked'] = len(started)
+            release.set()
+            result = await asyncio.wait_for(task, 10)
+            observed['browse_after'] = list(server.browse_requests)
+            return result
+
+    result = asyncio.run(main())
+    assert observed['browse_while_blocked'] == []
+    assert observed['started_while_blocked'] == 2
+    assert observed['browse_after'] == ['page-1', 'page-2']
+    assert result.complete